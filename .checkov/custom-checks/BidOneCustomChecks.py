@@ -8,6 +8,14 @@ from checkov.common.models.enums import CheckResult, TRUE_BRANCH
 from checkov.terraform.checks.resource.base_resource_check import BaseResourceCheck
 from checkov.common.models.consts import ANY_VALUE
 import re
+import sys
+from pathlib import Path
+
+# Naming and tag policy shared with the validator scripts (.iac-rules.json)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'scripts'))
+from iac_rules import load_rules  # noqa: E402
+
+RULE_PACK = load_rules()
 
 
 class AzureResourceNamingConvention(BaseResourceCheck):
@@ -46,13 +54,11 @@ class AzureResourceNamingConvention(BaseResourceCheck):
             # Allow some flexibility for storage accounts (no hyphens allowed)
             if any(resource_type in self.supported_resources[1:2] for resource_type in self.supported_resources):
                 # Storage account naming is more restrictive
-                pattern = r'^[a-z0-9]{3,24}$'
-                if re.match(pattern, resource_name):
+                if RULE_PACK.name_patterns['storage_account'].match(resource_name):
                     return CheckResult.PASSED
             else:
                 # Standard naming convention
-                pattern = r'^[a-zA-Z0-9]+-[a-zA-Z0-9]+-[a-zA-Z0-9]+-[a-zA-Z0-9]+$'
-                if re.match(pattern, resource_name):
+                if RULE_PACK.name_patterns['azure_resource'].match(resource_name):
                     return CheckResult.PASSED
             
             return CheckResult.FAILED
@@ -68,18 +74,7 @@ class AzureResourceMandatoryTags(BaseResourceCheck):
     def __init__(self):
         name = "Ensure Azure resources have mandatory BidOne tags"
         id = "CKV_AZURE_BIDONE_002"
-        supported_resources = [
-            "azurerm_resource_group",
-            "azurerm_storage_account",
-            "azurerm_key_vault",
-            "azurerm_sql_server",
-            "azurerm_mssql_database",
-            "azurerm_servicebus_namespace",
-            "azurerm_cosmosdb_account",
-            "azurerm_redis_cache",
-            "azurerm_application_insights",
-            "azurerm_log_analytics_workspace"
-        ]
+        supported_resources = RULE_PACK.mandatory_tag_types
         categories = ["GENERAL_SECURITY"]
         super().__init__(name=name, id=id, categories=categories, supported_resources=supported_resources)
 
@@ -87,8 +82,6 @@ class AzureResourceMandatoryTags(BaseResourceCheck):
         """
         Scan resource configuration for mandatory tags
         """
-        required_tags = ["Environment", "Project", "ManagedBy"]
-        
         if 'tags' in conf:
             tags = conf['tags'][0]
             
@@ -98,13 +91,14 @@ class AzureResourceMandatoryTags(BaseResourceCheck):
             
             if isinstance(tags, dict):
                 # Check if all required tags are present
-                for required_tag in required_tags:
+                for required_tag in RULE_PACK.required_tags:
                     if required_tag not in tags:
                         return CheckResult.FAILED
                 
-                # Validate Project tag value
-                if 'Project' in tags and tags['Project'] != 'BidOne-Integration-Demo':
-                    return CheckResult.FAILED
+                # Validate tag values
+                for tag, allowed in RULE_PACK.tag_values.items():
+                    if tag in tags and tags[tag] not in allowed:
+                        return CheckResult.FAILED
                 
                 return CheckResult.PASSED
         
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+History audit for the BidOne IaC validators
+Reports when each naming or tag finding entered the infra tree and the commit
+that removed it, replaying first-parent history without checking anything out
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+
+from iac_runner import load_validator
+from iac_discovery import DEFAULT_ROOTS
+from iac_history import HistoryAudit, HistoryError, repository_root
+
+
+VALIDATORS = ['check-naming', 'validate-tags', 'run-custom-checks']
+
+
+def _short(commit):
+    return f"{commit.sha[:7]} ({commit.date})"
+
+
+def span_record(span):
+    """JSON Lines record of one finding and its commit range"""
+    finding = span.finding
+    return {
+        'validator': span.validator, 'rule': finding.rule, 'file': span.path, 'line': finding.line,
+        'address': finding.address, 'message': finding.message,
+        'introduced': span.introduced.sha, 'introduced_date': span.introduced.date,
+        'last_seen': span.last.sha, 'fixed': span.fixed.sha if span.fixed else None,
+        'fixed_date': span.fixed.date if span.fixed else None, 'commits': span.commits,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report the commit range over which each IaC finding existed')
+    parser.add_argument('revisions', nargs='*', default=['HEAD'],
+                        help='Revisions or ranges to replay, as for git log (default: HEAD, the whole history)')
+    parser.add_argument('--root', dest='roots', action='append', metavar='DIR',
+                        help=f"Directory to audit, relative to the repository root (repeatable; default: "
+                             f"{' '.join(DEFAULT_ROOTS)})")
+    parser.add_argument('--validator', dest='validators', action='append', choices=VALIDATORS,
+                        help='Validator to replay (repeatable; default: check-naming and validate-tags)')
+    parser.add_argument('--format', choices=['text', 'jsonl'], default='text',
+                        help='Output format: human-readable text (default) or one JSON record per finding')
+    args = parser.parse_args()
+
+    try:
+        toplevel = repository_root()
+    except HistoryError as e:
+        parser.error(str(e))
+    roots = [Path(root).resolve().relative_to(toplevel).as_posix() for root in args.roots or DEFAULT_ROOTS]
+    names = args.validators or ['check-naming', 'validate-tags']
+    checks = {name: load_validator(name).check_file for name in names}
+
+    audit = HistoryAudit(checks, roots, toplevel=toplevel)
+    try:
+        spans = audit.run(args.revisions)
+    except HistoryError as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+    present = [span for span in spans if span.fixed is None]
+
+    if args.format == 'jsonl':
+        for span in spans:
+            print(json.dumps(span_record(span)))
+        sys.exit(1 if present else 0)
+
+    print(f"Audited {audit.commit_count} commits: {len(audit.results)} file versions validated "
+          f"({audit.blob_reads} blobs read)")
+    path = None
+    for span in spans:
+        if span.path != path:
+            path = span.path
+            print(f"\nFindings in {path}:")
+        print(f"    - [{span.validator}] {span.finding}")
+        if span.fixed is not None:
+            print(f"      introduced in {_short(span.introduced)}, last present in {_short(span.last)}, "
+                  f"fixed in {_short(span.fixed)} ({span.commits} commits)")
+        else:
+            print(f"      introduced in {_short(span.introduced)}, still present at {_short(span.last)} "
+                  f"({span.commits} commits)")
+
+    if present:
+        print(f"\nFindings still present: {len(present)} (fixed during the audited range: {len(spans) - len(present)})")
+        sys.exit(1)
+    elif spans:
+        print(f"\n✓ All {len(spans)} findings in the audited range have been fixed")
+    else:
+        print("\n✓ No findings in the audited range")
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark the brace-matching block scanner against the legacy nested-brace regexes
+Runs each pathological input at doubling sizes so quadratic growth is visible
+"""
+
+import re
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from iac_scanner import iter_blocks  # noqa: E402
+
+
+# Patterns used by validate-tags.py before the block scanner
+LEGACY_TERRAFORM_PATTERN = re.compile(
+    r'resource\s+"([^"]+)"\s+"([^"]+)"\s*\{([^}]*(?:\{[^}]*\}[^}]*)*)\}', re.DOTALL
+)
+LEGACY_BICEP_PATTERN = re.compile(
+    r'resource\s+(\w+)\s+\'([^\']+)\'\s*=\s*\{([^}]*(?:\{[^}]*\}[^}]*)*)\}', re.DOTALL
+)
+TERRAFORM_RESOURCE_HEADER = re.compile(r'resource\s+"([^"]+)"\s+"([^"]+)"\s*\{')
+BICEP_RESOURCE_HEADER = re.compile(r'resource\s+(\w+)\s+\'([^\']+)\'\s*=\s*\{')
+
+# language: (legacy pattern, scanner header)
+PATTERNS = {
+    'hcl': (LEGACY_TERRAFORM_PATTERN, TERRAFORM_RESOURCE_HEADER),
+    'bicep': (LEGACY_BICEP_PATTERN, BICEP_RESOURCE_HEADER),
+}
+
+
+def unclosed_headers(size):
+    """Resource headers whose bodies never close; the legacy regex rescans to EOF for each"""
+    return 'resource "azurerm_storage_account" "main" {\n  name = "x"\n' * size
+
+
+def deep_nesting(size):
+    """Resources with blocks nested four levels deep"""
+    block = (
+        'resource "azurerm_linux_web_app" "app" {\n'
+        '  site_config {\n'
+        '    application_stack {\n'
+        '      docker {\n'
+        '        image = "nginx"\n'
+        '      }\n'
+        '    }\n'
+        '  }\n'
+        '  tags = local.common_tags\n'
+        '}\n'
+    )
+    return block * size
+
+
+def brace_heavy_strings(size):
+    """Resources whose strings and heredocs contain unbalanced braces"""
+    block = (
+        'resource "azurerm_key_vault_secret" "secret" {\n'
+        '  value = "}}${var.prefix}{"\n'
+        '  policy = <<EOF\n'
+        '{ "rules": [ { "a": 1 }\n'
+        'EOF\n'
+        '  tags = local.common_tags\n'
+        '}\n'
+    )
+    return block * size
+
+
+def bicep_unclosed_headers(size):
+    """Bicep resource declarations whose bodies never close"""
+    return "resource storage 'Microsoft.Storage/storageAccounts@2023-01-01' = {\n  name: 'x'\n" * size
+
+
+def bicep_deep_nesting(size):
+    """Bicep resources with objects nested four levels deep"""
+    block = (
+        "resource app 'Microsoft.Web/sites@2023-01-01' = {\n"
+        "  properties: {\n"
+        "    siteConfig: {\n"
+        "      appSettings: {\n"
+        "        image: 'nginx'\n"
+        "      }\n"
+        "    }\n"
+        "  }\n"
+        "  tags: commonTags\n"
+        "}\n"
+    )
+    return block * size
+
+
+def bicep_brace_heavy_strings(size):
+    """Bicep resources whose strings and multi-line strings contain unbalanced braces"""
+    block = (
+        "resource secret 'Microsoft.KeyVault/vaults/secrets@2023-02-01' = {\n"
+        "  name: '}}${prefix}{'\n"
+        "  properties: {\n"
+        "    value: '''\n"
+        "{ \"rules\": [ { \"a\": 1 }\n"
+        "'''\n"
+        "  }\n"
+        "  tags: commonTags\n"
+        "}\n"
+    )
+    return block * size
+
+
+# case: (language, generator)
+GENERATORS = {
+    'unclosed-headers': ('hcl', unclosed_headers),
+    'deep-nesting': ('hcl', deep_nesting),
+    'brace-heavy-strings': ('hcl', brace_heavy_strings),
+    'bicep-unclosed-headers': ('bicep', bicep_unclosed_headers),
+    'bicep-deep-nesting': ('bicep', bicep_deep_nesting),
+    'bicep-brace-heavy-strings': ('bicep', bicep_brace_heavy_strings),
+}
+
+
+def time_call(func, content, language, repeat):
+    """Return the best wall time over repeat runs and the last result"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(content, language)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def legacy_bodies(content, language):
+    return [body for _, _, body in PATTERNS[language][0].findall(content)]
+
+
+def scanner_bodies(content, language):
+    return [content[start:end] for _, start, end in iter_blocks(content, PATTERNS[language][1], language)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark block scanner against legacy regexes')
+    parser.add_argument('--sizes', default='100,200,400',
+                        help='Comma-separated block counts per input (default: 100,200,400)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is kept)')
+    parser.add_argument('--case', choices=sorted(GENERATORS), action='append',
+                        help='Input shape to run (default: all)')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    cases = args.case or list(GENERATORS)
+
+    print(f"{'case':<28}{'blocks':>8}{'bytes':>10}{'legacy s':>12}{'scanner s':>12}{'speedup':>10}  bodies")
+    for case in cases:
+        for size in sizes:
+            language, generator = GENERATORS[case]
+            content = generator(size)
+            legacy_time, legacy = time_call(legacy_bodies, content, language, args.repeat)
+            scanner_time, scanned = time_call(scanner_bodies, content, language, args.repeat)
+            speedup = legacy_time / scanner_time if scanner_time else float('inf')
+            wrong = sum(1 for old, exact in zip(legacy, scanned) if old != exact)
+            wrong += abs(len(legacy) - len(scanned))
+            status = 'match' if not wrong else f'legacy wrong on {wrong}/{len(scanned)}'
+            print(f"{case:<28}{size:>8}{len(content):>10}{legacy_time:>12.4f}{scanner_time:>12.4f}{speedup:>9.1f}x  {status}")
+
+
+if __name__ == '__main__':
+    main()
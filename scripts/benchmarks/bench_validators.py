@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Benchmark the naming, tag and custom-check validators on a synthetic corpus
+Generates a tree with generate_corpus.py, times each rule and the end-to-end
+main() of each script, and reports throughput, peak memory and the memory
+blocks each run leaves allocated. Results are compared with a stored
+baseline, with times scaled by a calibration loop timed between the runs
+on both machines; a regression beyond the tolerance fails the run
+"""
+
+import gc
+import io
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import iac_index  # noqa: E402
+import iac_modules  # noqa: E402
+import iac_symbols  # noqa: E402
+from iac_runner import load_validator  # noqa: E402
+from generate_corpus import generate  # noqa: E402
+
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baselines.json'
+
+# Slowdowns smaller than this are timer noise: benchmarks under 50 ms move
+# by more than their own length between runs on a shared machine
+MIN_REGRESSION_SECONDS = 0.025
+# Block counts of rules that keep little alive move by a few hundred between runs
+MIN_REGRESSION_KBLOCKS = 1.0
+
+# Iterations of the calibration loop, about 50 ms of CPU time
+CALIBRATION_ROUNDS = 50000
+
+
+def calibrate():
+    """
+    Return the CPU time of a fixed loop of the string, dict and regex work
+    the validators do; baseline times are scaled by how much slower or
+    faster it runs now than when the baseline was recorded
+    """
+    pattern = re.compile(r'"(\w+)"')
+    start = time.process_time()
+    counts = {}
+    for i in range(CALIBRATION_ROUNDS):
+        match = pattern.search(f'resource "type_{i % 97}" "name"')
+        counts[match.group(1)] = counts.get(match.group(1), 0) + 1
+    return time.process_time() - start
+
+
+def run_main(module, argv):
+    """Run a script's main() with argv, discarding its output and exit status"""
+    saved_argv = sys.argv
+    sys.argv = [module.__name__] + argv
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            module.main()
+    except SystemExit:
+        pass
+    finally:
+        sys.argv = saved_argv
+
+
+def benchmarks(corpus):
+    """Return [(name, setup, func, files)]; setup runs untimed before each measurement"""
+    naming = load_validator('check-naming')
+    tags = load_validator('validate-tags')
+    custom = load_validator('run-custom-checks')
+
+    tf_files = sorted(corpus.rglob('*.tf'))
+    bicep_files = sorted(corpus.rglob('*.bicep'))
+    all_files = tf_files + bicep_files
+
+    def cold():
+        # forget() also drops the line and resource offsets kept for each file
+        for file_path in list(iac_index._index):
+            iac_index.forget(file_path)
+        # Symbol tables and module graphs are built from the index
+        iac_symbols._tables.clear()
+        iac_symbols._fingerprints.clear()
+        iac_modules.invalidate()
+
+    def warm():
+        for file_path in all_files:
+            iac_index.parse_file(file_path)
+
+    def each(func, files):
+        return lambda: [func(file_path) for file_path in files]
+
+    # In-process, so a lint daemon left running does not answer for main()
+    argv = ['--no-cache', '--no-daemon', '--jobs', '1']
+    return [
+        ('parse_file', cold, each(iac_index.parse_file, all_files), all_files),
+        ('validate_terraform_naming', warm, each(naming.validate_terraform_naming, tf_files), tf_files),
+        ('validate_instance_naming', warm, each(naming.validate_instance_naming, tf_files), tf_files),
+        ('validate_terraform_tags', warm, each(tags.validate_terraform_tags, tf_files), tf_files),
+        ('validate_bicep_tags', warm, each(tags.validate_bicep_tags, bicep_files), bicep_files),
+        ('validate_tag_variables', warm, each(tags.validate_tag_variables, tf_files), tf_files),
+        ('validate_custom_checks', warm, each(custom.validate_custom_checks, tf_files), tf_files),
+        ('check-naming main()', cold, lambda: run_main(naming, argv), all_files),
+        ('validate-tags main()', cold, lambda: run_main(tags, argv), all_files),
+    ]
+
+
+def time_benchmarks(cases, repeat):
+    """
+    Return ({name: best CPU time over repeat runs}, best calibration time)
+    Each round runs every benchmark once, the calibration loop before each,
+    so a slow spell of a shared machine costs a benchmark one of its runs
+    rather than all of them. Everything runs in this process (--jobs 1), so
+    CPU time is the cost of the work itself and is not inflated by other
+    load on a shared CI runner
+    """
+    best = {}
+    calibration = None
+    for _ in range(repeat):
+        for name, setup, func, _ in cases:
+            setup()
+            # Garbage left by setup() or the last run is not this run's cost
+            gc.collect()
+            calibrated = calibrate()
+            calibration = calibrated if calibration is None else min(calibration, calibrated)
+            start = time.process_time()
+            func()
+            elapsed = time.process_time() - start
+            best[name] = min(best.get(name, elapsed), elapsed)
+    return best, calibration
+
+
+def measure_memory(setup, func):
+    """
+    Return the peak traced memory and the blocks still allocated (result,
+    index and caches) after one run
+    Traced apart from the timed runs: tracemalloc slows allocation-heavy
+    code several-fold
+    """
+    setup()
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    try:
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    gc.collect()
+    blocks = sys.getallocatedblocks() - blocks
+    del result
+    return peak, blocks
+
+
+def compare(results, baseline, tolerance, scale=1.0):
+    """
+    Return a list of regressions against the baseline's benchmarks
+    Baseline times are multiplied by scale, this run's calibration time over
+    the baseline's
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        for key, label in (('seconds', 'time'), ('peak_mb', 'peak memory'), ('kblocks', 'allocated blocks')):
+            if key not in expected:
+                continue
+            value = expected[key] * scale if key == 'seconds' else expected[key]
+            limit = value * (1 + tolerance)
+            if key == 'seconds':
+                limit = max(limit, value + MIN_REGRESSION_SECONDS)
+            elif key == 'kblocks':
+                limit = max(limit, value + MIN_REGRESSION_KBLOCKS)
+            if result[key] > limit:
+                regressions.append(f"{name}: {label} {result[key]:.4f} exceeds baseline "
+                                   f"{value:.4f} by more than {tolerance:.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the IaC validators on a synthetic corpus')
+    parser.add_argument('--resources', type=int, default=10000, help='Corpus resources (default: 10000)')
+    parser.add_argument('--modules', type=int, default=8, help='Corpus Terraform modules (default: 8)')
+    parser.add_argument('--depth', type=int, default=4, help='Nested block depth (default: 4)')
+    parser.add_argument('--heredoc-lines', type=int, default=40, help='Lines per heredoc (default: 40)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement (best is kept)')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE,
+                        help='Baseline JSON to compare against (default: benchmarks/baselines.json)')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown or memory growth over the baseline (default: 0.25)')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Write this run as the new baseline instead of comparing')
+    args = parser.parse_args()
+
+    corpus_config = {
+        'resources': args.resources,
+        'modules': args.modules,
+        'depth': args.depth,
+        'heredoc_lines': args.heredoc_lines,
+    }
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='iac-bench-') as tmp:
+        corpus = Path(tmp)
+        summary = generate(corpus, args.resources, args.modules, args.depth, args.heredoc_lines)
+        print(f"Corpus: {summary['resources']} resources in {summary['files']} files "
+              f"({summary['bytes'] / 1e6:.1f} MB)\n")
+
+        # The validators discover files relative to the working directory
+        cwd = os.getcwd()
+        os.chdir(corpus)
+        try:
+            cases = benchmarks(corpus)
+            times, calibration = time_benchmarks(cases, args.repeat)
+
+            print(f"{'benchmark':<28}{'cpu s':>10}{'resources/s':>14}{'MB/s':>9}{'peak MB':>10}{'kblocks':>10}")
+            for name, setup, func, files in cases:
+                setup()
+                warm_files = [iac_index.parse_file(file_path) for file_path in files]
+                resources = sum(len(parsed.resources) for parsed in warm_files)
+                size = sum(file_path.stat().st_size for file_path in files)
+
+                seconds = times[name]
+                peak, blocks = measure_memory(setup, func)
+                results[name] = {'seconds': round(seconds, 4), 'peak_mb': round(peak / 1e6, 2),
+                                 'kblocks': round(blocks / 1e3, 1)}
+                print(f"{name:<28}{seconds:>10.4f}{resources / seconds:>14.0f}"
+                      f"{size / 1e6 / seconds:>9.1f}{peak / 1e6:>10.2f}{blocks / 1e3:>10.1f}")
+        finally:
+            os.chdir(cwd)
+    print(f"\nCalibration loop: {calibration:.4f} s")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'corpus': corpus_config, 'calibration_seconds': round(calibration, 4), 'benchmarks': results},
+                      f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nBaseline written to {args.baseline}")
+        sys.exit(0)
+
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to record one")
+        sys.exit(0)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('corpus') != corpus_config:
+        print(f"\nBaseline {args.baseline} was recorded for a different corpus; not comparing")
+        sys.exit(0)
+
+    # Baselines recorded without a calibration time are compared unscaled
+    scale = calibration / baseline.get('calibration_seconds', calibration)
+    regressions = compare(results, baseline.get('benchmarks', {}), args.tolerance, scale)
+    if regressions:
+        print(f"\nPerformance regressions against {args.baseline}:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+    else:
+        print(f"\n✓ No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
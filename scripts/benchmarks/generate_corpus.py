@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic Terraform and Bicep tree shaped like infra/
+Resources are spread over a root module, modules/* that it instantiates
+once per environment and Bicep templates, with deeply nested blocks, large
+heredocs, literal and computed tags and a share of naming and tagging
+violations, so the validators do representative work
+"""
+
+import random
+import argparse
+from pathlib import Path
+
+
+RESOURCES_PER_FILE = 250
+
+TERRAFORM_TYPES = [
+    'azurerm_storage_account',
+    'azurerm_key_vault',
+    'azurerm_redis_cache',
+    'azurerm_mssql_database',
+    'azurerm_servicebus_namespace',
+    'azurerm_linux_function_app',
+    'azurerm_api_management_api_policy',
+    'azurerm_cosmosdb_account',
+]
+
+BICEP_TYPES = [
+    'Microsoft.Storage/storageAccounts@2023-01-01',
+    'Microsoft.Web/sites@2023-01-01',
+    'Microsoft.KeyVault/vaults@2023-02-01',
+    'Microsoft.Cache/redis@2023-04-01',
+]
+
+# Literal tags, computed tags and the violations the validators look for
+TERRAFORM_TAGS = [
+    '  tags = local.common_tags\n',
+    '  tags = {\n'
+    '    Environment = var.environment\n'
+    '    Project     = "BidOne-Integration-Demo"\n'
+    '    ManagedBy   = "Terraform"\n'
+    '  }\n',
+    '  tags = merge(local.common_tags, {\n'
+    '    Component = "orders"\n'
+    '  })\n',
+    '  tags = {\n'
+    '    Environment = "dev"\n'
+    '    Project     = "Legacy"\n'
+    '  }\n',
+]
+
+
+def _nested(depth, indent='  '):
+    """A chain of nested blocks depth levels deep"""
+    if depth == 0:
+        return f'{indent}enabled = true\n'
+    return f'{indent}level_{depth} {{\n{_nested(depth - 1, indent + "  ")}{indent}}}\n'
+
+
+def _heredoc(lines):
+    body = ''.join(f'    <set-header name="x-{i}" exists-action="override"><value>{{{i}}}</value></set-header>\n'
+                   for i in range(lines))
+    return f'  xml_content = <<XML\n<policies>\n  <inbound>\n{body}  </inbound>\n</policies>\nXML\n'
+
+
+def terraform_resource(rng, index, depth, heredoc_lines):
+    resource_type = rng.choice(TERRAFORM_TYPES)
+    # One in ten names breaks the snake_case or generic-name rules
+    name = rng.choice(['Main', 'this', 'main']) if index % 10 == 0 else f'orders_{index}'
+    text = f'resource "{resource_type}" "{name}" {{\n'
+    if index % 7 == 0:
+        text += f'  storage_account_name = "Bad_Name_{index}"\n'
+    else:
+        text += f'  resource_group_name = "bidone-orders-dev-{index:04d}"\n'
+    text += f'  name     = "${{local.prefix}}-{index}"\n  location = var.location\n'
+    text += '  description = "braces in strings } { ${var.suffix}"\n'
+    text += _nested(depth)
+    if resource_type == 'azurerm_api_management_api_policy':
+        text += _heredoc(heredoc_lines)
+    if resource_type == 'azurerm_storage_account':
+        text += '  min_tls_version = "TLS1_2"\n  public_network_access_enabled = false\n'
+    text += rng.choice(TERRAFORM_TAGS)
+    return text + '}\n\n'
+
+
+def terraform_variables(index):
+    return (
+        'variable "location" {\n  type    = string\n  default = "East US"\n}\n\n'
+        'variable "environment" {\n  type = string\n}\n\n'
+        'variable "tags" {\n'
+        '  type = map(string)\n'
+        '  default = {\n'
+        '    Environment = "dev"\n'
+        '    Project     = "BidOne-Integration-Demo"\n'
+        + ('' if index % 3 else '    ManagedBy   = "Terraform"\n') +
+        '  }\n'
+        '}\n'
+    )
+
+
+def terraform_locals():
+    return (
+        'locals {\n'
+        '  prefix = "bidone-${var.environment}"\n'
+        '  common_tags = merge({\n'
+        '    Environment = var.environment\n'
+        '    Project     = "BidOne-Integration-Demo"\n'
+        '    ManagedBy   = "Terraform"\n'
+        '  }, var.tags)\n'
+        '}\n\n'
+    )
+
+
+# Tags each environment's module calls pass; staging overrides Project
+MODULE_CALL_TAGS = {
+    'dev': 'local.common_tags',
+    'staging': 'merge(local.common_tags, { Project = "Legacy" })',
+    'prod': 'local.common_tags',
+}
+
+
+def module_calls(modules):
+    """Root module blocks instantiating every module once per environment"""
+    return ''.join(
+        f'module "module_{number:02d}_{environment}" {{\n'
+        f'  source      = "./modules/module-{number:02d}"\n'
+        f'  environment = "{environment}"\n'
+        f'  tags        = {tags}\n'
+        f'}}\n\n'
+        for number in range(modules) for environment, tags in MODULE_CALL_TAGS.items()
+    )
+
+
+def bicep_resource(rng, index):
+    resource_type = rng.choice(BICEP_TYPES)
+    name = f'orders{index}' if index % 10 else f'orders_{index}'
+    if index % 9 == 0:
+        return (f"resource {name} '{resource_type}' = [for i in range(0, 3): {{\n"
+                f"  name: '${{prefix}}-{index}-${{i}}'\n  location: location\n}}]\n\n")
+    tags = ("  tags: {\n    Environment: environment\n    Project: 'BidOne-Integration-Demo'\n"
+            "    ManagedBy: 'Bicep'\n  }\n") if index % 4 else "  tags: {\n    Environment: environment\n  }\n"
+    return (f"resource {name} '{resource_type}' = {{\n"
+            f"  name: '${{prefix}}-{index}'\n  location: location\n"
+            f"  properties: {{\n    siteConfig: {{\n      appSettings: [\n"
+            f"        {{\n          name: 'KEY_{index}'\n          value: '}}{{'\n        }}\n"
+            f"      ]\n    }}\n  }}\n{tags}}}\n\n")
+
+
+def _write_chunks(directory, suffix, blocks, header):
+    """Write blocks into main-NNN files of RESOURCES_PER_FILE each; return (files, bytes)"""
+    directory.mkdir(parents=True, exist_ok=True)
+    files = size = 0
+    for chunk in range(0, len(blocks), RESOURCES_PER_FILE):
+        text = header + ''.join(blocks[chunk:chunk + RESOURCES_PER_FILE])
+        (directory / f'main-{chunk // RESOURCES_PER_FILE:03d}{suffix}').write_text(text)
+        files += 1
+        size += len(text.encode())
+    return files, size
+
+
+def generate(root, resources=10000, modules=8, depth=4, heredoc_lines=40, bicep_share=0.2, seed=1):
+    """
+    Write the corpus under root (root/infra/terraform, root/infra/bicep)
+    Returns a summary dict with files, resources and bytes written
+    """
+    rng = random.Random(seed)
+    root = Path(root)
+    terraform_root = root / 'infra' / 'terraform'
+    bicep_root = root / 'infra' / 'bicep'
+
+    bicep_count = int(resources * bicep_share)
+    terraform_count = resources - bicep_count
+    # Modules and the root module share the Terraform resources evenly
+    groups = [terraform_root] + [terraform_root / 'modules' / f'module-{i:02d}' for i in range(modules)]
+
+    files = size = 0
+    index = 0
+    for group_number, directory in enumerate(groups):
+        count = terraform_count // len(groups) + (1 if group_number < terraform_count % len(groups) else 0)
+        blocks = [terraform_resource(rng, index + i, depth, heredoc_lines) for i in range(count)]
+        index += count
+        chunk_files, chunk_size = _write_chunks(directory, '.tf', blocks, terraform_locals())
+        variables = terraform_variables(group_number)
+        (directory / 'variables.tf').write_text(variables)
+        files += chunk_files + 1
+        size += chunk_size + len(variables.encode())
+
+    calls = module_calls(modules)
+    (terraform_root / 'modules.tf').write_text(calls)
+    files += 1
+    size += len(calls.encode())
+
+    blocks = [bicep_resource(rng, i) for i in range(bicep_count)]
+    header = "param location string = resourceGroup().location\nparam environment string\nvar prefix = 'bidone'\n\n"
+    chunk_files, chunk_size = _write_chunks(bicep_root, '.bicep', blocks, header)
+    files += chunk_files
+    size += chunk_size
+
+    return {'files': files, 'resources': resources, 'bytes': size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic IaC corpus for the validator benchmarks')
+    parser.add_argument('output', help='Directory to write infra/terraform and infra/bicep under')
+    parser.add_argument('--resources', type=int, default=10000, help='Total resources (default: 10000)')
+    parser.add_argument('--modules', type=int, default=8, help='Terraform modules under modules/ (default: 8)')
+    parser.add_argument('--depth', type=int, default=4, help='Nested block depth per resource (default: 4)')
+    parser.add_argument('--heredoc-lines', type=int, default=40,
+                        help='Lines per policy heredoc (default: 40)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+    args = parser.parse_args()
+
+    summary = generate(args.output, args.resources, args.modules, args.depth, args.heredoc_lines, seed=args.seed)
+    print(f"Wrote {summary['resources']} resources in {summary['files']} files "
+          f"({summary['bytes'] / 1e6:.1f} MB) under {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,120 +4,292 @@ Naming convention validation script for BidOne project
 Validates that resources follow the project naming standards
 """
 
-import re
-import sys
 import json
+import functools
 from pathlib import Path
 import argparse
 
+from iac_runner import add_jobs_argument
+from iac_index import parse_file
+from iac_symbols import attribute_value
+from iac_modules import instance_fingerprint, module_instances
+from iac_cache import add_cache_arguments, ruleset_version
+from iac_findings import Finding, finding_at, add_format_argument
+from iac_baseline import add_baseline_arguments
+from iac_discovery import add_discovery_arguments
+from iac_plan import PlanFormatError, planned_resources
+from iac_profile import add_profile_arguments, profiled
+from iac_environments import add_environment_arguments, compile_template, load_environments
+from iac_daemon import add_daemon_argument
+from iac_gitdiff import add_since_argument
+from iac_rules import RULES_FILE, load_rules
+from iac_report import Report, run_checks, select_files, wrap_check
 
+
+# Naming rules from the shared rules file (.iac-rules.json)
+RULE_PACK = load_rules()
+SNAKE_CASE = RULE_PACK.name_patterns['terraform_resource']
+CAMEL_CASE = RULE_PACK.name_patterns['bicep_resource']
+# project-service-environment-suffix
+AZURE_RESOURCE_NAME = RULE_PACK.name_patterns['azure_resource']
+# Storage accounts allow no hyphens
+STORAGE_ACCOUNT_NAME = RULE_PACK.name_patterns['storage_account']
+GENERIC_NAMES = RULE_PACK.generic_names
+
+# Azure resources whose resolved name is checked in plan files, and the
+# naming pattern that applies to each
+NAMED_RESOURCE_TYPES = RULE_PACK.named_types
+
+# Rule ids reported in structured output
+RULES = {
+    'terraform-snake-case': 'Terraform resource names use snake_case',
+    'bicep-camel-case': 'Bicep symbolic resource names use camelCase',
+    'descriptive-name': "Resource names are descriptive, not generic ('main', 'this', ...)",
+    'azure-resource-name': 'Azure resource names follow project-service-environment-suffix',
+    'storage-account-name': 'Storage account names are 3-24 lowercase alphanumeric characters',
+    'plan-json': 'Plan files are `terraform show -json` output',
+}
+
+RULESET_VERSION = ruleset_version(
+    __file__, RULES_FILE, Path(__file__).with_name('iac_rules.py'),
+    Path(__file__).with_name('iac_symbols.py'), Path(__file__).with_name('iac_modules.py'),
+    Path(__file__).with_name('iac_hcl.py'),
+)
+
+
+@profiled
 def validate_terraform_naming(file_path):
     """Validate Terraform resource naming conventions"""
     issues = []
+    parsed = parse_file(file_path)
     
-    with open(file_path, 'r') as f:
-        content = f.read()
-    
-    # Find resource definitions
-    resource_pattern = r'resource\s+"([^"]+)"\s+"([^"]+)"\s*{'
-    resources = re.findall(resource_pattern, content, re.MULTILINE)
-    
-    for resource_type, resource_name in resources:
+    for resource in parsed.resources:
+        resource_name = resource.name
+        
         # Check resource name follows snake_case
-        if not re.match(r'^[a-z0-9_]+$', resource_name):
-            issues.append(f"Resource '{resource_name}' should use snake_case naming")
+        if not SNAKE_CASE.match(resource_name):
+            issues.append(finding_at(parsed, resource.start, 'terraform-snake-case',
+                                     "Resource '{}' should use snake_case naming", resource_name))
         
         # Check for meaningful names (not just 'main', 'this', etc.)
-        if resource_name in ['main', 'this', 'example', 'test']:
-            issues.append(f"Resource '{resource_name}' should have a more descriptive name")
-    
-    # Find locals with resource names
-    locals_pattern = r'(\w+_name)\s*=\s*"([^"]+)"'
-    locals_matches = re.findall(locals_pattern, content)
+        if resource_name in GENERIC_NAMES:
+            issues.append(finding_at(parsed, resource.start, 'descriptive-name',
+                                     "Resource '{}' should have a more descriptive name", resource_name))
     
-    for var_name, name_value in locals_matches:
+    # Literal resource name assignments
+    for assignment in parsed.name_assignments:
+        var_name, name_value = assignment.attribute, assignment.value
         # Check if it follows BidOne naming convention for actual Azure resources
         if 'name' in var_name and not name_value.startswith('${'):
-            # Should follow pattern: project-service-environment-suffix
-            if not re.match(r'^[a-zA-Z0-9]+-[a-zA-Z0-9]+-[a-zA-Z0-9]+-[a-zA-Z0-9]+$', name_value):
-                # Exception for storage accounts (no hyphens allowed)
-                if 'storage' not in var_name and not re.match(r'^[a-z0-9]{3,24}$', name_value):
-                    issues.append(f"Resource name '{name_value}' should follow pattern: project-service-environment-suffix")
+            if not follows_naming_convention(var_name, name_value):
+                issues.append(finding_at(parsed, assignment.offset, 'azure-resource-name',
+                                         "Resource name '{}' should follow pattern: project-service-environment-suffix",
+                                         name_value))
     
     return issues
 
 
-def validate_bicep_naming(file_path):
-    """Validate Bicep resource naming conventions"""
+def follows_naming_convention(var_name, name_value):
+    """Check a *_name value against project-service-environment-suffix"""
+    if AZURE_RESOURCE_NAME.match(name_value):
+        return True
+    # Exception for storage accounts (no hyphens allowed)
+    return 'storage' in var_name or bool(STORAGE_ACCOUNT_NAME.match(name_value))
+
+
+@profiled
+def validate_environment_naming(file_path, environments):
+    """Evaluate interpolated resource names with each environment's tfvars"""
     issues = []
+    file_environments = environments.for_file(file_path)
+    if not file_environments:
+        return issues
+    
+    parsed = parse_file(file_path)
+    templates = [
+        (assignment, compile_template(assignment.value))
+        for assignment in parsed.name_assignments
+        if '${' in assignment.value
+    ]
     
-    with open(file_path, 'r') as f:
-        content = f.read()
+    for environment in file_environments:
+        for assignment, template in templates:
+            rendered = template.render(environment.values)
+            if rendered is None:
+                continue
+            name_value, display = rendered
+            var_name = assignment.attribute
+            if not follows_naming_convention(var_name, name_value):
+                issues.append(finding_at(parsed, assignment.offset, 'azure-resource-name',
+                                         "[{}] Resource name '{}' ({}) should follow pattern: "
+                                         "project-service-environment-suffix", environment.name, display, var_name))
+    
+    return issues
+
+
+@profiled
+def validate_instance_naming(file_path):
+    """Check module resource names set from caller inputs, once per module call"""
+    issues = []
+    instances = module_instances(file_path)
+    if not instances:
+        return issues
     
-    # Find resource definitions in Bicep
-    resource_pattern = r'resource\s+(\w+)\s+\'([^\']+)\'\s*='
-    resources = re.findall(resource_pattern, content, re.MULTILINE)
+    # Names that depend on the module's variables; the rest are the same for every call
+    parsed = parse_file(file_path)
+    named = []
+    for resource in parsed.resources:
+        if resource.type in NAMED_RESOURCE_TYPES:
+            name_value = attribute_value(parsed, resource, 'name')
+            if isinstance(name_value, str) and 'var.' in name_value:
+                named.append((resource, name_value))
     
-    for resource_name, resource_type in resources:
+    for instance in instances:
+        for resource, name_value in named:
+            resolved = instance.symbols.resolve_string(name_value)
+            if resolved is None:
+                continue
+            address = f"{instance.address}.{resource.type}.{resource.name}"
+            issue = name_issue(resource.type, address, resolved)
+            if issue is not None:
+                rule, message, message_args = issue
+                issues.append(finding_at(parsed, resource.start, rule, message, *message_args, address=address))
+    
+    return issues
+
+
+def name_issue(resource_type, address, name_value):
+    """
+    Return (rule, message, message args) if a resolved Azure resource name
+    breaks its type's pattern
+    """
+    if NAMED_RESOURCE_TYPES[resource_type] == 'storage_account':
+        if not STORAGE_ACCOUNT_NAME.match(name_value):
+            return ('storage-account-name',
+                    "Resource '{}' name '{}' should be 3-24 lowercase alphanumeric characters", (address, name_value))
+    elif not AZURE_RESOURCE_NAME.match(name_value):
+        return ('azure-resource-name',
+                "Resource '{}' name '{}' should follow pattern: project-service-environment-suffix", (address, name_value))
+    return None
+
+
+@profiled
+def validate_bicep_naming(file_path):
+    """Validate Bicep resource naming conventions"""
+    issues = []
+    parsed = parse_file(file_path)
+    
+    for resource in parsed.resources:
+        resource_name = resource.name
+        
         # Check resource name follows camelCase in Bicep
-        if not re.match(r'^[a-z][a-zA-Z0-9]*$', resource_name):
-            issues.append(f"Bicep resource '{resource_name}' should use camelCase naming")
+        if not CAMEL_CASE.match(resource_name):
+            issues.append(finding_at(parsed, resource.start, 'bicep-camel-case',
+                                     "Bicep resource '{}' should use camelCase naming", resource_name))
         
         # Check for meaningful names
-        if resource_name in ['main', 'this', 'example', 'test']:
-            issues.append(f"Bicep resource '{resource_name}' should have a more descriptive name")
+        if resource_name in GENERIC_NAMES:
+            issues.append(finding_at(parsed, resource.start, 'descriptive-name',
+                                     "Bicep resource '{}' should have a more descriptive name", resource_name))
     
     return issues
 
 
+@profiled
+def validate_plan_naming(file_path):
+    """Validate resolved resource names in a `terraform show -json` plan"""
+    issues = []
+    
+    try:
+        for change, after, after_unknown in planned_resources(file_path):
+            address = change.get('address', '')
+            resource_type = change.get('type', '')
+            
+            if resource_type not in NAMED_RESOURCE_TYPES:
+                continue
+            
+            # Names only known after apply cannot be checked yet
+            name_value = after.get('name')
+            if after_unknown.get('name') or not isinstance(name_value, str):
+                continue
+            
+            issue = name_issue(resource_type, address, name_value)
+            if issue is not None:
+                rule, message, message_args = issue
+                issues.append(Finding(rule, message, address=address, args=message_args))
+    except PlanFormatError as e:
+        # Report the file and go on to the next one
+        issues.append(Finding('plan-json', f"Plan is not `terraform show -json` output: {e}"))
+    
+    return issues
+
+
+def naming_dependencies(file_path):
+    """Module resource names can come from the inputs of the module's callers"""
+    return instance_fingerprint(file_path) if file_path.suffix == '.tf' else ''
+
+
+def check_file(file_path, environments=None):
+    """Return the naming issues for one file, or None if the file type is not validated"""
+    if file_path.suffix == '.tf':
+        issues = validate_terraform_naming(file_path)
+        issues.extend(validate_instance_naming(file_path))
+        if environments is not None:
+            issues.extend(validate_environment_naming(file_path, environments))
+        return issues
+    elif file_path.suffix == '.bicep':
+        return validate_bicep_naming(file_path)
+    elif file_path.suffix == '.json':
+        return validate_plan_naming(file_path)
+    return None
+
+
+def build_check(args, changes=None, profile=False):
+    """
+    Return the per-file check for the parsed options, scoped to changes
+    under --since; lint-iac.py builds the same check to run in its pipeline
+    """
+    check = check_file
+    if args.environments:
+        check = functools.partial(check_file, environments=load_environments(args.environments))
+    
+    # Findings depend on tfvars and sibling variables.tf, and profiles
+    # should measure the rules themselves, so both bypass the cache
+    return wrap_check(check, 'check-naming', RULESET_VERSION, args, changes, naming_dependencies,
+                      uncached=args.environments or profile, profile=profile)
+
+
 def main():
     parser = argparse.ArgumentParser(description='Validate resource naming conventions')
-    parser.add_argument('files', nargs='*', help='Files to validate')
+    parser.add_argument('files', nargs='*',
+                        help='Files to validate (.tf, .bicep, or `terraform show -json` plan .json)')
+    add_jobs_argument(parser)
+    add_cache_arguments(parser)
+    add_since_argument(parser)
+    add_discovery_arguments(parser)
+    add_daemon_argument(parser)
+    add_format_argument(parser)
+    add_baseline_arguments(parser)
+    add_environment_arguments(parser)
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    profile = args.profile or args.profile_textfile
+    report = Report(args, 'check-naming', RULES, [('naming conventions', 'naming', 'naming convention')])
     
-    all_issues = []
-    
-    # If no files specified, find all relevant files
-    if not args.files:
-        tf_files = list(Path('infra/terraform').rglob('*.tf'))
-        bicep_files = list(Path('infra/bicep').rglob('*.bicep'))
-        files_to_check = tf_files + bicep_files
-    else:
-        files_to_check = [Path(f) for f in args.files]
+    files_to_check, changes = select_files(parser, args)
+    check = build_check(args, changes, profile)
+    results = run_checks('check-naming', RULESET_VERSION, check, check_file, files_to_check, args,
+                         daemon=not (args.since or args.environments or profile))
+    report.consume(results, check)
     
-    for file_path in files_to_check:
-        if not file_path.exists():
-            continue
-            
-        print(f"Checking naming conventions in: {file_path}")
-        
-        if file_path.suffix == '.tf':
-            issues = validate_terraform_naming(file_path)
-        elif file_path.suffix == '.bicep':
-            issues = validate_bicep_naming(file_path)
-        else:
-            continue
-        
-        if issues:
-            print(f"  Issues found in {file_path}:")
-            for issue in issues:
-                print(f"    - {issue}")
-            all_issues.extend(issues)
-        else:
-            print(f"  ✓ No naming issues found")
-    
-    if all_issues:
-        print(f"\nTotal naming convention issues: {len(all_issues)}")
-        print("\nNaming Convention Guidelines:")
-        print("- Terraform resources: use snake_case for resource names")
-        print("- Bicep resources: use camelCase for resource names")
-        print("- Azure resource names: use pattern project-service-environment-suffix")
-        print("- Storage accounts: use lowercase alphanumeric only (no hyphens)")
-        print("- Use descriptive names, avoid generic names like 'main', 'this'")
-        sys.exit(1)
-    else:
-        print("\n✓ All naming conventions are correct!")
-        sys.exit(0)
+    report.finish([check], [
+        "\nNaming Convention Guidelines:",
+        "- Terraform resources: use snake_case for resource names",
+        "- Bicep resources: use camelCase for resource names",
+        "- Azure resource names: use pattern project-service-environment-suffix",
+        "- Storage accounts: use lowercase alphanumeric only (no hyphens)",
+        "- Use descriptive names, avoid generic names like 'main', 'this'",
+    ], "✓ All naming conventions are correct!")
 
 
 if __name__ == '__main__':
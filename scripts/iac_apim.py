@@ -0,0 +1,359 @@
+"""
+Streaming reader and scope model for API Management policy XML
+Policy documents embed C# expressions (@(...) and @{...}) whose quotes, angle
+brackets and ampersands are not escaped, so they are not well-formed XML.
+PolicyReader escapes them as the parser pulls chunks, and summarize_policy()
+folds iterparse events into per-section summaries, discarding each element
+once it ends, so memory stays constant however long a policy is
+"""
+
+import re
+import hashlib
+from pathlib import Path
+import xml.etree.ElementTree as ET
+
+from iac_index import body, parse_file
+
+
+SECTIONS = ('inbound', 'backend', 'outbound', 'on-error')
+
+# Scope kinds in the order the gateway nests them; <base /> pulls in the outer scope
+SCOPE_KINDS = ('service', 'product', 'api', 'operation')
+
+# Tokens that change the reader's state outside expressions
+MARKUP_SPECIAL = re.compile(r'<!--|<!\[CDATA\[|@[({]')
+MARKUP_END = {'comment': '-->', 'cdata': ']]>'}
+# Characters that change an expression's state or need escaping
+EXPRESSION_SPECIAL = re.compile(r'[()\[\]{}"\'\\<>&]')
+EXPRESSION_ESCAPES = {'"': '&quot;', "'": '&apos;', '<': '&lt;', '>': '&gt;', '&': '&amp;'}
+
+BICEP_POLICY_TYPE = re.compile(r'^Microsoft\.ApiManagement/service((?:/\w+)*)/policies$')
+LOAD_TEXT_CONTENT = re.compile(r"loadTextContent\(\s*'([^']+)'")
+BICEP_PARENT = re.compile(r'^\s*parent:\s*(\w+)', re.MULTILINE)
+BICEP_NAME = re.compile(r"^\s*name:\s*'([^']+)'", re.MULTILINE)
+SCOPE_LABELS = {'product': 'Product', 'api': 'API', 'operation': 'Operation'}
+KIND_BY_PATH = {'': 'service', '/products': 'product', '/apis': 'api', '/apis/operations': 'operation'}
+
+_summaries = {}
+_links = {}
+
+
+class PolicyReader:
+    """
+    File-like view of a policy document with its expressions XML-escaped
+    Only the last few characters of each chunk are held back, for a token
+    that may continue in the next one; expression state (nesting depth,
+    open C# string) carries across chunks
+    """
+
+    CHUNK_SIZE = 64 * 1024
+    # Characters that can still start a token: len('<![CDATA[') - 1
+    HOLD = 8
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.pending = ''
+        self.eof = False
+        # None in markup and text, else 'comment', 'cdata' or 'expression'
+        self.mode = None
+        self.depth = 0
+        self.quote = None
+        self.escaped = False
+
+    def read(self, size=-1):
+        translated = ''
+        while not translated and not (self.eof and not self.pending):
+            if not self.eof:
+                chunk = self.stream.read(self.CHUNK_SIZE)
+                self.eof = not chunk
+                self.pending += chunk
+            translated = self._consume()
+        return translated
+
+    def _consume(self):
+        """Translate as much of the pending text as is unambiguous"""
+        text = self.pending
+        output = []
+        position = 0
+        while position < len(text):
+            if self.mode == 'expression':
+                position = self._expression(text, position, output)
+            elif self.mode is not None:
+                terminator = MARKUP_END[self.mode]
+                end = text.find(terminator, position)
+                if end < 0:
+                    keep = len(text) if self.eof else max(position, len(text) - len(terminator) + 1)
+                    output.append(text[position:keep])
+                    position = keep
+                    break
+                output.append(text[position:end + len(terminator)])
+                position = end + len(terminator)
+                self.mode = None
+            else:
+                match = MARKUP_SPECIAL.search(text, position)
+                limit = len(text) if self.eof else len(text) - self.HOLD
+                if match is None or match.start() >= limit:
+                    limit = max(limit, position)
+                    output.append(text[position:limit])
+                    position = limit
+                    break
+                output.append(text[position:match.end()])
+                position = match.end()
+                if match.group() == '<!--':
+                    self.mode = 'comment'
+                elif match.group() == '<![CDATA[':
+                    self.mode = 'cdata'
+                else:
+                    self.mode = 'expression'
+                    self.depth = 1
+        self.pending = text[position:]
+        return ''.join(output)
+
+    def _expression(self, text, position, output):
+        """Escape expression text from position up to its closing bracket or the end of text"""
+        while position < len(text):
+            if self.escaped:
+                # The character after a backslash in a C# literal
+                self.escaped = False
+                char = text[position]
+                output.append(EXPRESSION_ESCAPES.get(char, char))
+                position += 1
+                continue
+            match = EXPRESSION_SPECIAL.search(text, position)
+            if match is None:
+                output.append(text[position:])
+                return len(text)
+            output.append(text[position:match.start()])
+            char = match.group()
+            position = match.end()
+            if self.quote is not None:
+                if char == '\\':
+                    self.escaped = True
+                elif char == self.quote:
+                    self.quote = None
+            elif char in '"\'':
+                self.quote = char
+            elif char in '([{':
+                self.depth += 1
+            elif char in ')]}':
+                self.depth -= 1
+                if self.depth == 0:
+                    output.append(char)
+                    self.mode = None
+                    return position
+            output.append(EXPRESSION_ESCAPES.get(char, char))
+        return position
+
+
+class SectionSummary:
+    """What one section of a policy document applies"""
+
+    __slots__ = ('elements', 'base', 'timeouts')
+
+    def __init__(self):
+        # Policy element names anywhere in the section
+        self.elements = set()
+        # True when the section includes the enclosing scope's policy
+        self.base = False
+        # The timeout attribute of each forward-request, None when unset
+        self.timeouts = []
+
+
+class PolicySummary:
+    """Sections of a policy document, or the XML error that stopped parsing"""
+
+    __slots__ = ('sections', 'error')
+
+    def __init__(self, sections, error=None):
+        self.sections = sections
+        self.error = error
+
+
+def summarize_policy(file_path):
+    """
+    Return the PolicySummary of a policy file, parsed at most once per run,
+    or None if the document is not a <policies> policy
+    """
+    key = Path(file_path).resolve()
+    if key not in _summaries:
+        _summaries[key] = _summarize(key)
+    return _summaries[key]
+
+
+def _summarize(file_path):
+    sections = {}
+    section = None
+    # The open elements; an ended element is always its parent's last child
+    open_elements = []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        try:
+            for event, element in ET.iterparse(PolicyReader(f), events=('start', 'end')):
+                if event == 'end':
+                    open_elements.pop()
+                    if open_elements:
+                        del open_elements[-1][-1]
+                    continue
+                open_elements.append(element)
+                depth = len(open_elements)
+                if depth == 1:
+                    if element.tag != 'policies':
+                        return None
+                elif depth == 2:
+                    section = sections.setdefault(element.tag, SectionSummary())
+                else:
+                    section.elements.add(element.tag)
+                    if element.tag == 'base' and depth == 3:
+                        section.base = True
+                    elif element.tag == 'forward-request':
+                        section.timeouts.append(element.get('timeout'))
+        except ET.ParseError as e:
+            return PolicySummary(sections, e)
+    return PolicySummary(sections)
+
+
+class PolicyScope:
+    """Where a policy file applies, and the Bicep resources that load it"""
+
+    __slots__ = ('kind', 'name', 'api', 'resources')
+
+    def __init__(self, kind, name, api=None, resources=()):
+        self.kind = kind
+        self.name = name
+        # The API an operation policy belongs to
+        self.api = api
+        # "file.bicep:symbolicName" of each resource whose value loads the file
+        self.resources = list(resources)
+
+    @property
+    def label(self):
+        if self.kind == 'service':
+            return 'Global policy'
+        return f"{SCOPE_LABELS[self.kind]} '{self.name}'"
+
+    @property
+    def address(self):
+        """Finding address: the first Bicep resource loading the file, else the scope"""
+        if self.resources:
+            return self.resources[0]
+        return 'service' if self.kind == 'service' else f"{self.kind}:{self.name}"
+
+
+def _bicep_links(directory):
+    """
+    {policy file: PolicyScope} for the policy resources declared in the Bicep
+    files of directory, read once per run
+    """
+    links = _links.get(directory)
+    if links is not None:
+        return links
+    links = _links[directory] = {}
+    for bicep_file in sorted(directory.glob('*.bicep')):
+        parsed = parse_file(bicep_file)
+        names = {}
+        parents = {}
+        for resource in parsed.resources:
+            if resource.body_start is None:
+                continue
+            text = body(parsed, resource)
+            match = BICEP_NAME.search(text)
+            if match:
+                names[resource.name] = match.group(1)
+            match = BICEP_PARENT.search(text)
+            if match:
+                parents[resource.name] = match.group(1)
+        for resource in parsed.resources:
+            match = BICEP_POLICY_TYPE.match(resource.type.split('@')[0])
+            kind = KIND_BY_PATH.get(match.group(1)) if match else None
+            if kind is None or resource.body_start is None:
+                continue
+            loaded = LOAD_TEXT_CONTENT.search(body(parsed, resource))
+            if loaded is None:
+                continue
+            owner = parents.get(resource.name)
+            name = names.get(owner, owner)
+            api = None
+            if kind == 'operation':
+                api_owner = parents.get(owner)
+                api = names.get(api_owner, api_owner)
+            policy_file = (directory / loaded.group(1)).resolve()
+            scope = links.get(policy_file)
+            if scope is None:
+                scope = links[policy_file] = PolicyScope(kind, name, api)
+            scope.resources.append(f"{bicep_file.name}:{resource.name}")
+    return links
+
+
+def policy_scope(file_path):
+    """
+    Return the PolicyScope of a policy file
+    Bicep files beside it and in its parent directory link it to a scope
+    through loadTextContent(); an unlinked file is scoped by its name, global
+    for global-*.xml and otherwise an API named after the file
+    """
+    file_path = Path(file_path).resolve()
+    for directory in (file_path.parent, file_path.parent.parent):
+        scope = _bicep_links(directory).get(file_path)
+        if scope is not None:
+            return scope
+    if file_path.stem.startswith('global'):
+        return PolicyScope('service', 'global')
+    return PolicyScope('api', file_path.stem)
+
+
+def enclosing_policies(file_path):
+    """
+    Return the policy files of the scopes enclosing file_path's, outermost
+    first, among the policy documents in its directory
+    """
+    file_path = Path(file_path).resolve()
+    scope = policy_scope(file_path)
+    depth = SCOPE_KINDS.index(scope.kind)
+    enclosing = []
+    for candidate in sorted(file_path.parent.glob('*.xml')):
+        if candidate == file_path:
+            continue
+        outer = policy_scope(candidate)
+        if outer.kind == 'service' and depth > 0:
+            enclosing.append((0, candidate))
+        elif outer.kind == 'api' and scope.kind == 'operation' and outer.name == scope.api:
+            enclosing.append((2, candidate))
+    return [candidate for _, candidate in sorted(enclosing, key=lambda item: item[0])
+            if summarize_policy(candidate) is not None]
+
+
+def effective_sections(summaries):
+    """
+    Combine the summaries of nested scopes, outermost first, into the
+    SectionSummary the gateway applies per section: a section takes the
+    enclosing scope's elements where it has <base /> or is left out
+    """
+    effective = {}
+    for summary in summaries:
+        for name in SECTIONS:
+            own = summary.sections.get(name)
+            if own is None:
+                continue
+            combined = SectionSummary()
+            combined.elements = set(own.elements)
+            combined.timeouts = list(own.timeouts)
+            outer = effective.get(name)
+            if own.base and outer is not None:
+                combined.elements |= outer.elements
+                combined.timeouts = outer.timeouts + combined.timeouts
+            combined.elements.discard('base')
+            effective[name] = combined
+    return effective
+
+
+def policy_fingerprint(file_path):
+    """
+    Hash of the files a policy's findings depend on besides its own: the
+    other policy documents beside it and the Bicep files that may load them
+    """
+    file_path = Path(file_path).resolve()
+    digest = hashlib.sha256()
+    for directory in (file_path.parent, file_path.parent.parent):
+        for other in sorted([*directory.glob('*.bicep'), *directory.glob('*.xml')]):
+            if other != file_path:
+                digest.update(other.name.encode() + b'\0' + other.read_bytes())
+    return digest.hexdigest()
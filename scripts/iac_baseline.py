@@ -0,0 +1,128 @@
+"""
+Baseline of accepted findings for the IaC validators
+The baseline file lists one finding per line as `path rule fingerprint`,
+sorted, where the fingerprint hashes the path, rule, resource address,
+message template and arguments and, for repeats of an identical finding,
+their order.
+Findings whose fingerprint is listed are dropped with a set lookup before
+any output is formatted, so adopting the validators on an older tree
+reports only new violations
+"""
+
+import os
+import hashlib
+import tempfile
+from pathlib import Path
+
+
+BASELINE_FILE = Path(__file__).resolve().parent.parent / '.iac-baseline'
+
+HEADER = (
+    "# Accepted IaC validator findings: path, rule and fingerprint, one per line.\n"
+    "# Regenerate with --update-baseline; findings listed here are not reported.\n"
+)
+
+
+def add_baseline_arguments(parser):
+    """Add the --baseline and --update-baseline options shared by the validators"""
+    parser.add_argument('--baseline', type=Path, default=BASELINE_FILE, metavar='FILE',
+                        help='Findings listed in FILE are not reported (default: .iac-baseline at '
+                             'the repository root, if present)')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Record the current findings of the checked files in the baseline '
+                             'instead of reporting them')
+
+
+def fingerprints(path, findings):
+    """
+    Yield the hash of what identifies each finding across runs, its key
+    (rule, resource address, message template and arguments); line numbers
+    and formatted messages are left out. Identical findings of a resource
+    (e.g. two *_name attributes with the same bad value) are numbered among
+    themselves, so a baseline accepts as many of them as were recorded and
+    no more, and findings elsewhere (e.g. ones --since leaves out) do not
+    shift the numbering
+    """
+    seen = {}
+    for finding in findings:
+        key = '\0'.join([path, *finding.key])
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        if occurrence:
+            key += f"\0{occurrence}"
+        yield hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+class Baseline:
+    """The accepted findings of a baseline file, for one validator's rules"""
+
+    def __init__(self, path, rules):
+        self.path = Path(path)
+        self.rules = rules
+        self.root = self.path.resolve().parent
+        # [(path, rule, fingerprint)] as listed in the file
+        self.entries = []
+        self.fingerprints = set()
+        self.suppressed = 0
+        # {path: [(path, rule, fingerprint)]} recorded by --update-baseline
+        self.recorded = {}
+
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    # Paths may hold spaces; the rule and fingerprint do not
+                    fields = line.rstrip('\n').rsplit(' ', 2)
+                    if len(fields) == 3 and not line.startswith('#'):
+                        self.entries.append(tuple(fields))
+                        self.fingerprints.add(fields[2])
+        except FileNotFoundError:
+            pass
+
+    def relative(self, file_path):
+        """The path of a checked file as the baseline records it, relative to the baseline's directory"""
+        return Path(os.path.relpath(Path(file_path).resolve(), self.root)).as_posix()
+
+    def filter(self, file_path, issues):
+        """Return the issues the baseline does not accept"""
+        if not issues or not self.fingerprints:
+            return issues
+        path = self.relative(file_path)
+        kept = [issue for issue, key in zip(issues, fingerprints(path, issues)) if key not in self.fingerprints]
+        self.suppressed += len(issues) - len(kept)
+        return kept
+
+    def record(self, file_path, issues):
+        """Remember a checked file's findings for update()"""
+        path = self.relative(file_path)
+        issues = issues or []
+        # A combined run records each validator's findings for the same file
+        self.recorded.setdefault(path, []).extend(
+            (path, issue.rule, key) for issue, key in zip(issues, fingerprints(path, issues))
+        )
+
+    def update(self):
+        """
+        Rewrite the baseline atomically: entries of this validator's rules
+        for files checked in this run, or that no longer exist, are replaced
+        by the findings recorded; everything else is kept
+        """
+        entries = {
+            entry for entry in self.entries
+            if entry[1] not in self.rules or (entry[0] not in self.recorded and (self.root / entry[0]).exists())
+        }
+        for recorded in self.recorded.values():
+            entries.update(recorded)
+
+        descriptor, temporary = tempfile.mkstemp(dir=self.root, prefix=self.path.name, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w') as f:
+                f.write(HEADER)
+                for entry in sorted(entries):
+                    f.write(' '.join(entry) + '\n')
+            # mkstemp creates the file private to the user
+            os.chmod(temporary, 0o644)
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        return len(entries)
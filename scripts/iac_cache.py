@@ -0,0 +1,183 @@
+"""
+Content-hash result cache for the IaC validators
+Findings are stored in SQLite keyed by file content hash plus rule-set
+version, so unchanged files skip parsing on repeated pre-commit runs.
+SQLite handles locking between parallel hook runs; the cache is bounded
+and evicts least recently used entries.
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+from pathlib import Path
+
+from iac_index import DIALECTS, parse_file
+from iac_findings import encode_findings, decode_findings
+
+
+# Bump when the stored result format changes
+CACHE_SCHEMA = 3
+
+DEFAULT_MAX_ENTRIES = 20000
+
+# Parser modules whose behaviour affects every validator's findings
+_SHARED_SOURCES = [
+    Path(__file__).with_name('iac_scanner.py'),
+    Path(__file__).with_name('iac_index.py'),
+    Path(__file__).with_name('iac_plan.py'),
+]
+
+_MISS = object()
+
+# One connection per (process, database), shared by every ResultCache in it
+_connections = {}
+
+
+def default_cache_dir():
+    """Return the per-user cache directory for validator results"""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(base) / 'bidone-iac-validators'
+
+
+def add_cache_arguments(parser):
+    """Add the cache options shared by the validators"""
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Do not read or write the result cache')
+    parser.add_argument('--cache-dir', type=Path, default=default_cache_dir(),
+                        help='Directory holding the result cache (default: %(default)s)')
+
+
+def ruleset_version(*source_files):
+    """
+    Fingerprint a validator's rules and code
+    source_files are the validator script, the rule files it loads and any
+    other modules its findings depend on
+    """
+    digest = hashlib.sha256(str(CACHE_SCHEMA).encode() + b'\0')
+    for path in [*map(Path, source_files), *_SHARED_SOURCES]:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """SQLite-backed store of findings per (validator, content hash)"""
+
+    def __init__(self, cache_dir, namespace):
+        self.path = Path(cache_dir) / 'results.sqlite'
+        self.namespace = namespace
+
+    def _connect(self):
+        # Connections must not cross a fork, so they are keyed by process id
+        key = (os.getpid(), self.path)
+        conn = _connections.get(key)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                ' namespace TEXT NOT NULL, key TEXT NOT NULL, issues TEXT NOT NULL,'
+                ' last_used REAL NOT NULL, PRIMARY KEY (namespace, key))'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+            _connections[key] = conn
+        return conn
+
+    def get(self, key):
+        """Return the stored findings for key, or the _MISS sentinel"""
+        conn = self._connect()
+        row = conn.execute(
+            'SELECT issues FROM results WHERE namespace = ? AND key = ?', (self.namespace, key)
+        ).fetchone()
+        if row is None:
+            return _MISS
+        conn.execute(
+            'UPDATE results SET last_used = ? WHERE namespace = ? AND key = ?',
+            (time.time(), self.namespace, key),
+        )
+        return decode_findings(json.loads(row[0]))
+
+    def put(self, key, issues):
+        self._connect().execute(
+            'INSERT OR REPLACE INTO results (namespace, key, issues, last_used) VALUES (?, ?, ?, ?)',
+            (self.namespace, key, json.dumps(encode_findings(issues)), time.time()),
+        )
+
+    def prune(self, max_entries=DEFAULT_MAX_ENTRIES):
+        """Evict least recently used entries beyond max_entries"""
+        self._connect().execute(
+            'DELETE FROM results WHERE rowid IN ('
+            ' SELECT rowid FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+            (max_entries,),
+        )
+
+    def close(self):
+        conn = _connections.pop((os.getpid(), self.path), None)
+        if conn is not None:
+            conn.close()
+
+
+class CachedCheck:
+    """
+    Wrap a per-file check so unchanged files return their stored findings
+    Picklable, so it can be handed to the process pool; each worker process
+    opens one connection. Cache errors never fail a run, the check just runs
+    uncached. dependencies, if given, maps a file to a string covering any
+    other files its findings depend on; it becomes part of the key.
+    """
+
+    def __init__(self, check, namespace, version, cache_dir, dependencies=None):
+        self.check = check
+        self.version = version
+        self.cache = ResultCache(cache_dir, namespace)
+        self.dependencies = dependencies
+
+    def __call__(self, file_path):
+        digest = hashlib.sha256(self.version.encode())
+        # Some rules depend on the file name (e.g. variables.tf)
+        digest.update(file_path.name.encode() + b'\0')
+        if self.dependencies is not None:
+            digest.update(self.dependencies(file_path).encode() + b'\0')
+
+        data = None
+        with open(file_path, 'rb') as f:
+            if file_path.suffix in DIALECTS:
+                data = f.read()
+                digest.update(data)
+            else:
+                # Plan files can be hundreds of MB; hash them without holding them
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+        key = digest.hexdigest()
+
+        try:
+            issues = self.cache.get(key)
+        except (sqlite3.Error, OSError):
+            issues = _MISS
+        if issues is not _MISS:
+            return issues
+
+        # Hand the bytes already read to the index so the check does not re-read
+        if data is not None:
+            try:
+                text = data.decode('utf-8').replace('\r\n', '\n')
+            except UnicodeDecodeError:
+                text = None
+            if text is not None:
+                parse_file(file_path, text)
+
+        issues = self.check(file_path)
+        try:
+            self.cache.put(key, issues)
+        except (sqlite3.Error, OSError):
+            pass
+        return issues
+
+    def prune(self, max_entries=DEFAULT_MAX_ENTRIES):
+        try:
+            self.cache.prune(max_entries)
+        except (sqlite3.Error, OSError):
+            pass
+        self.cache.close()
@@ -0,0 +1,91 @@
+"""
+Checkov-free loader for the BidOne custom checks
+Loads .checkov/custom-checks/BidOneCustomChecks.py against minimal stand-ins
+for the few checkov names it imports, so its scan_resource_conf logic runs
+without importing checkov or building its graph
+"""
+
+import sys
+import types
+import importlib.util
+from enum import Enum
+from pathlib import Path
+
+
+CUSTOM_CHECKS_FILE = Path(__file__).resolve().parent.parent / '.checkov' / 'custom-checks' / 'BidOneCustomChecks.py'
+
+
+class CheckResult(str, Enum):
+    PASSED = 'PASSED'
+    FAILED = 'FAILED'
+    SKIPPED = 'SKIPPED'
+    UNKNOWN = 'UNKNOWN'
+
+
+class BaseResourceCheck:
+    """Stand-in for checkov's BaseResourceCheck; instances register themselves"""
+
+    registry = []
+
+    def __init__(self, name, id, categories, supported_resources, **kwargs):
+        self.name = name
+        self.id = id
+        self.categories = categories
+        self.supported_resources = supported_resources
+        BaseResourceCheck.registry.append(self)
+
+    def scan_resource_conf(self, conf):
+        raise NotImplementedError
+
+
+def _stub_modules():
+    enums = types.ModuleType('checkov.common.models.enums')
+    enums.CheckResult = CheckResult
+    enums.TRUE_BRANCH = 'true'
+
+    consts = types.ModuleType('checkov.common.models.consts')
+    consts.ANY_VALUE = 'CKV_ANY'
+
+    base = types.ModuleType('checkov.terraform.checks.resource.base_resource_check')
+    base.BaseResourceCheck = BaseResourceCheck
+
+    modules = {
+        'checkov.common.models.enums': enums,
+        'checkov.common.models.consts': consts,
+        'checkov.terraform.checks.resource.base_resource_check': base,
+    }
+    # Parent packages so the dotted imports resolve
+    for name in list(modules):
+        parts = name.split('.')
+        for depth in range(1, len(parts)):
+            package = '.'.join(parts[:depth])
+            if package not in modules:
+                module = types.ModuleType(package)
+                module.__path__ = []
+                modules[package] = module
+    return modules
+
+
+def load_custom_checks(path=CUSTOM_CHECKS_FILE):
+    """Return {resource_type: [check, ...]} for the checks defined in path"""
+    stubs = _stub_modules()
+    saved = {name: sys.modules.get(name) for name in stubs}
+    sys.modules.update(stubs)
+    BaseResourceCheck.registry = []
+    try:
+        spec = importlib.util.spec_from_file_location('bidone_custom_checks', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        # Leave sys.modules as we found it in case real checkov is imported later
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+    checks_by_type = {}
+    for check in BaseResourceCheck.registry:
+        for resource_type in check.supported_resources:
+            checks_by_type.setdefault(resource_type, []).append(check)
+    return checks_by_type
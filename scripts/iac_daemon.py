@@ -0,0 +1,342 @@
+"""
+Persistent lint daemon and its client
+The daemon keeps the parsed index and each validator's findings in memory,
+refreshes files as inotify reports changes, and answers validate requests
+over a Unix socket. The validator scripts try it first and validate
+in-process when no daemon answers.
+
+Protocol (JSON lines): the client sends {"validator", "version"} and the
+daemon answers {"ok": true} or {"error": ...}; on ok the client sends one
+{"file": ...} line per file as it gets the path and reads back its
+{"issues": ...} line, until it closes the connection.
+"""
+
+import os
+import sys
+import json
+import ctypes
+import socket
+import signal
+import struct
+import threading
+import socketserver
+from pathlib import Path
+
+import iac_index
+import iac_modules
+from iac_cache import default_cache_dir
+from iac_discovery import DEFAULT_EXCLUDES, DEFAULT_ROOTS, iter_files
+from iac_symbols import invalidate
+from iac_findings import encode_findings, decode_findings
+
+CONNECT_TIMEOUT = 0.5
+RESPONSE_TIMEOUT = 300
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def default_socket_path():
+    """Return the per-user socket path, preferring $XDG_RUNTIME_DIR"""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return Path(runtime_dir) / 'bidone-iac-validators.sock'
+    return default_cache_dir() / 'daemon.sock'
+
+
+def add_daemon_argument(parser):
+    """Add the --no-daemon option shared by the validators"""
+    parser.add_argument('--no-daemon', action='store_true',
+                        help='Validate in-process even when a lint daemon (scripts/lint-daemon.py) is running')
+
+
+def _connect(socket_path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(str(socket_path))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def run_via_daemon(validator, version, files, fallback, socket_path=None):
+    """
+    Yield (file_path, issues) from a running daemon, like run_in_order
+    Returns None when no daemon answers or it runs other rules (version
+    differs), so the caller validates in-process; files is not consumed in
+    that case. Files the daemon fails on are validated in-process with fallback.
+    """
+    sock = _connect(socket_path or default_socket_path())
+    if sock is None:
+        return None
+
+    try:
+        sock.settimeout(RESPONSE_TIMEOUT)
+        sock.sendall(json.dumps({'validator': validator, 'version': version}).encode() + b'\n')
+        reader = sock.makefile('rb')
+        header = json.loads(reader.readline() or b'null')
+    except (OSError, ValueError):
+        sock.close()
+        return None
+    if not isinstance(header, dict) or not header.get('ok'):
+        sock.close()
+        return None
+
+    return _daemon_results(sock, reader, files, fallback)
+
+
+def _daemon_results(sock, reader, files, fallback):
+    with sock, reader:
+        # One path at a time, so paths streamed from stdin are validated as they arrive
+        files = iter(files)
+        for file_path in files:
+            try:
+                sock.sendall(json.dumps({'file': str(Path(file_path).resolve())}).encode() + b'\n')
+                response = json.loads(reader.readline())
+            except (OSError, ValueError):
+                # Daemon went away mid-run; finish in-process
+                yield file_path, fallback(file_path)
+                for remaining in files:
+                    yield remaining, fallback(remaining)
+                return
+            if 'issues' in response:
+                yield file_path, decode_findings(response['issues'])
+            else:
+                yield file_path, fallback(file_path)
+
+
+def stop_daemon(socket_path=None):
+    """Ask a running daemon to exit; False if none answered"""
+    sock = _connect(socket_path or default_socket_path())
+    if sock is None:
+        return False
+    with sock:
+        sock.sendall(json.dumps({'command': 'shutdown'}).encode() + b'\n')
+        sock.recv(1)
+    return True
+
+
+class Inotify:
+    """Recursive directory watch on Linux inotify, via libc"""
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.directories = {}
+
+    def watch_tree(self, root):
+        for directory, subdirectories, _ in os.walk(root):
+            subdirectories[:] = [name for name in subdirectories if name + '/' not in DEFAULT_EXCLUDES]
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd >= 0:
+                self.directories[wd] = Path(directory)
+
+    def events(self):
+        """Yield (path, mask) for every event, forever; new directories are watched"""
+        while True:
+            data = os.read(self.fd, 64 * 1024)
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0')
+                offset += EVENT_HEADER.size + length
+                directory = self.directories.get(wd)
+                if directory is None or not name:
+                    continue
+                path = directory / os.fsdecode(name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self.watch_tree(path)
+                    continue
+                yield path, mask
+
+
+class LintState:
+    """Warm index and findings per validator, refreshed by file signature"""
+
+    def __init__(self, checks):
+        # {validator: (check, version, dependencies)}, dependencies as for CachedCheck
+        self.checks = checks
+        self.lock = threading.Lock()
+        self.signatures = {}
+        # {(validator, path): (key, findings)}
+        self.results = {}
+
+    def _source(self, path):
+        """Where path's signature is kept: its module directory for .tf files, else path itself"""
+        return path.parent if path.suffix == '.tf' else path
+
+    def _signature(self, source):
+        """(path, mtime, size) of each .tf file of a module directory, or of a single file"""
+        signature = []
+        for member in sorted(source.glob('*.tf')) if source.is_dir() else [source]:
+            try:
+                stat = member.stat()
+            except OSError:
+                continue
+            signature.append((member, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def track(self, path):
+        """Record path's signature before anything reads it, so its first validation is not a refresh"""
+        with self.lock:
+            source = self._source(path)
+            if source not in self.signatures:
+                self.signatures[source] = self._signature(source)
+
+    def _refresh(self, path):
+        """
+        Drop the parsed state of files that changed, appeared or went away
+        Terraform findings can depend on the module's other files and on the
+        modules on its call paths, so all of their .tf files are checked; the
+        dependency fingerprints results are keyed on are then recomputed
+        """
+        sources = {self._source(path)}
+        if path.suffix == '.tf':
+            sources.update(iac_modules.calling_directories(path.parent))
+        changed = False
+        for source in sources:
+            signature = self._signature(source)
+            previous = self.signatures.get(source)
+            if previous == signature:
+                continue
+            self.signatures[source] = signature
+            for member, *_ in {*(previous or ()), *signature}:
+                iac_index.forget(member)
+                invalidate(member.parent)
+            changed = True
+        if changed and path.suffix == '.tf':
+            # Calls may have been added or removed
+            iac_modules.invalidate()
+
+    def validate(self, validator, path):
+        """Return the findings for one resolved path, from memory when it and its dependencies are unchanged"""
+        check, _, dependencies = self.checks[validator]
+        with self.lock:
+            self._refresh(path)
+            key = (self._signature(path), dependencies(path) if dependencies is not None else '')
+            cached = self.results.get((validator, path))
+            if cached is None or cached[0] != key:
+                cached = self.results[(validator, path)] = (key, check(path))
+            return cached[1]
+
+    def warm(self, path, changed=False):
+        """
+        Re-validate path with every validator that takes its file type
+        changed forces a re-read even if mtime and size look the same
+        """
+        if changed:
+            with self.lock:
+                self.signatures.pop(self._source(path), None)
+                for validator in self.checks:
+                    self.results.pop((validator, path), None)
+        for validator in self.checks:
+            try:
+                self.validate(validator, path)
+            except Exception:
+                pass  # Reported to the client that asks for this file
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _send(self, message):
+        self.wfile.write(json.dumps(message).encode() + b'\n')
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+        state = self.server.state
+
+        if request.get('command') == 'shutdown':
+            self._send({'ok': True})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+
+        validator = request.get('validator')
+        if validator not in state.checks:
+            self._send({'error': f"unknown validator '{validator}'"})
+            return
+        if request.get('version') != state.checks[validator][1]:
+            self._send({'error': 'rules changed since the daemon started'})
+            return
+
+        self._send({'ok': True})
+        for line in self.rfile:
+            try:
+                file_name = json.loads(line)['file']
+            except (ValueError, KeyError, TypeError):
+                return
+            try:
+                self._send({'issues': encode_findings(state.validate(validator, Path(file_name)))})
+            except Exception as e:
+                self._send({'error': f"{type(e).__name__}: {e}"})
+
+
+class LintServer(socketserver.ThreadingUnixStreamServer):
+    # Clients such as lint-iac.py hold one connection per validator open at once
+    daemon_threads = True
+
+    def __init__(self, socket_path, state):
+        self.state = state
+        super().__init__(str(socket_path), _Handler)
+
+
+def serve(checks, socket_path=None, roots=None):
+    """Index roots, watch them and answer validate requests until shut down"""
+    socket_path = Path(socket_path or default_socket_path())
+    roots = roots or DEFAULT_ROOTS
+    if socket_path.exists():
+        sock = _connect(socket_path)
+        if sock is not None:
+            sock.close()
+            raise RuntimeError(f"a lint daemon is already listening on {socket_path}")
+        socket_path.unlink()  # Left behind by a daemon that did not exit cleanly
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+    state = LintState(checks)
+    files = [file_path.resolve() for file_path in iter_files(roots)]
+    for file_path in files:
+        state.track(file_path)
+    for file_path in files:
+        state.warm(file_path)
+
+    try:
+        inotify = Inotify()
+    except (OSError, AttributeError):
+        inotify = None
+        print("inotify unavailable; changed files are re-read on request", file=sys.stderr)
+    if inotify is not None:
+        for root in roots:
+            if Path(root).is_dir():
+                inotify.watch_tree(root)
+
+        def watch():
+            for path, _ in inotify.events():
+                if path.suffix in iac_index.DIALECTS:
+                    state.warm(path.resolve(), changed=True)
+
+        threading.Thread(target=watch, daemon=True).start()
+
+    with LintServer(socket_path, state) as server:
+        print(f"Lint daemon listening on {socket_path} ({len(files)} files indexed)")
+        sys.stdout.flush()
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            socket_path.unlink(missing_ok=True)
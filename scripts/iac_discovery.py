@@ -0,0 +1,211 @@
+"""
+File discovery for the IaC validators
+A single os.scandir walk per root finds every validated extension at once,
+prunes .gitignore'd and excluded directories (such as the .terraform caches
+written by terraform init) and yields paths as soon as they are found
+"""
+
+import os
+import re
+import sys
+from pathlib import Path
+
+
+DEFAULT_ROOTS = ['infra/terraform', 'infra/bicep']
+
+DEFAULT_SUFFIXES = ('.tf', '.bicep')
+
+# Vendored and generated trees we never own, mirroring skip-path in .checkov.yml
+DEFAULT_EXCLUDES = ['.terraform/', '.git/', 'node_modules/', 'obj/', 'bin/']
+
+
+def add_discovery_arguments(parser):
+    """Add the discovery options shared by the validators"""
+    parser.add_argument('--exclude', action='append', default=[], metavar='PATTERN',
+                        help='Gitignore-style pattern, relative to the current directory, '
+                             'to skip during discovery (repeatable)')
+    parser.add_argument('--files-from', metavar='FILE',
+                        help="Also validate the paths listed in FILE ('-' for stdin), one per line; "
+                             "they are validated as they arrive")
+    parser.add_argument('-0', '--null', action='store_true',
+                        help='Paths in --files-from are NUL-delimited (git ls-files -z, find -print0)')
+
+
+def read_file_list(source, null=False):
+    """
+    Lazily yield the paths listed in source ('-' for stdin) as they arrive
+    The list is one path per line, or NUL-delimited (git ls-files -z,
+    find -print0) when null is set
+    """
+    stream = sys.stdin.buffer if source == '-' else open(source, 'rb')
+    separator = b'\0' if null else b'\n'
+    try:
+        pending = b''
+        # read1 returns what is available instead of waiting for a full block
+        for block in iter(lambda: stream.read1(64 * 1024), b''):
+            *paths, pending = (pending + block).split(separator)
+            for path in paths:
+                path = path if null else path.rstrip(b'\r')
+                if path:
+                    yield Path(os.fsdecode(path))
+        pending = pending if null else pending.rstrip(b'\r')
+        if pending:
+            yield Path(os.fsdecode(pending))
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+def requested_files(args):
+    """Yield the paths given as arguments, then those read from --files-from"""
+    for file_name in args.files:
+        yield Path(file_name)
+    if args.files_from:
+        yield from read_file_list(args.files_from, args.null)
+
+
+def _translate(pattern):
+    """Translate the body of a gitignore pattern to a regex over '/'-separated paths"""
+    regex = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith('**/', index):
+            regex.append('(?:.*/)?')
+            index += 3
+            continue
+        if pattern.startswith('/**', index) and index + 3 == len(pattern):
+            regex.append('/.*')
+            break
+        if pattern.startswith('**', index):
+            regex.append('.*')
+            index += 2
+            continue
+        if char == '*':
+            regex.append('[^/]*')
+        elif char == '?':
+            regex.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', index + 2)
+            if end < 0:
+                regex.append(re.escape(char))
+            else:
+                body = pattern[index + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                regex.append('[' + body.replace('\\', '\\\\') + ']')
+                index = end
+        elif char == '\\' and index + 1 < len(pattern):
+            index += 1
+            regex.append(re.escape(pattern[index]))
+        else:
+            regex.append(re.escape(char))
+        index += 1
+    return ''.join(regex)
+
+
+def compile_patterns(lines):
+    """Compile gitignore lines into (regex, negated, directory_only) rules"""
+    rules = []
+    for line in lines:
+        line = line.rstrip('\n')
+        if not line.endswith('\\ '):
+            line = line.rstrip()
+        if not line or line.startswith('#'):
+            continue
+
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        directory_only = line.endswith('/')
+        line = line.rstrip('/')
+
+        # A slash anywhere but the end anchors the pattern to its own directory
+        anchored = '/' in line
+        line = line.lstrip('/')
+        prefix = '' if anchored else '(?:.*/)?'
+        rules.append((re.compile(prefix + _translate(line) + r'\Z'), negated, directory_only))
+    return rules
+
+
+def _load_gitignore(directory):
+    try:
+        with open(os.path.join(directory, '.gitignore'), 'r') as f:
+            return compile_patterns(f)
+    except OSError:
+        return []
+
+
+def _ignored(layers, path, is_dir):
+    """Apply gitignore layers (outermost first); the last matching rule wins"""
+    ignored = False
+    for base, rules in layers:
+        relative = os.path.relpath(path, base).replace(os.sep, '/')
+        for regex, negated, directory_only in rules:
+            if directory_only and not is_dir:
+                continue
+            if regex.match(relative):
+                ignored = not negated
+    return ignored
+
+
+def _repository_root(start):
+    for directory in [start, *start.parents]:
+        if (directory / '.git').exists():
+            return directory
+    return None
+
+
+def _initial_layers(root, excludes):
+    """Exclude rules plus every .gitignore from the repository root down to root"""
+    absolute = Path(root).resolve()
+    layers = [(os.getcwd(), compile_patterns(excludes))]
+
+    # root's own .gitignore is picked up by the walk itself
+    repository = _repository_root(absolute)
+    if repository is not None and repository != absolute:
+        ancestors = list(absolute.parents)
+        for directory in reversed(ancestors[:ancestors.index(repository) + 1]):
+            rules = _load_gitignore(directory)
+            if rules:
+                layers.append((str(directory), rules))
+    return absolute, layers
+
+
+def iter_files(roots=None, suffixes=DEFAULT_SUFFIXES, excludes=()):
+    """
+    Lazily yield files under roots with one of suffixes, in a stable order
+    Each root is walked once; entries are sorted per directory, files first
+    """
+    for root in roots or DEFAULT_ROOTS:
+        if not os.path.isdir(root):
+            continue
+        absolute, layers = _initial_layers(root, [*DEFAULT_EXCLUDES, *excludes])
+        yield from _walk(str(absolute), root, layers, suffixes)
+
+
+def _walk(directory, display, layers, suffixes):
+    try:
+        with os.scandir(directory) as scan:
+            entries = sorted(scan, key=lambda entry: entry.name)
+    except OSError:
+        return
+
+    rules = _load_gitignore(directory)
+    if rules:
+        layers = [*layers, (directory, rules)]
+
+    subdirectories = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+        except OSError:
+            continue
+        if is_dir:
+            if not _ignored(layers, entry.path, True):
+                subdirectories.append(entry)
+        elif entry.name.endswith(suffixes) and not _ignored(layers, entry.path, False):
+            yield Path(display) / entry.name
+
+    for entry in subdirectories:
+        yield from _walk(entry.path, os.path.join(display, entry.name), layers, suffixes)
@@ -0,0 +1,146 @@
+"""
+Per-environment evaluation of interpolated Terraform values
+Each name or tag expression is compiled once into a template of literal and
+reference parts; every environment's tfvars set is then substituted into the
+same template, so N environments cost one parse plus N cheap renders
+"""
+
+import re
+import argparse
+import functools
+from pathlib import Path
+
+from iac_index import parse_file
+from iac_hcl import parse_body
+
+
+INTERPOLATION = re.compile(r'\$\{\s*(.*?)\s*\}')
+
+# Stand-in for references no tfvars set resolves (e.g. local.unique_suffix):
+# an opaque alphanumeric segment, which is what such suffixes produce
+UNKNOWN_SEGMENT = 'x0'
+
+
+class Template:
+    """A string expression split into literal text and ${...} references"""
+
+    __slots__ = ('parts',)
+
+    def __init__(self, parts):
+        self.parts = parts
+
+    def render(self, values):
+        """
+        Substitute values ({'var.name': value}) into the template
+        Returns (value, display) where unresolved references become
+        UNKNOWN_SEGMENT in value and stay as ${...} in display, or None when
+        nothing in the expression is known
+        """
+        rendered = []
+        display = []
+        known = False
+        for part in self.parts:
+            if isinstance(part, str):
+                rendered.append(part)
+                display.append(part)
+                known = known or bool(part)
+                continue
+            value = values.get(part[0])
+            if isinstance(value, bool):
+                value = 'true' if value else 'false'
+            if isinstance(value, (str, int, float)):
+                rendered.append(str(value))
+                display.append(str(value))
+                known = True
+            else:
+                rendered.append(UNKNOWN_SEGMENT)
+                display.append('${' + part[0] + '}')
+        if not known:
+            return None
+        return ''.join(rendered), ''.join(display)
+
+
+@functools.lru_cache(maxsize=None)
+def compile_template(text):
+    """Compile an HCL string value (as the validators see it) into a Template"""
+    parts = []
+    pos = 0
+    for match in INTERPOLATION.finditer(text):
+        if match.start() > pos:
+            parts.append(text[pos:match.start()])
+        # References are one-tuples so they are distinct from literal text
+        parts.append((match.group(1),))
+        pos = match.end()
+    if pos < len(text):
+        parts.append(text[pos:])
+    return Template(tuple(parts))
+
+
+class Environment:
+    __slots__ = ('name', 'values')
+
+    def __init__(self, name, values):
+        self.name = name
+        self.values = values
+
+
+class Environments:
+    """tfvars sets for one root module, merged over its variable defaults"""
+
+    def __init__(self, root, environments):
+        self.root = root
+        self.environments = environments
+
+    def for_file(self, file_path):
+        """Environments that apply to a file; only root module files take tfvars"""
+        if Path(file_path).resolve().parent == self.root:
+            return self.environments
+        return []
+
+
+def _first(values):
+    return values[0] if isinstance(values, list) and values else None
+
+
+def load_environments(directory):
+    """
+    Load every *.tfvars in directory for the root module one level above it
+    (infra/terraform/environments -> infra/terraform)
+    """
+    directory = Path(directory)
+    root = directory.resolve().parent
+
+    defaults = {}
+    for tf_file in sorted(root.glob('*.tf')):
+        parsed = parse_file(tf_file, whole=True)
+        for name, (body_start, body_end) in parsed.variables.items():
+            conf = parse_body(parsed.content, body_start, body_end)
+            defaults[f'var.{name}'] = _first(conf.get('default'))
+
+    environments = []
+    for tfvars in sorted(directory.glob('*.tfvars')):
+        with open(tfvars, 'r') as f:
+            content = f.read()
+        values = dict(defaults)
+        for name, value in parse_body(content, 0, len(content)).items():
+            values[f'var.{name}'] = _first(value)
+        environments.append(Environment(tfvars.stem, values))
+
+    return Environments(root, environments)
+
+
+def _environments_directory(value):
+    directory = Path(value)
+    if not directory.is_dir():
+        raise argparse.ArgumentTypeError(f"no such directory: {value}")
+    if not any(directory.glob('*.tfvars')):
+        raise argparse.ArgumentTypeError(f"no *.tfvars files in {value}")
+    return value
+
+
+def add_environment_arguments(parser):
+    """Add the --environments option shared by the validators"""
+    parser.add_argument('--environments', type=_environments_directory, metavar='DIR',
+                        help='Directory of .tfvars files (e.g. infra/terraform/environments); '
+                             "interpolated values in the root module (DIR's parent) are "
+                             'evaluated for every environment')
@@ -0,0 +1,215 @@
+"""
+Structured findings and streaming output formats for the IaC validators
+Validators return Finding records; text output prints their message as
+before, while --format jsonl|sarif writes each file's findings as soon as
+the file is checked, so nothing accumulates however many findings a tree has
+"""
+
+import sys
+import json
+from pathlib import Path
+
+from iac_index import enclosing_resource, line_column
+
+
+FORMATS = ['text', 'jsonl', 'sarif']
+
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+
+
+class Finding:
+    """
+    One rule violation; str() is the message shown in text output
+    message may be a str.format template filled in from args, and findings
+    built by finding_at() keep the parsed file and offset they were found
+    at; message, line, column and address are worked out on first use, so
+    findings that are suppressed or only printed as text never compute them
+    """
+
+    __slots__ = ('rule', '_template', '_args', '_message', '_line', '_column', '_address', '_located',
+                 '_parsed', '_offset')
+
+    FIELDS = ('rule', 'message', 'line', 'column', 'address')
+
+    def __init__(self, rule, message, line=None, column=None, address=None, args=()):
+        self.rule = rule
+        self._template = message
+        self._args = tuple(args)
+        self._message = None
+        self._line = line
+        self._column = column
+        # Given by the validator; _located is the resource found around _offset
+        self._address = address
+        self._located = None
+        self._parsed = None
+        self._offset = None
+
+    @property
+    def message(self):
+        if self._message is None:
+            self._message = self._template.format(*self._args) if self._args else self._template
+        return self._message
+
+    @property
+    def key(self):
+        """
+        What identifies the finding across runs: rule, address, message
+        template and arguments; the message is not formatted and the line
+        not worked out, only the enclosing resource looked up
+        """
+        return (self.rule, self.address or '', self._template, *map(str, self._args))
+
+    def _locate(self):
+        if self._line is None and self._parsed is not None:
+            self._line, self._column = line_column(self._parsed, self._offset)
+
+    @property
+    def line(self):
+        self._locate()
+        return self._line
+
+    @property
+    def column(self):
+        self._locate()
+        return self._column
+
+    def _find_resource(self):
+        if self._address is None and self._located is None and self._parsed is not None:
+            resource = enclosing_resource(self._parsed, self._offset)
+            self._located = f"{resource.type}.{resource.name}" if resource is not None else ''
+
+    @property
+    def address(self):
+        if self._address is not None:
+            return self._address
+        self._find_resource()
+        return self._located or None
+
+    def resolve(self):
+        """Work out every field now and drop the parsed file; returns the finding"""
+        for name in self.FIELDS:
+            getattr(self, name)
+        self._parsed = None
+        return self
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return f"Finding({self.rule!r}, {self.message!r})"
+
+    def __reduce__(self):
+        # Worker processes send back the fields, not the parsed file
+        return Finding.from_dict, (self.to_dict(),)
+
+    def to_dict(self):
+        """
+        JSON-serialisable form with every field worked out; the template and
+        arguments are kept so the key is the same after a round trip
+        """
+        # Located now: the parsed file does not travel with the finding
+        self._locate()
+        self._find_resource()
+        return {'rule': self.rule, 'template': self._template, 'args': [str(arg) for arg in self._args],
+                'line': self._line, 'column': self._column, 'address': self._address, 'located': self._located}
+
+    @classmethod
+    def from_dict(cls, data):
+        finding = cls(data['rule'], data['template'], data['line'], data['column'], data['address'], data['args'])
+        finding._located = data['located']
+        return finding
+
+
+def finding_at(parsed, offset, rule, message, *args, address=None):
+    """
+    Build a Finding located at an offset of a parsed file
+    message is formatted with args when first shown; address defaults to the
+    resource declared around the offset
+    """
+    finding = Finding(rule, message, address=address, args=args)
+    finding._parsed = parsed
+    finding._offset = offset
+    return finding
+
+
+def encode_findings(issues):
+    """JSON-serialisable form of a check result (list of findings or None)"""
+    return None if issues is None else [issue.to_dict() for issue in issues]
+
+
+def decode_findings(data):
+    return None if data is None else [Finding.from_dict(item) for item in data]
+
+
+def add_format_argument(parser):
+    """Add the --format option shared by the validators"""
+    parser.add_argument('--format', choices=FORMATS, default='text',
+                        help='Output format: human-readable text (default), JSON Lines with one '
+                             'finding per line, or a SARIF 2.1.0 log; jsonl and sarif are streamed')
+
+
+def _uri(file_path):
+    return Path(file_path).as_posix()
+
+
+class JsonLinesWriter:
+    """Write one JSON object per finding"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, file_path, issues):
+        for issue in issues:
+            record = {'rule': issue.rule, 'file': _uri(file_path), 'line': issue.line,
+                      'column': issue.column, 'address': issue.address, 'message': issue.message}
+            self.stream.write(json.dumps(record) + '\n')
+        self.stream.flush()
+
+    def close(self):
+        self.stream.flush()
+
+
+class SarifWriter:
+    """
+    Write a SARIF 2.1.0 log with one run
+    The rules are known up front, so the document is written incrementally
+    and only the results array stays open while files are checked
+    """
+
+    def __init__(self, stream, tool, rules):
+        self.stream = stream
+        self.first = True
+        driver = {
+            'name': tool,
+            'informationUri': 'https://github.com/guangliangyang/FoodOrderConnect',
+            'rules': [{'id': rule, 'shortDescription': {'text': text}} for rule, text in rules.items()],
+        }
+        header = json.dumps({'$schema': SARIF_SCHEMA, 'version': '2.1.0'})[:-1]
+        self.stream.write(header + ', "runs": [{"tool": {"driver": ' + json.dumps(driver) + '}, "results": [\n')
+
+    def write(self, file_path, issues):
+        for issue in issues:
+            location = {'physicalLocation': {'artifactLocation': {'uri': _uri(file_path)}}}
+            if issue.line is not None:
+                location['physicalLocation']['region'] = {'startLine': issue.line, 'startColumn': issue.column or 1}
+            if issue.address:
+                location['logicalLocations'] = [{'fullyQualifiedName': issue.address, 'kind': 'resource'}]
+            result = {'ruleId': issue.rule, 'level': 'error', 'message': {'text': issue.message},
+                      'locations': [location]}
+            self.stream.write(('' if self.first else ',\n') + json.dumps(result))
+            self.first = False
+        self.stream.flush()
+
+    def close(self):
+        self.stream.write('\n]}]}\n')
+        self.stream.flush()
+
+
+def finding_writer(output_format, tool, rules, stream=None):
+    """Return a streaming writer for a structured format, or None for text"""
+    stream = stream or sys.stdout
+    if output_format == 'jsonl':
+        return JsonLinesWriter(stream)
+    if output_format == 'sarif':
+        return SarifWriter(stream, tool, rules)
+    return None
@@ -0,0 +1,121 @@
+"""
+Git diff support for the IaC validators
+Maps the changed line ranges of a diff against a git ref onto resource
+blocks, so only the resources a change touches are validated
+"""
+
+import os
+import re
+import subprocess
+from pathlib import Path
+
+from iac_index import DIALECTS, deselect, select_lines
+
+
+HUNK_HEADER = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@')
+
+# git's C-style escapes in quoted diff header paths
+QUOTED_ESCAPE = re.compile(rb'\\([0-7]{3}|.)')
+C_ESCAPES = {b'a': b'\a', b'b': b'\b', b't': b'\t', b'n': b'\n', b'v': b'\v', b'f': b'\f', b'r': b'\r'}
+
+
+class GitDiffError(Exception):
+    """Raised when git cannot produce the diff"""
+
+
+def _git(*args):
+    # core.quotePath=false leaves non-ASCII names unescaped; output is decoded
+    # like file names so any bytes survive
+    result = subprocess.run(['git', '-c', 'core.quotePath=false', *args], capture_output=True)
+    if result.returncode != 0:
+        raise GitDiffError(os.fsdecode(result.stderr).strip() or f"git {args[0]} failed")
+    return os.fsdecode(result.stdout)
+
+
+def _header_path(name):
+    """
+    Return the path of a ---/+++ header, or None for /dev/null
+    git appends a tab to names holding a space, and quotes names holding
+    control characters, quotes or backslashes
+    """
+    name = name.removesuffix('\t')
+    if name.startswith('"') and name.endswith('"'):
+        raw = os.fsencode(name[1:-1])
+        raw = QUOTED_ESCAPE.sub(
+            lambda match: bytes([int(match.group(1), 8)]) if len(match.group(1)) == 3
+            else C_ESCAPES.get(match.group(1), match.group(1)), raw)
+        return os.fsdecode(raw)
+    return None if name == '/dev/null' else name
+
+
+def changed_line_ranges(ref, pathspecs):
+    """
+    Return {path: [(first, last), ...]} of lines changed since ref
+    Compares the working tree against ref; untracked files count as changed
+    throughout. Paths are relative to the current directory; deleted files and
+    files the validators do not handle are left out.
+    """
+    toplevel = Path(_git('rev-parse', '--show-toplevel').strip())
+    # Paths relative to the top level without a/ b/ prefixes, whatever
+    # diff.noprefix, diff.mnemonicPrefix or diff.relative say
+    diff = _git('diff', '--unified=0', '--no-color', '--no-ext-diff', '--no-prefix', '--no-relative', ref, '--',
+                *[str(Path(spec).resolve()) for spec in pathspecs])
+
+    changes = {}
+    current = None
+    in_header = False
+    for line in diff.split('\n'):
+        if line.startswith('diff '):
+            in_header = True
+            current = None
+        elif in_header and line.startswith('+++ '):
+            # Only in the header: an added line reading "++ x" shows as "+++ x"
+            target = _header_path(line[4:])
+            if target is not None:
+                path = Path(os.path.relpath(toplevel / target))
+                if path.suffix in DIALECTS:
+                    current = changes.setdefault(path, [])
+        elif line.startswith('@@'):
+            in_header = False
+            match = HUNK_HEADER.match(line)
+            if current is None or not match:
+                continue
+            first = int(match.group(1))
+            count = int(match.group(2)) if match.group(2) is not None else 1
+            if count == 0:
+                # Pure deletion after line `first`; the lines either side are affected
+                current.append((max(first, 1), first + 1))
+            else:
+                current.append((first, first + count - 1))
+
+    # git diff leaves out files git does not track yet; all of their lines are new
+    untracked = _git('ls-files', '--others', '--exclude-standard', '-z', '--',
+                     *[str(Path(spec).resolve()) for spec in pathspecs])
+    for name in untracked.split('\0'):
+        path = Path(name)
+        if name and path.suffix in DIALECTS:
+            with open(path, 'rb') as f:
+                changes[path] = [(1, f.read().count(b'\n') + 1)]
+
+    return {path: ranges for path, ranges in changes.items() if ranges}
+
+
+class ChangedBlocksCheck:
+    """Wrap a per-file check so it only sees the blocks touched by a diff"""
+
+    def __init__(self, check, changes):
+        self.check = check
+        self.changes = changes
+
+    def __call__(self, file_path):
+        select_lines(file_path, self.changes[file_path])
+        try:
+            return self.check(file_path)
+        finally:
+            deselect(file_path)
+
+
+def add_since_argument(parser):
+    """Add the --since option shared by the validators"""
+    parser.add_argument('--since', metavar='GIT_REF',
+                        help='Only validate resource blocks changed since GIT_REF')
@@ -0,0 +1,221 @@
+"""
+Minimal HCL body parser producing checkov-style resource configurations
+Attributes map to [value] and nested blocks to [dict, ...], matching the conf
+dicts checkov hands to scan_resource_conf. Literal strings, numbers, bools,
+maps and lists are decoded; any other expression is kept as '${expression}'
+the way checkov renders unresolved references.
+"""
+
+import re
+
+
+IDENTIFIER = re.compile(r'[A-Za-z_][\w-]*')
+NUMBER = re.compile(r'-?\d+(\.\d+)?([eE][-+]?\d+)?\Z')
+HEREDOC_OPENER = re.compile(r'<<-?([A-Za-z_][\w-]*)[ \t]*\r?\n')
+# Characters that can end an expression or change how it is scanned
+EXPRESSION_SPECIAL = re.compile(r'["<()\[\]{},\n#/]')
+# Characters that can end a string literal or start an interpolation in it
+STRING_SPECIAL = re.compile(r'[\\"\n$%]')
+
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '"': '"', '\\': '\\'}
+
+
+def _skip_string(text, pos, end):
+    """Return the offset just past the string literal opening at pos"""
+    pos += 1
+    while pos < end:
+        special = STRING_SPECIAL.search(text, pos, end)
+        if not special:
+            return end
+        pos = special.start()
+        char = text[pos]
+        if char == '\\':
+            pos += 2
+        elif char == '"':
+            return pos + 1
+        elif char == '\n':
+            return pos  # Unterminated string
+        elif text.startswith('$${', pos) or text.startswith('%%{', pos):
+            pos += 3
+        elif text.startswith('${', pos) or text.startswith('%{', pos):
+            pos = _expression_end(text, pos + 2, end, nested=True) + 1
+        else:
+            pos += 1
+    return pos
+
+
+def _skip_heredoc(text, match, end):
+    """Return the offset just past the closing marker of a heredoc"""
+    closer = re.compile(r'^[ \t]*' + re.escape(match.group(1)) + r'[ \t]*$', re.MULTILINE)
+    close = closer.search(text, match.end(), end)
+    return close.end() if close else end
+
+
+def _expression_end(text, pos, end, nested=False):
+    """
+    Return where the expression starting at pos stops
+    At the top level an expression ends at a newline, comma or comment; with
+    nested=True it runs to the first unmatched closing bracket.
+    """
+    depth = 0
+    while pos < end:
+        special = EXPRESSION_SPECIAL.search(text, pos, end)
+        if not special:
+            return end
+        pos = special.start()
+        char = text[pos]
+        if char == '"':
+            pos = _skip_string(text, pos, end)
+            continue
+        if char == '<' and text.startswith('<<', pos):
+            heredoc = HEREDOC_OPENER.match(text, pos)
+            if heredoc:
+                pos = _skip_heredoc(text, heredoc, end)
+                continue
+        if char in '([{':
+            depth += 1
+        elif char in ')]}':
+            if depth == 0:
+                return pos
+            depth -= 1
+        elif depth == 0 and not nested and char in ',\n':
+            return pos
+        elif char == '#' or text.startswith('//', pos):
+            if depth == 0 and not nested:
+                return pos
+            newline = text.find('\n', pos, end)
+            pos = end if newline < 0 else newline
+            continue
+        elif text.startswith('/*', pos):
+            close = text.find('*/', pos + 2, end)
+            pos = end if close < 0 else close + 2
+            continue
+        pos += 1
+    return end
+
+
+def _skip_trivia(text, pos, end):
+    """Skip whitespace, commas and comments between body items"""
+    while pos < end:
+        char = text[pos]
+        if char in ' \t\r\n,':
+            pos += 1
+        elif char == '#' or text.startswith('//', pos):
+            newline = text.find('\n', pos, end)
+            pos = end if newline < 0 else newline + 1
+        elif text.startswith('/*', pos):
+            close = text.find('*/', pos + 2, end)
+            pos = end if close < 0 else close + 2
+        else:
+            break
+    return pos
+
+
+def _decode_string(raw):
+    if '\\' not in raw:
+        return raw[1:-1]
+    chars = []
+    index = 1
+    while index < len(raw) - 1:
+        char = raw[index]
+        if char == '\\' and index + 1 < len(raw) - 1:
+            index += 1
+            chars.append(_ESCAPES.get(raw[index], raw[index]))
+        else:
+            chars.append(char)
+        index += 1
+    return ''.join(chars)
+
+
+def _split_items(text, start, end):
+    """Yield the raw text of each top-level comma or newline separated item"""
+    pos = start
+    while True:
+        pos = _skip_trivia(text, pos, end)
+        if pos >= end:
+            return
+        item_end = _expression_end(text, pos, end)
+        if item_end == pos:
+            pos += 1  # Stray closing bracket
+            continue
+        yield pos, item_end
+        pos = item_end
+
+
+def _decode_object(text, start, end):
+    values = {}
+    for item_start, item_end in _split_items(text, start, end):
+        item = text[item_start:item_end]
+        separator = re.search(r'\s*[=:]\s*', item)
+        if not separator:
+            continue
+        key = item[:separator.start()].strip()
+        if key.startswith('"'):
+            key = _decode_string(key)
+        values[key] = decode_value(item[separator.end():])
+    return values
+
+
+def decode_value(raw):
+    """Decode a literal HCL value, or return '${raw}' for any other expression"""
+    raw = raw.strip()
+    if not raw:
+        return None
+
+    if raw[0] == '"' and _skip_string(raw, 0, len(raw)) == len(raw) and raw.endswith('"'):
+        return _decode_string(raw)
+
+    heredoc = HEREDOC_OPENER.match(raw)
+    if heredoc and _skip_heredoc(raw, heredoc, len(raw)) == len(raw):
+        body_end = raw.rfind('\n')
+        return raw[heredoc.end():body_end + 1] if body_end >= heredoc.end() else ''
+
+    if raw in ('true', 'false'):
+        return raw == 'true'
+    if raw == 'null':
+        return None
+    if NUMBER.match(raw):
+        return float(raw) if any(char in raw for char in '.eE') else int(raw)
+
+    if raw[0] in '{[' and _expression_end(raw, 1, len(raw), nested=True) == len(raw) - 1:
+        if raw[0] == '{':
+            return _decode_object(raw, 1, len(raw) - 1)
+        return [decode_value(raw[item_start:item_end]) for item_start, item_end in _split_items(raw, 1, len(raw) - 1)]
+
+    return '${' + raw + '}'
+
+
+def parse_body(text, start, end):
+    """Parse the HCL body text[start:end] into a checkov-style conf dict"""
+    conf = {}
+    pos = start
+    while True:
+        pos = _skip_trivia(text, pos, end)
+        if pos >= end:
+            return conf
+
+        name = IDENTIFIER.match(text, pos)
+        if not name:
+            newline = text.find('\n', pos, end)
+            pos = end if newline < 0 else newline + 1
+            continue
+        pos = name.end()
+        while pos < end and text[pos] in ' \t':
+            pos += 1
+
+        if text.startswith('=', pos) and not text.startswith('==', pos):
+            value_end = _expression_end(text, pos + 1, end)
+            conf[name.group()] = [decode_value(text[pos + 1:value_end])]
+            pos = value_end
+            continue
+
+        # Nested block, possibly labelled: name "label" { ... }
+        brace = pos
+        while brace < end and text[brace] != '{' and text[brace] != '\n':
+            brace = _skip_string(text, brace, end) if text[brace] == '"' else brace + 1
+        if brace >= end or text[brace] != '{':
+            pos = brace
+            continue
+        close = _expression_end(text, brace + 1, end, nested=True)
+        conf.setdefault(name.group(), []).append(parse_body(text, brace + 1, close))
+        pos = close + 1
@@ -0,0 +1,275 @@
+"""
+History-wide audit for the IaC validators
+One `git log --raw` process streams the blobs each first-parent commit
+changes and one `git cat-file --batch` process serves their contents, so no
+commit is checked out. Each file version is validated once, keyed by its
+blob id (and, for .tf files, the blob ids of the rest of its module), and
+findings are tracked from the commit that introduced them to the one that
+fixed them
+"""
+
+import posixpath
+import tempfile
+import subprocess
+from pathlib import Path
+from collections import namedtuple
+
+import iac_index
+import iac_modules
+import iac_symbols
+from iac_discovery import DEFAULT_SUFFIXES
+
+
+Commit = namedtuple('Commit', ['index', 'sha', 'date', 'changes'])
+
+
+class HistoryError(Exception):
+    """Raised when git cannot read the history"""
+
+
+def _git(*args, cwd=None):
+    result = subprocess.run(['git', *args], capture_output=True, text=True, cwd=cwd)
+    if result.returncode != 0:
+        raise HistoryError(result.stderr.strip() or f"git {args[0]} failed")
+    return result.stdout
+
+
+def repository_root(cwd=None):
+    """Return the top directory of the git repository holding cwd"""
+    return Path(_git('rev-parse', '--show-toplevel', cwd=cwd).strip())
+
+
+class BlobReader:
+    """Object contents from a single long-running `git cat-file --batch`"""
+
+    def __init__(self, cwd=None):
+        self.process = subprocess.Popen(['git', 'cat-file', '--batch'], cwd=cwd,
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.reads = 0
+
+    def read(self, sha):
+        self.process.stdin.write(sha.encode() + b'\n')
+        self.process.stdin.flush()
+        header = self.process.stdout.readline().split()
+        if len(header) != 3:
+            raise HistoryError(f"git cat-file: {b' '.join(header).decode() or 'no output'}")
+        data = self.process.stdout.read(int(header[2]))
+        self.process.stdout.read(1)  # Trailing newline
+        self.reads += 1
+        return data
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _tracked(path, roots, suffixes):
+    return path.endswith(suffixes) and any(path == root or path.startswith(root + '/') for root in roots)
+
+
+def _nul_tokens(stream):
+    pending = b''
+    for block in iter(lambda: stream.read1(64 * 1024), b''):
+        *tokens, pending = (pending + block).split(b'\0')
+        yield from tokens
+    if pending:
+        yield pending
+
+
+def iter_commits(revisions, roots, suffixes=DEFAULT_SUFFIXES, cwd=None):
+    """
+    Yield the first-parent commits of revisions, oldest first, with the
+    {path: blob id, or None if deleted} they change under roots
+    Paths and roots are relative to the repository root (cwd).
+    """
+    process = subprocess.Popen(
+        ['git', 'log', '--reverse', '--first-parent', '--diff-merges=first-parent', '--raw', '--no-abbrev',
+         '--no-renames', '--root', '-z', '--format=commit %H %cs', *revisions, '--'],
+        cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    commit = None
+    index = 0
+    tokens = _nul_tokens(process.stdout)
+    for token in tokens:
+        token = token.lstrip(b'\n').decode('utf-8', 'surrogateescape')
+        if token.startswith('commit '):
+            if commit is not None:
+                yield commit
+                index += 1
+            _, sha, date = token.split()
+            commit = Commit(index, sha, date, {})
+        elif token.startswith(':'):
+            # :old-mode new-mode old-blob new-blob status, then the path
+            fields = token.split()
+            path = next(tokens).decode('utf-8', 'surrogateescape')
+            if commit is not None and _tracked(path, roots, suffixes):
+                commit.changes[path] = None if fields[4] == 'D' else fields[3]
+    if commit is not None:
+        yield commit
+    stderr = process.stderr.read().decode()
+    if process.wait() != 0:
+        raise HistoryError(stderr.strip() or 'git log failed')
+
+
+def tree_blobs(revision, roots, suffixes=DEFAULT_SUFFIXES, cwd=None):
+    """Return {path: blob id} for the tracked files under roots at revision"""
+    blobs = {}
+    output = _git('ls-tree', '-r', '-z', '--full-tree', revision, '--', *roots, cwd=cwd)
+    for entry in output.split('\0'):
+        if not entry:
+            continue
+        info, path = entry.split('\t', 1)
+        _, kind, sha = info.split()
+        if kind == 'blob' and _tracked(path, roots, suffixes):
+            blobs[path] = sha
+    return blobs
+
+
+class FindingSpan:
+    """A finding and the first-parent commits over which it existed"""
+
+    __slots__ = ('path', 'validator', 'finding', 'introduced', 'last', 'fixed')
+
+    def __init__(self, path, validator, finding, introduced):
+        self.path = path
+        self.validator = validator
+        # As reported in the latest version of the file that has it
+        self.finding = finding
+        self.introduced = introduced
+        # The last commit with the finding and the commit that removed it
+        self.last = None
+        self.fixed = None
+
+    @property
+    def commits(self):
+        return self.last.index - self.introduced.index + 1
+
+
+class HistoryAudit:
+    """
+    Replay first-parent history through per-file checks
+    checks maps validator names to check functions; each file version is
+    written to a scratch tree with its module's .tf files for the check to read
+    """
+
+    def __init__(self, checks, roots, suffixes=DEFAULT_SUFFIXES, toplevel=None):
+        self.checks = checks
+        self.roots = roots
+        self.suffixes = suffixes
+        self.toplevel = toplevel
+        # {(blob, file name, module context): {validator: findings}}
+        self.results = {}
+        # {module directory: {.tf path: blob}} as of the commit being replayed
+        self.modules = {}
+        self.commit_count = 0
+        self.blob_reads = 0
+
+    def _context(self, tree, path):
+        """The other .tf files of a module, whose locals and variables a .tf file's findings use"""
+        if not path.endswith('.tf'):
+            return ()
+        directory = posixpath.dirname(path)
+        return tuple(sorted(
+            (other, blob) for other, blob in self.modules.get(directory, {}).items() if other != path
+        ))
+
+    def _validate(self, blobs, scratch, tree, path):
+        context = self._context(tree, path)
+        key = (tree[path], posixpath.basename(path), tuple((posixpath.basename(p), b) for p, b in context))
+        results = self.results.get(key)
+        if results is not None:
+            return results
+
+        written = []
+        for member, blob in [(path, tree[path]), *context]:
+            target = scratch / member
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(blobs.read(blob))
+            written.append(target)
+        try:
+            results = {}
+            for name, check in self.checks.items():
+                # Resolved now: kept findings must not hold on to this version's parsed text
+                results[name] = [finding.resolve() for finding in check(scratch / path) or []]
+        finally:
+            # Leave nothing behind that another module's check could pick up
+            for target in written:
+                target.unlink()
+                iac_index.forget(target)
+            iac_symbols.invalidate(scratch / posixpath.dirname(path))
+            iac_modules.invalidate()
+        self.results[key] = results
+        return results
+
+    def run(self, revisions):
+        """Return a FindingSpan for every finding that existed in the commits of revisions"""
+        spans = []
+        # {path: {(validator, rule, address, message, occurrence): FindingSpan}}
+        open_spans = {}
+        tree = {}
+        self.modules = {}
+        previous = None
+
+        with BlobReader(self.toplevel) as blobs, tempfile.TemporaryDirectory() as scratch:
+            scratch = Path(scratch)
+            for commit in iter_commits(revisions, self.roots, self.suffixes, self.toplevel):
+                if previous is None:
+                    parent = _git('rev-list', '--first-parent', '--max-count=1', '--skip=1', commit.sha, cwd=self.toplevel).strip()
+                    if parent:
+                        tree = tree_blobs(parent, self.roots, self.suffixes, self.toplevel)
+                        for path, blob in tree.items():
+                            if path.endswith('.tf'):
+                                self.modules.setdefault(posixpath.dirname(path), {})[path] = blob
+
+                affected = set(commit.changes)
+                for path, blob in commit.changes.items():
+                    module = self.modules.setdefault(posixpath.dirname(path), {}) if path.endswith('.tf') else {}
+                    if blob is None:
+                        tree.pop(path, None)
+                        module.pop(path, None)
+                    else:
+                        tree[path] = blob
+                        if path.endswith('.tf'):
+                            module[path] = blob
+                    # The rest of the module sees different locals and variables
+                    affected.update(module)
+                if previous is None:
+                    affected.update(tree)
+
+                for path in sorted(affected):
+                    current = {}
+                    if path in tree:
+                        for name, findings in self._validate(blobs, scratch, tree, path).items():
+                            for finding in findings:
+                                key = (name, finding.rule, finding.address, finding.message)
+                                # Repeats of a finding are told apart by their order in the file
+                                occurrence = 0
+                                while (*key, occurrence) in current:
+                                    occurrence += 1
+                                current[(*key, occurrence)] = finding
+                    existing = open_spans.setdefault(path, {})
+                    for key in [key for key in existing if key not in current]:
+                        span = existing.pop(key)
+                        span.last = previous
+                        span.fixed = commit
+                        spans.append(span)
+                    for key, finding in current.items():
+                        if key in existing:
+                            existing[key].finding = finding
+                        else:
+                            existing[key] = FindingSpan(path, key[0], finding, commit)
+                previous = commit
+                self.commit_count += 1
+            self.blob_reads = blobs.reads
+
+        for existing in open_spans.values():
+            for span in existing.values():
+                span.last = previous
+                spans.append(span)
+        spans.sort(key=lambda span: (span.path, span.introduced.index, span.validator, span.finding.rule))
+        return spans
@@ -0,0 +1,341 @@
+"""
+Parsed resource index shared by the naming and tag validators
+Each file is read and parsed once per run; validators query the index
+instead of re-reading the file and running their own regexes over it
+"""
+
+import re
+import sys
+import bisect
+from array import array
+from collections import namedtuple
+from pathlib import Path
+
+from iac_scanner import brace_pairs
+from iac_profile import profiled
+
+
+class Resource:
+    """
+    A resource declaration, as offsets into the parsed file's content
+    start/end span the whole declaration. body_start/body_end delimit the text
+    between the block braces and are None for Bicep resources whose value is not
+    a plain object (loops, conditions). tags_start/tags_end delimit the literal
+    tags map, and are None when tags are absent or computed
+    """
+
+    __slots__ = ('type', 'name', 'start', 'end', 'body_start', 'body_end', 'tags_start', 'tags_end', 'source')
+
+    def __init__(self, source, type, name, start, end, body_start, body_end, tags_span):
+        # Few distinct types across a tree, so every resource of a type shares one string
+        self.type = sys.intern(type)
+        self.name = name
+        self.start = start
+        self.end = end
+        self.body_start = body_start
+        self.body_end = body_end
+        self.tags_start, self.tags_end = tags_span or (None, None)
+        self.source = source
+
+    @property
+    def tags(self):
+        """The literal tags map text, or None when tags are absent or computed"""
+        if self.tags_start is None:
+            return None
+        return self.source[self.tags_start:self.tags_end]
+
+    def __repr__(self):
+        return f"Resource({self.type!r}, {self.name!r}, {self.start}, {self.end})"
+
+
+class NameAssignment:
+    """A literal *_name attribute; offset is where the attribute starts"""
+
+    __slots__ = ('attribute', 'offset', 'value_start', 'value_end', 'source')
+
+    def __init__(self, source, attribute, offset, value_start, value_end):
+        self.attribute = sys.intern(attribute)
+        self.offset = offset
+        self.value_start = value_start
+        self.value_end = value_end
+        self.source = source
+
+    @property
+    def value(self):
+        return self.source[self.value_start:self.value_end]
+
+    def __repr__(self):
+        return f"NameAssignment({self.attribute!r}, {self.value!r}, {self.offset})"
+
+
+class ModuleCall:
+    """A module block; start is where the declaration starts"""
+
+    __slots__ = ('name', 'start', 'body_start', 'body_end')
+
+    def __init__(self, name, start, body_start, body_end):
+        self.name = name
+        self.start = start
+        self.body_start = body_start
+        self.body_end = body_end
+
+
+ParsedFile = namedtuple('ParsedFile', [
+    'path', 'dialect', 'content', 'resources', 'name_assignments', 'locals', 'variables', 'modules',
+])
+
+TERRAFORM_RESOURCE_HEADER = re.compile(r'resource\s+"([^"]+)"\s+"([^"]+)"\s*\{')
+TERRAFORM_LOCALS_HEADER = re.compile(r'^[ \t]*locals\s*\{', re.MULTILINE)
+TERRAFORM_VARIABLE_HEADER = re.compile(r'variable\s+"([^"]+)"\s*\{')
+TERRAFORM_MODULE_HEADER = re.compile(r'module\s+"([^"]+)"\s*\{')
+TERRAFORM_TAGS = re.compile(r'tags\s*=\s*\{')
+
+BICEP_RESOURCE_HEADER = re.compile(r'resource\s+(\w+)\s+\'([^\']+)\'\s*=(\s*\{)?')
+BICEP_TAGS = re.compile(r'tags:\s*\{')
+
+NEWLINE = re.compile(r'\n')
+
+# Attributes whose literal value is an Azure resource name
+NAME_ASSIGNMENT = re.compile(r'(\w+_name)\s*=\s*"([^"]+)"')
+
+DIALECTS = {
+    '.tf': 'hcl',
+    '.bicep': 'bicep',
+}
+
+_index = {}
+# Narrowed views of the files a --since check is looking at, by the same key
+_selections = {}
+# Newline and resource start offsets per file, computed on first use and
+# keyed by path with the content or resource list they were computed from
+_line_starts = {}
+_resource_starts = {}
+
+
+def _literal_map(content, pairs, pattern, body_start, body_end):
+    """Return the (start, end) of the first literal map matched by pattern in a body"""
+    match = pattern.search(content, body_start, body_end)
+    if not match:
+        return None
+    close = pairs.get(match.end() - 1)
+    if close is None:
+        return None
+    return match.end(), close
+
+
+def _parse_terraform(path, content):
+    pairs = brace_pairs(content, 'hcl')
+
+    resources = []
+    for match in TERRAFORM_RESOURCE_HEADER.finditer(content):
+        body_end = pairs.get(match.end() - 1)
+        if body_end is None:
+            continue
+        body_start = match.end()
+        tags_span = _literal_map(content, pairs, TERRAFORM_TAGS, body_start, body_end)
+        resources.append(Resource(content, match.group(1), match.group(2), match.start(), body_end, body_start, body_end, tags_span))
+
+    locals_blocks = []
+    for match in TERRAFORM_LOCALS_HEADER.finditer(content):
+        body_end = pairs.get(match.end() - 1)
+        if body_end is not None:
+            locals_blocks.append((match.end(), body_end))
+
+    variables = {}
+    for match in TERRAFORM_VARIABLE_HEADER.finditer(content):
+        body_end = pairs.get(match.end() - 1)
+        if body_end is not None:
+            variables.setdefault(match.group(1), (match.end(), body_end))
+
+    name_assignments = [
+        NameAssignment(content, match.group(1), match.start(), match.start(2), match.end(2))
+        for match in NAME_ASSIGNMENT.finditer(content)
+    ]
+
+    modules = []
+    for match in TERRAFORM_MODULE_HEADER.finditer(content):
+        body_end = pairs.get(match.end() - 1)
+        if body_end is not None:
+            modules.append(ModuleCall(match.group(1), match.start(), match.end(), body_end))
+
+    return ParsedFile(path, 'hcl', content, resources, name_assignments, locals_blocks, variables, modules)
+
+
+def _parse_bicep(path, content):
+    pairs = brace_pairs(content, 'bicep')
+
+    resources = []
+    headers = list(BICEP_RESOURCE_HEADER.finditer(content))
+    for position, match in enumerate(headers):
+        body_start = body_end = tags_span = None
+        end = match.end()
+        if match.group(3):
+            body_end = pairs.get(match.end() - 1)
+            if body_end is not None:
+                body_start = match.end()
+                end = body_end
+                tags_span = _literal_map(content, pairs, BICEP_TAGS, body_start, body_end)
+        else:
+            # Loops and conditions: the declaration ends with the first object's brace
+            limit = headers[position + 1].start() if position + 1 < len(headers) else len(content)
+            brace = content.find('{', match.end(), limit)
+            while brace >= 0 and brace not in pairs:
+                brace = content.find('{', brace + 1, limit)
+            if brace >= 0:
+                end = pairs[brace]
+        # Bicep declares the symbolic name before the type
+        resources.append(Resource(content, match.group(2), match.group(1), match.start(), end, body_start, body_end, tags_span))
+
+    return ParsedFile(path, 'bicep', content, resources, [], [], {}, [])
+
+
+@profiled
+def parse_file(file_path, content=None, whole=False, keep=True):
+    """
+    Return the parsed index entry for a file, reading and parsing it at most once
+    Callers that already hold the file text can pass it as content to skip the read.
+    While select_lines() narrows the file, validators get the narrowed view;
+    whole=True returns the full parse, for readers that need every block of a
+    module (symbol tables, module calls, tfvars). keep=False parses a file
+    that is not indexed without adding it, for readers that only derive
+    data from it once per run (module graphs)
+    """
+    key = Path(file_path).resolve()
+    if not whole:
+        selected = _selections.get(key)
+        if selected is not None:
+            return selected
+    parsed = _index.get(key)
+    if parsed is None:
+        if content is None:
+            with open(file_path, 'r') as f:
+                content = f.read()
+        if DIALECTS.get(Path(file_path).suffix) == 'bicep':
+            parsed = _parse_bicep(Path(file_path), content)
+        else:
+            parsed = _parse_terraform(Path(file_path), content)
+        if keep:
+            _index[key] = parsed
+    return parsed
+
+
+def forget(file_path):
+    """Drop the index entry of a file and the offsets computed from it"""
+    key = Path(file_path).resolve()
+    _selections.pop(key, None)
+    parsed = _index.pop(key, None)
+    if parsed is not None:
+        _line_starts.pop(parsed.path, None)
+        _resource_starts.pop(parsed.path, None)
+
+
+def release(directory):
+    """Forget every indexed file outside directory, and the offsets computed from them"""
+    directory = Path(directory).resolve()
+    for key in [key for key in _index if key.parent != directory]:
+        forget(key)
+    # Offsets worked out for findings of files forgotten earlier
+    kept = {parsed.path for parsed in _index.values()}
+    for cache in (_line_starts, _resource_starts):
+        for path in [path for path in cache if path not in kept]:
+            del cache[path]
+
+
+class ReleasingCheck:
+    """
+    Wrap a per-file check for batch runs so the index only holds the
+    directory being checked: moving on to a file in another directory
+    forgets the rest. Files are discovered a directory at a time, so a
+    module's files stay parsed while its symbol table and checks use them,
+    and peak memory follows the largest directory rather than the tree.
+    The lint daemon keeps its whole index and does not use this
+    """
+
+    def __init__(self, check):
+        self.check = check
+        self.directory = None
+
+    def __call__(self, file_path):
+        directory = Path(file_path).resolve().parent
+        if directory != self.directory:
+            release(directory)
+            self.directory = directory
+        return self.check(file_path)
+
+
+def body(parsed, resource):
+    """Return the body text of a resource block"""
+    return parsed.content[resource.body_start:resource.body_end]
+
+
+def body_contains(parsed, resource, text):
+    """Return whether a resource block's body contains text, searching it in place"""
+    return parsed.content.find(text, resource.body_start, resource.body_end) >= 0
+
+
+def line_starts(parsed):
+    """Return the offset at which each line of a parsed file starts"""
+    cached = _line_starts.get(parsed.path)
+    if cached is None or cached[0] is not parsed.content:
+        # Machine integers: a list of int objects costs four times as much
+        starts = array('q', [0])
+        starts.extend(match.end() for match in NEWLINE.finditer(parsed.content))
+        cached = _line_starts[parsed.path] = (parsed.content, starts)
+    return cached[1]
+
+
+def line_column(parsed, offset):
+    """Return the 1-based (line, column) of an offset in a parsed file"""
+    starts = line_starts(parsed)
+    line = bisect.bisect_right(starts, offset)
+    return line, offset - starts[line - 1] + 1
+
+
+def enclosing_resource(parsed, offset):
+    """Return the resource whose declaration contains offset, or None"""
+    cached = _resource_starts.get(parsed.path)
+    if cached is None or cached[0] is not parsed.resources:
+        cached = _resource_starts[parsed.path] = (parsed.resources, [r.start for r in parsed.resources])
+    position = bisect.bisect_right(cached[1], offset)
+    if position and offset <= parsed.resources[position - 1].end:
+        return parsed.resources[position - 1]
+    return None
+
+
+def select_lines(file_path, line_ranges):
+    """
+    Narrow a file's view to the blocks overlapping the given line ranges
+    line_ranges holds inclusive 1-based (first, last) pairs. Until deselect(),
+    validators that query the index only see resources, name assignments and
+    variables touched by those lines; the full entry stays in the index.
+    """
+    parsed = parse_file(file_path, whole=True)
+    content = parsed.content
+
+    starts = line_starts(parsed)
+    spans = []
+    for first, last in line_ranges:
+        start = starts[min(first, len(starts)) - 1]
+        end = starts[last] if last < len(starts) else len(content) + 1
+        spans.append((start, end))
+    spans.sort()
+    span_starts = [start for start, _ in spans]
+
+    def touched(start, end):
+        # Any changed span that begins before the block ends and ends after it starts
+        position = bisect.bisect_right(span_starts, end)
+        return any(span_end > start for _, span_end in spans[:position])
+
+    selected = parsed._replace(
+        resources=[r for r in parsed.resources if touched(r.start, r.end)],
+        name_assignments=[a for a in parsed.name_assignments if touched(a.offset, a.offset)],
+        locals=[block for block in parsed.locals if touched(*block)],
+        variables={name: block for name, block in parsed.variables.items() if touched(*block)},
+    )
+    _selections[Path(file_path).resolve()] = selected
+    return selected
+
+
+def deselect(file_path):
+    """Drop the narrowed view select_lines() made of a file"""
+    _selections.pop(Path(file_path).resolve(), None)
@@ -0,0 +1,191 @@
+"""
+Terraform module call graph
+Links each module directory to the module blocks that instantiate it, so the
+validators check a module's resources once and then evaluate only the inputs
+each call passes (names, tags) per instantiation, reporting findings under
+the instantiated address (module.redis.azurerm_redis_cache.main)
+"""
+
+import os
+import re
+import hashlib
+from pathlib import Path
+
+from iac_index import parse_file
+from iac_hcl import parse_body
+from iac_discovery import DEFAULT_EXCLUDES
+from iac_symbols import BoundSymbolTable, directory_fingerprint, module_fingerprint, module_symbols
+
+_graphs = {}
+_instances = {}
+_sources = {}
+
+MODULE_HEADER = re.compile(r'module\s+"([^"]+)"\s*\{')
+MODULE_SOURCE = re.compile(r'\bsource\s*=\s*"([^"]+)"')
+
+
+class ModuleInstance:
+    """One instantiation of a module: its address prefix and its bound symbol table"""
+
+    __slots__ = ('address', 'symbols', 'callers')
+
+    def __init__(self, address, symbols, callers):
+        self.address = address
+        self.symbols = symbols
+        # Module directories on the call path, outermost first
+        self.callers = callers
+
+
+def terraform_tree(directory):
+    """
+    Return the top of the Terraform tree holding directory: the highest
+    ancestor reached through directories with .tf files or named modules
+    """
+    directory = Path(directory).resolve()
+    top = directory
+    for ancestor in directory.parents:
+        if any(ancestor.glob('*.tf')):
+            top = ancestor
+        elif ancestor.name != 'modules':
+            break
+    return top
+
+
+def _walk_tf(tree):
+    for directory, subdirectories, files in os.walk(tree):
+        subdirectories[:] = sorted(name for name in subdirectories if name + '/' not in DEFAULT_EXCLUDES)
+        for file_name in sorted(files):
+            if file_name.endswith('.tf'):
+                yield Path(directory) / file_name
+
+
+class ModuleGraph:
+    """Module calls with local sources across one Terraform tree"""
+
+    def __init__(self, tree):
+        self.tree = tree
+        # {callee directory: [(caller directory, module name, {input: decoded value})]}
+        self.callers = {}
+
+        for tf_file in _walk_tf(tree):
+            self._add_calls(tf_file)
+
+    def _add_calls(self, tf_file):
+        with open(tf_file, 'r') as f:
+            content = f.read()
+        # Only files with module calls are parsed, and not kept in the index
+        if not MODULE_HEADER.search(content):
+            return
+        parsed = parse_file(tf_file, content, whole=True, keep=False)
+        caller = tf_file.parent
+        for call in parsed.modules:
+            inputs = {
+                name: values[0] if values else None
+                for name, values in parse_body(parsed.content, call.body_start, call.body_end).items()
+            }
+            source = inputs.pop('source', None)
+            # Registry and remote modules are not ours to validate
+            if not isinstance(source, str) or not source.startswith(('./', '../')):
+                continue
+            callee = (caller / source).resolve()
+            self.callers.setdefault(callee, []).append((caller, call.name, inputs))
+
+
+def module_graph(directory):
+    """Return the module graph of the tree holding directory, built once per run"""
+    tree = terraform_tree(directory)
+    graph = _graphs.get(tree)
+    if graph is None:
+        graph = _graphs[tree] = ModuleGraph(tree)
+    return graph
+
+
+def _instances_of(graph, directory, path):
+    """Instances of the module in directory; path guards against call cycles"""
+    instances = []
+    for caller, name, inputs in graph.callers.get(directory, []):
+        if caller in path:
+            continue
+        outer = _instances_of(graph, caller, path | {caller})
+        if not outer:
+            # caller is a root module
+            outer = [ModuleInstance('', module_symbols(caller), [])]
+        for instance in outer:
+            symbols = BoundSymbolTable(module_symbols(directory), instance.symbols, inputs)
+            address = f"{instance.address}.module.{name}" if instance.address else f"module.{name}"
+            instances.append(ModuleInstance(address, symbols, instance.callers + [caller]))
+    return instances
+
+
+def module_instances(file_path):
+    """
+    Return the instantiations of the module containing file_path, outermost
+    caller first; empty for root modules and modules nothing calls
+    """
+    directory = Path(file_path).resolve().parent
+    instances = _instances.get(directory)
+    if instances is None:
+        graph = module_graph(directory)
+        instances = _instances[directory] = _instances_of(graph, directory, frozenset([directory]))
+    return instances
+
+
+def module_sources(directory):
+    """
+    Return {callee directory: [(caller directory, module name)]} for the tree
+    holding directory, from a textual scan for module blocks and their local
+    source; cheap enough for cache keys, where building the ModuleGraph would
+    parse every .tf file of the tree. A block is credited with the first
+    source after its header, so the scan may over-report callers, never miss one
+    """
+    tree = terraform_tree(directory)
+    sources = _sources.get(tree)
+    if sources is None:
+        sources = _sources[tree] = {}
+        for tf_file in _walk_tf(tree):
+            content = tf_file.read_text(errors='replace')
+            for match in MODULE_HEADER.finditer(content):
+                source = MODULE_SOURCE.search(content, match.end())
+                if source is None or not source.group(1).startswith(('./', '../')):
+                    continue
+                callee = (tf_file.parent / source.group(1)).resolve()
+                sources.setdefault(callee, []).append((tf_file.parent, match.group(1)))
+    return sources
+
+
+def _calls_into(directory):
+    """Yield (caller directory, module name) for every call on the call paths into directory"""
+    sources = module_sources(directory)
+    pending = [directory]
+    seen = {directory}
+    while pending:
+        for caller, name in sources.get(pending.pop(), []):
+            yield caller, name
+            if caller not in seen:
+                seen.add(caller)
+                pending.append(caller)
+
+
+def calling_directories(directory):
+    """Return the directories of every module on the call paths into directory"""
+    directory = Path(directory).resolve()
+    return {caller for caller, _ in _calls_into(directory)}
+
+
+def instance_fingerprint(file_path):
+    """
+    Hash of a module's files and those of every module on its call paths,
+    for cache keys of findings that depend on caller inputs
+    """
+    directory = Path(file_path).resolve().parent
+    digest = hashlib.sha256(module_fingerprint(file_path).encode())
+    for caller, name in _calls_into(directory):
+        digest.update(name.encode() + b'\0' + directory_fingerprint(caller).encode())
+    return digest.hexdigest()
+
+
+def invalidate():
+    """Forget every module graph, e.g. after a .tf file changed"""
+    _graphs.clear()
+    _instances.clear()
+    _sources.clear()
@@ -0,0 +1,191 @@
+"""
+Streaming reader for `terraform show -json` plan files
+Walks the document incrementally and decodes one resource_changes entry at
+a time, so memory stays bounded by the largest single resource change rather
+than the size of the plan (prod plans run to hundreds of MB)
+"""
+
+import re
+import json
+
+_decoder = json.JSONDecoder()
+
+
+CHUNK_SIZE = 1 << 20
+
+# Everything up to the next bracket, consuming whole strings in one C-level match
+SKIP = re.compile(r'(?:[^"{}\[\]]+|"(?:[^"\\]|\\.)*")*', re.DOTALL)
+STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+WHITESPACE = re.compile(r'[ \t\r\n]*')
+SCALAR = re.compile(r'[^,}\]\s]+')
+
+
+class PlanFormatError(ValueError):
+    """Raised when a plan file is not a JSON object in the expected shape"""
+
+
+class _Reader:
+    """
+    Sliding window over a text file
+    Data before pos is discarded on refill, unless mark pins an earlier offset
+    """
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.mark = None
+        self.eof = False
+
+    def fill(self):
+        """Read another chunk, dropping consumed data; False at end of file"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        keep = self.pos if self.mark is None else self.mark
+        self.buf = self.buf[keep:] + chunk
+        self.pos -= keep
+        if self.mark is not None:
+            self.mark -= keep
+        return True
+
+    def peek(self):
+        """Skip whitespace and return the next character ('' at end of file)"""
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise PlanFormatError(f"expected '{char}' in plan JSON")
+        self.pos += 1
+
+    def string(self):
+        """Consume a string literal and return its raw text"""
+        while True:
+            match = STRING.match(self.buf, self.pos)
+            if match and (match.end() < len(self.buf) or self.eof):
+                self.pos = match.end()
+                return match.group()
+            if not self.fill():
+                raise PlanFormatError('unterminated string in plan JSON')
+
+    def decode_value(self):
+        """Decode one JSON value, reading more of the file if it is cut off"""
+        self.peek()
+        self.mark = self.pos
+        try:
+            while True:
+                try:
+                    value, end = _decoder.raw_decode(self.buf, self.pos)
+                except json.JSONDecodeError:
+                    if self.fill():
+                        continue
+                    raise PlanFormatError('malformed resource change in plan JSON')
+                # A number at the window edge may continue in the next chunk
+                if end == len(self.buf) and self.fill():
+                    continue
+                self.pos = end
+                return value
+        finally:
+            self.mark = None
+
+    def skip_value(self):
+        """Consume one JSON value without decoding it"""
+        char = self.peek()
+        if char == '"':
+            self.string()
+            return
+        if char not in '{[':
+            while True:
+                match = SCALAR.match(self.buf, self.pos)
+                if match and match.end() < len(self.buf) or self.eof:
+                    self.pos = match.end() if match else self.pos
+                    return
+                self.fill()
+
+        depth = 0
+        while True:
+            self.pos = SKIP.match(self.buf, self.pos).end()
+            token = self.buf[self.pos:self.pos + 1]
+            if token == '' or token == '"':
+                # End of the window, or a string cut off by it
+                if not self.fill():
+                    raise PlanFormatError('unexpected end of plan JSON')
+                continue
+            self.pos += 1
+            if token in '{[':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+
+def iter_resource_changes(path, chunk_size=CHUNK_SIZE):
+    """
+    Yield each entry of the plan's top-level resource_changes array as a dict
+    Raises PlanFormatError, after the entries read so far, if the file is not
+    a plan: not UTF-8, not a JSON object, or cut off
+    """
+    # PowerShell redirects write UTF-8 with a byte order mark
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        reader = _Reader(f, chunk_size)
+        try:
+            reader.expect('{')
+
+            while reader.peek() != '}':
+                if reader.peek() == ',':
+                    reader.pos += 1
+                    continue
+                key = json.loads(reader.string())
+                reader.expect(':')
+
+                if key != 'resource_changes':
+                    reader.skip_value()
+                    continue
+
+                reader.expect('[')
+                while True:
+                    char = reader.peek()
+                    if char == ']':
+                        reader.pos += 1
+                        break
+                    if char == ',':
+                        reader.pos += 1
+                        continue
+                    if char == '':
+                        raise PlanFormatError('unexpected end of plan JSON')
+                    change = reader.decode_value()
+                    if not isinstance(change, dict):
+                        raise PlanFormatError('resource change is not a JSON object')
+                    yield change
+        except UnicodeDecodeError:
+            raise PlanFormatError('plan is not UTF-8 text') from None
+        except json.JSONDecodeError:
+            raise PlanFormatError('malformed key in plan JSON') from None
+
+
+def planned_resources(path, chunk_size=CHUNK_SIZE):
+    """
+    Yield (resource_change, after, after_unknown) for managed resources that
+    exist after the plan; deletes (after is null) and data sources are skipped
+    """
+    for change in iter_resource_changes(path, chunk_size):
+        if change.get('mode', 'managed') != 'managed':
+            continue
+        details = change.get('change') or {}
+        if not isinstance(details, dict):
+            raise PlanFormatError(f"change of {change.get('address', 'a resource')} is not a JSON object")
+        after = details.get('after')
+        if not isinstance(after, dict):
+            continue
+        after_unknown = details.get('after_unknown')
+        yield change, after, after_unknown if isinstance(after_unknown, dict) else {}
@@ -0,0 +1,254 @@
+"""
+Per-file and per-rule profiling for the IaC validators
+Rules decorated with @profiled record their own wall time and regex match
+count while a ProfiledCheck is running; ProfiledCheck adds bytes read and
+resources scanned per file, prints a top-N table and can write a Prometheus
+textfile-collector file
+"""
+
+import os
+import re
+import sys
+import time
+import functools
+import tempfile
+from pathlib import Path
+
+from iac_runner import _positive_int
+
+
+# Modules whose compiled patterns are counted, besides the validator itself
+INSTRUMENTED_MODULES = ['iac_scanner', 'iac_index', 'iac_hcl', 'iac_environments']
+
+METRIC_PREFIX = 'bidone_iac_lint'
+
+# Rule timings for the file being checked, or None when profiling is off
+_current = None
+# Open profiled calls as [child_seconds, child_matches], so times are exclusive
+_stack = []
+_matches = 0
+_instrumented = False
+
+
+class CountingPattern:
+    """Proxy for a compiled pattern that counts successful matches"""
+
+    __slots__ = ('pattern',)
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def _count(self, result):
+        global _matches
+        if result:
+            _matches += 1
+        return result
+
+    def match(self, *args, **kwargs):
+        return self._count(self.pattern.match(*args, **kwargs))
+
+    def fullmatch(self, *args, **kwargs):
+        return self._count(self.pattern.fullmatch(*args, **kwargs))
+
+    def search(self, *args, **kwargs):
+        return self._count(self.pattern.search(*args, **kwargs))
+
+    def finditer(self, *args, **kwargs):
+        global _matches
+        for match in self.pattern.finditer(*args, **kwargs):
+            _matches += 1
+            yield match
+
+    def findall(self, *args, **kwargs):
+        global _matches
+        found = self.pattern.findall(*args, **kwargs)
+        _matches += len(found)
+        return found
+
+    def __getattr__(self, name):
+        return getattr(self.pattern, name)
+
+
+def _instrument(module):
+    """Swap the module's compiled patterns (and dicts of them) for counting proxies"""
+    for name, value in list(vars(module).items()):
+        if isinstance(value, re.Pattern):
+            setattr(module, name, CountingPattern(value))
+        elif isinstance(value, dict) and value and all(isinstance(v, re.Pattern) for v in value.values()):
+            for key, pattern in value.items():
+                value[key] = CountingPattern(pattern)
+
+
+def profiled(func):
+    """Record wall time and regex matches of a rule while profiling is active"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _current is None:
+            return func(*args, **kwargs)
+
+        _stack.append([0.0, 0])
+        start_matches = _matches
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            matches = _matches - start_matches
+            child_seconds, child_matches = _stack.pop()
+            if _stack:
+                _stack[-1][0] += seconds
+                _stack[-1][1] += matches
+            timing = _current.setdefault(func.__name__, [0.0, 0])
+            timing[0] += seconds - child_seconds
+            timing[1] += matches - child_matches
+    return wrapper
+
+
+class Stats:
+    __slots__ = ('seconds', 'bytes', 'matches', 'resources', 'files')
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.bytes = 0
+        self.matches = 0
+        self.resources = 0
+        self.files = 0
+
+    def add(self, seconds, size, matches, resources):
+        self.seconds += seconds
+        self.bytes += size
+        self.matches += matches
+        self.resources += resources
+        self.files += 1
+
+
+class ProfiledCheck:
+    """
+    Wrap a per-file check so each call also returns its profile
+    Results from run_in_order go through collect(), which strips the profile
+    back off and accumulates it in this (parent) process
+    """
+
+    def __init__(self, check, validator):
+        self.check = check
+        self.validator = validator
+        self.files = {}
+        self.rules = {}
+
+    def __getstate__(self):
+        # Workers only need the wrapped check, not the profile collected so far
+        state = dict(self.__dict__)
+        state['files'] = {}
+        state['rules'] = {}
+        return state
+
+    def __call__(self, file_path):
+        global _current, _matches, _instrumented
+        if not _instrumented:
+            for name in ['__main__'] + INSTRUMENTED_MODULES:
+                if name in sys.modules:
+                    _instrument(sys.modules[name])
+            _instrumented = True
+
+        # Imported here so the index module itself is instrumented before use
+        from iac_index import _index
+
+        rules = _current = {}
+        _stack.append([0.0, 0])
+        _matches = 0
+        start = time.perf_counter()
+        try:
+            issues = self.check(file_path)
+        finally:
+            seconds = time.perf_counter() - start
+            _stack.pop()
+            _current = None
+
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            size = 0
+        parsed = _index.get(Path(file_path).resolve())
+        resources = len(parsed.resources) if parsed is not None else 0
+
+        return issues, (seconds, size, _matches, resources, rules)
+
+    def collect(self, file_path, result):
+        """Record the profile carried by a result and return the plain issues"""
+        issues, (seconds, size, matches, resources, rules) = result
+        stats = self.files[str(file_path)] = Stats()
+        stats.add(seconds, size, matches, resources)
+        for rule, (rule_seconds, rule_matches) in rules.items():
+            self.rules.setdefault(rule, Stats()).add(rule_seconds, size, rule_matches, resources)
+        return issues
+
+    def print_report(self, top, stream=None):
+        """Print the slowest files and every rule, by wall time"""
+        def table(title, rows):
+            print(f"\n{title}", file=stream)
+            print(f"  {'seconds':>9}  {'bytes':>10}  {'matches':>9}  {'resources':>9}  name", file=stream)
+            for name, stats in rows:
+                print(f"  {stats.seconds:9.4f}  {stats.bytes:10d}  {stats.matches:9d}  {stats.resources:9d}  {name}",
+                      file=stream)
+
+        def by_time(items):
+            return sorted(items, key=lambda item: item[1].seconds, reverse=True)
+
+        total = sum(stats.seconds for stats in self.files.values())
+        print(f"\nProfile: {len(self.files)} files, {total:.4f}s in checks", file=stream)
+        table(f"Slowest files (top {top}):", by_time(self.files.items())[:top])
+        table("Rules (exclusive time, bytes and resources of the files each rule ran on):",
+              by_time(self.rules.items()))
+
+    def write_textfile(self, path):
+        """Write the profile for a Prometheus node_exporter textfile collector"""
+        validator = _label(self.validator)
+        lines = []
+
+        def family(name, help_text, series):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+            for labels, value in series:
+                lines.append(f"{METRIC_PREFIX}_{name}{{validator=\"{validator}\"{labels}}} {value}")
+
+        files = [(f',file="{_label(name)}"', stats) for name, stats in sorted(self.files.items())]
+        rules = [(f',rule="{_label(name)}"', stats) for name, stats in sorted(self.rules.items())]
+        for scope, series in (('file', files), ('rule', rules)):
+            family(f'{scope}_seconds', f'Wall time spent per {scope} in the last run',
+                   [(labels, f'{stats.seconds:.6f}') for labels, stats in series])
+            family(f'{scope}_bytes', f'Bytes scanned per {scope} in the last run',
+                   [(labels, stats.bytes) for labels, stats in series])
+            family(f'{scope}_regex_matches', f'Regex matches per {scope} in the last run',
+                   [(labels, stats.matches) for labels, stats in series])
+            family(f'{scope}_resources', f'Resources scanned per {scope} in the last run',
+                   [(labels, stats.resources) for labels, stats in series])
+        family('files', 'Files checked in the last run', [('', len(self.files))])
+        family('last_run_timestamp_seconds', 'Unix time the last profiled run finished',
+               [('', f'{time.time():.0f}')])
+
+        # node_exporter may read at any time, so replace the file atomically
+        path = Path(path)
+        fd, tmp_path = tempfile.mkstemp(prefix=f'.{path.name}.', dir=path.parent)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write('\n'.join(lines) + '\n')
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def add_profile_arguments(parser):
+    """Add the --profile options shared by the validators"""
+    parser.add_argument('--profile', action='store_true',
+                        help='Record wall time, bytes read, regex matches and resources scanned '
+                             'per file and per rule, and print the slowest (bypasses the cache)')
+    parser.add_argument('--profile-top', type=_positive_int, default=10, metavar='N',
+                        help='Number of files in the --profile table (default: 10)')
+    parser.add_argument('--profile-textfile', metavar='PATH',
+                        help='Also write the profile as a Prometheus textfile-collector file '
+                             '(implies --profile)')
@@ -0,0 +1,161 @@
+"""
+Shared command-line flow of the IaC validators
+Picks the files to check, wraps each validator's per-file check for the
+options given (--since, cache, profile), runs it through the lint daemon or
+the process pool, and reports the findings as text or a structured format,
+applying the baseline, so every script ends a run the same way
+"""
+
+import sys
+
+from iac_runner import run_in_order
+from iac_index import ReleasingCheck
+from iac_cache import CachedCheck
+from iac_findings import finding_writer
+from iac_baseline import Baseline
+from iac_discovery import DEFAULT_ROOTS, DEFAULT_SUFFIXES, iter_files, requested_files
+from iac_profile import ProfiledCheck
+from iac_daemon import run_via_daemon
+from iac_gitdiff import changed_line_ranges, ChangedBlocksCheck, GitDiffError
+
+
+def select_files(parser, args, roots=DEFAULT_ROOTS, suffixes=DEFAULT_SUFFIXES):
+    """
+    Return (files to check, {path: changed line ranges} under --since or None)
+    The files are the ones given (argv, --files-from), or those discovered
+    under roots, or under --since those the diff touches
+    """
+    if getattr(args, 'since', None):
+        try:
+            changes = changed_line_ranges(args.since, list(requested_files(args)) or roots)
+        except GitDiffError as e:
+            parser.error(f"--since {args.since}: {e}")
+        return list(changes), changes
+    # If no files specified, find all relevant files
+    if not (args.files or args.files_from):
+        return iter_files(roots, suffixes=suffixes, excludes=args.exclude), None
+    return (f for f in requested_files(args) if f.exists()), None
+
+
+def wrap_check(check, name, version, args, changes=None, dependencies=None, uncached=False, profile=False):
+    """
+    Wrap a validator's per-file check: scoped to the changed blocks under
+    --since, otherwise cached unless uncached or --no-cache, and profiled
+    dependencies is the cache key function for findings that depend on other files
+    """
+    if changes is not None:
+        # Findings depend on the diff, so they bypass the cache
+        check = ChangedBlocksCheck(check, changes)
+    elif not (uncached or args.no_cache):
+        check = CachedCheck(check, name, version, args.cache_dir, dependencies)
+    if profile:
+        check = ProfiledCheck(check, name)
+    return check
+
+
+def run_checks(name, version, check, check_file, files, args, daemon=True):
+    """
+    Yield (file_path, issues) in file order from a running lint daemon when
+    daemon allows it and --no-daemon is not given, otherwise from run_in_order()
+    """
+    results = None
+    if daemon and not args.no_daemon:
+        # A running lint daemon answers from its warm index
+        results = run_via_daemon(name, version, files, check_file)
+    if results is None:
+        results = run_in_order(ReleasingCheck(check), files, args.jobs)
+    return results
+
+
+class Report:
+    """
+    Output of one validator run
+    sections holds (what is checked, clean-file label, summary label) per
+    validator reporting into this run; add() reports one file's findings for
+    one of them. details, if given, maps a checked file to a line of context
+    shown above its findings in text output
+    """
+
+    def __init__(self, args, tool, rules, sections, details=None):
+        self.args = args
+        self.sections = sections
+        self.details = details
+        self.counts = [0] * len(sections)
+        self.writer = finding_writer(args.format, tool, rules)
+        self.baseline = Baseline(args.baseline, rules)
+
+    def add(self, file_path, issues, section=0):
+        if self.args.update_baseline:
+            if issues is not None:
+                self.baseline.record(file_path, issues)
+            return
+        issues = self.baseline.filter(file_path, issues)
+        if self.writer is not None:
+            if issues:
+                self.writer.write(file_path, issues)
+                self.counts[section] += len(issues)
+            return
+
+        subject, label, _ = self.sections[section]
+        print(f"Checking {subject} in: {file_path}")
+
+        if issues is None:
+            return
+
+        if self.details is not None:
+            print(f"  {self.details(file_path)}")
+        if issues:
+            print(f"  Issues found in {file_path}:")
+            for issue in issues:
+                print(f"    - {issue}")
+            self.counts[section] += len(issues)
+        else:
+            print(f"  ✓ No {label} issues found")
+
+    def consume(self, results, check):
+        """add() every (file_path, issues) of a single validator's results"""
+        for file_path, issues in results:
+            if isinstance(check, ProfiledCheck):
+                issues = check.collect(file_path, issues)
+            self.add(file_path, issues)
+
+    def finish(self, checks, guidelines, success):
+        """
+        Close the run and exit: 1 if findings were reported, else 0
+        guidelines are the lines printed after the text summary when there
+        are findings, and success the line printed when there are none
+        """
+        # Keep structured output on stdout parseable
+        stream = sys.stdout if self.writer is None else sys.stderr
+        for check in checks:
+            if isinstance(check, CachedCheck):
+                check.prune()
+            if isinstance(check, ProfiledCheck):
+                check.print_report(self.args.profile_top, stream)
+                if self.args.profile_textfile:
+                    check.write_textfile(self.args.profile_textfile)
+
+        if self.args.update_baseline:
+            count = self.baseline.update()
+            if self.writer is not None:
+                self.writer.close()
+            print(f"Updated {self.args.baseline}: {count} accepted findings", file=stream)
+            sys.exit(0)
+
+        if self.writer is not None:
+            self.writer.close()
+            sys.exit(1 if any(self.counts) else 0)
+
+        if self.baseline.suppressed:
+            print(f"\n{self.baseline.suppressed} findings accepted in {self.args.baseline} were not reported")
+
+        if any(self.counts):
+            print()
+            for (_, _, summary), count in zip(self.sections, self.counts):
+                print(f"Total {summary} issues: {count}")
+            for line in guidelines:
+                print(line)
+            sys.exit(1)
+        else:
+            print(f"\n{success}")
+            sys.exit(0)
@@ -0,0 +1,125 @@
+"""
+Declarative tag, naming and gateway policy rules shared by the IaC validators
+.iac-rules.json at the repository root is the single copy of the policy that
+validate-tags.py, check-naming.py, validate-apim-policies.py and the Checkov
+custom checks load. It is
+compiled once per process: each rule class becomes one regex, so a tag block
+is scanned once however many tags and values the policy lists
+"""
+
+import re
+import json
+import functools
+from pathlib import Path
+
+
+RULES_FILE = Path(__file__).resolve().parent.parent / '.iac-rules.json'
+
+
+class NeedleSet:
+    """
+    Substring membership for a fixed set of strings in one regex pass
+    The alternation reports the longest needle at each match; needles
+    contained in a reported one are implied, and the few needles whose start
+    another needle's end can overlap are re-checked only when not reported,
+    so found() agrees with `needle in text` for every needle
+    """
+
+    __slots__ = ('pattern', 'implied', 'overlapping')
+
+    def __init__(self, needles):
+        needles = sorted(set(needles), key=len, reverse=True)
+        self.pattern = re.compile('|'.join(map(re.escape, needles))) if needles else None
+        # {needle: the other needles it contains}, for needles containing any
+        self.implied = {}
+        for needle in needles:
+            contained = frozenset(other for other in needles if other != needle and other in needle)
+            if contained:
+                self.implied[needle] = contained
+        # Needles that can start inside a match of another one
+        self.overlapping = [
+            needle for needle in needles
+            if any(other.endswith(needle[:k]) for other in needles if other != needle
+                   for k in range(1, min(len(other), len(needle))))
+        ]
+
+    def found(self, text):
+        """Return the needles occurring in text"""
+        if self.pattern is None:
+            return set()
+        found = set(self.pattern.findall(text))
+        if self.implied:
+            for needle in list(found):
+                found |= self.implied.get(needle, frozenset())
+        for needle in self.overlapping:
+            if needle not in found and needle in text:
+                found.add(needle)
+        return found
+
+    def search(self, text):
+        """True if any needle occurs in text"""
+        return self.pattern is not None and self.pattern.search(text) is not None
+
+
+class RulePack:
+    """The compiled form of a rules file"""
+
+    def __init__(self, data):
+        self.data = data
+
+        tags = data['tags']
+        self.required_tags = tuple(tags['required'])
+        self.tag_values = {tag: tuple(values) for tag, values in tags['values'].items()}
+        self.tag_skips = {dialect: NeedleSet(needles) for dialect, needles in tags['skip'].items()}
+        self.required_needles = NeedleSet(self.required_tags)
+        # Tag names and allowed values the literal checks look for
+        needles = [*self.required_tags, *self.tag_values]
+        for values in self.tag_values.values():
+            needles.extend(values)
+        self.tag_needles = NeedleSet(needles)
+
+        naming = data['naming']
+        self.name_patterns = {name: re.compile(pattern) for name, pattern in naming['patterns'].items()}
+        self.generic_names = frozenset(naming['generic'])
+
+        resource_types = data['resource_types']
+        # {resource type: naming pattern its resolved name must match}
+        self.named_types = {
+            resource_type: rule['name'] for resource_type, rule in resource_types.items() if 'name' in rule
+        }
+        self.mandatory_tag_types = [
+            resource_type for resource_type, rule in resource_types.items() if rule.get('mandatory_tags')
+        ]
+
+        apim = data.get('apim_policies', {})
+        # {policy section: element names every API scope must apply there}
+        self.apim_required = {section: tuple(names) for section, names in apim.get('required', {}).items()}
+        # [{section: element name}] that must be applied together or not at all
+        self.apim_pairs = [tuple(pair.items()) for pair in apim.get('pairs', [])]
+        self.apim_max_timeout = apim.get('max_backend_timeout')
+
+    def skips_tags(self, resource_type, dialect='terraform'):
+        """True for resource types the tag checks leave alone"""
+        return self.tag_skips[dialect].search(resource_type)
+
+    def missing_tags(self, text):
+        """Return the required tags not named in the text of a literal tag block"""
+        found = self.required_needles.found(text)
+        return [tag for tag in self.required_tags if tag not in found]
+
+    def check_literal_tags(self, text):
+        """
+        Return (missing required tags, tags without an allowed value) for the
+        text of a literal tag block, found in a single pass over it
+        """
+        found = self.tag_needles.found(text)
+        missing = [tag for tag in self.required_tags if tag not in found]
+        incorrect = [tag for tag, allowed in self.tag_values.items() if tag in found and found.isdisjoint(allowed)]
+        return missing, incorrect
+
+
+@functools.lru_cache(maxsize=None)
+def load_rules(path=RULES_FILE):
+    """Return the compiled rule pack for path, compiled once per process"""
+    with open(path) as f:
+        return RulePack(json.load(f))
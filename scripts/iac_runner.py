@@ -0,0 +1,88 @@
+"""
+Shared driver for the IaC validators
+Fans per-file checks out over a process pool and hands results back in input
+order, so parallel output is identical to a serial run
+"""
+
+import os
+import sys
+import argparse
+import itertools
+import importlib.util
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value}")
+    return number
+
+
+def add_jobs_argument(parser):
+    """Add the --jobs option shared by the validators"""
+    parser.add_argument('-j', '--jobs', type=_positive_int, default=os.cpu_count() or 1,
+                        help='Number of worker processes (default: CPU count)')
+
+
+# Validator scripts loaded by name in this process, in load order
+_loaded = []
+
+
+def load_validator(name):
+    """
+    Import a hyphenated validator script as a module
+    It is registered in sys.modules, so its checks pickle by reference; the
+    worker processes of run_in_order() load the same scripts before their
+    first task, as spawned workers cannot import them by module name
+    """
+    module_name = name.replace('-', '_')
+    module = sys.modules.get(module_name)
+    if module is None:
+        path = Path(__file__).with_name(f'{name}.py')
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+        _loaded.append(name)
+    return module
+
+
+def _load_validators(names):
+    for name in names:
+        load_validator(name)
+
+
+def run_in_order(check, files, jobs=1):
+    """
+    Yield (file_path, check(file_path)) in the order files were given
+    files may be a lazy iterator; work is submitted as paths arrive, so checks
+    start before discovery finishes
+    """
+    files = iter(files)
+    if jobs <= 1:
+        for file_path in files:
+            yield file_path, check(file_path)
+        return
+
+    # Not worth starting a pool for a single file
+    head = list(itertools.islice(files, 2))
+    if len(head) < 2:
+        for file_path in itertools.chain(head, files):
+            yield file_path, check(file_path)
+        return
+
+    # A few tasks in flight per worker keeps the pool busy with bounded memory
+    window = jobs * 4
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_load_validators, initargs=(tuple(_loaded),)) as pool:
+        for file_path in itertools.chain(head, files):
+            pending.append((file_path, pool.submit(check, file_path)))
+            while pending and (len(pending) >= window or pending[0][1].done()):
+                done_path, future = pending.popleft()
+                yield done_path, future.result()
+        while pending:
+            done_path, future = pending.popleft()
+            yield done_path, future.result()
@@ -0,0 +1,120 @@
+"""
+Block scanner for Terraform (HCL) and Bicep sources
+Pairs every structural brace in a single linear pass, skipping strings,
+heredocs, comments and ${} interpolation, so block bodies are exact at any
+nesting depth
+"""
+
+import re
+
+
+# Tokens that change scanner state while in plain code
+_CODE_TOKENS = {
+    'hcl': re.compile(r'[{}"#]|//|/\*|<<-?([A-Za-z_][\w-]*)[ \t]*\r?\n'),
+    'bicep': re.compile(r"'''|[{}']|//|/\*"),
+}
+
+# Tokens that matter inside a quoted string: escapes, interpolation, the
+# closing quote and a bare newline (unterminated string, resume as code)
+_STRING_TOKENS = {
+    'hcl': re.compile(r'\\.|\$\$\{|%%\{|[$%]\{|"|\n'),
+    'bicep': re.compile(r"\\.|\$\{|'|\n"),
+}
+
+_INTERPOLATION_OPENERS = ('${', '%{')
+
+_heredoc_tokens = {}
+
+
+def _heredoc_pattern(marker):
+    """Return the token pattern for a heredoc terminated by marker"""
+    pattern = _heredoc_tokens.get(marker)
+    if pattern is None:
+        pattern = re.compile(
+            r'\$\$\{|%%\{|[$%]\{|^[ \t]*' + re.escape(marker) + r'[ \t]*\r?$',
+            re.MULTILINE,
+        )
+        _heredoc_tokens[marker] = pattern
+    return pattern
+
+
+def brace_pairs(content, dialect='hcl'):
+    """Map the offset of every structural '{' to the offset of its matching '}'"""
+    code_tokens = _CODE_TOKENS[dialect]
+    string_tokens = _STRING_TOKENS[dialect]
+
+    pairs = {}
+    # Open brace offsets, or the string pattern to resume after an interpolation
+    stack = []
+    state = None  # None while in code, else the pattern of the enclosing string
+    pos = 0
+
+    while True:
+        if state is None:
+            match = code_tokens.search(content, pos)
+            if not match:
+                break
+            token = match.group()
+            pos = match.end()
+
+            if token == '{':
+                stack.append(match.start())
+            elif token == '}':
+                if not stack:
+                    continue  # Stray closing brace
+                top = stack.pop()
+                if isinstance(top, int):
+                    pairs[top] = match.start()
+                else:
+                    state = top
+            elif token == '#' or token == '//':
+                end = content.find('\n', pos)
+                if end < 0:
+                    break
+                pos = end + 1
+            elif token == '/*':
+                end = content.find('*/', pos)
+                if end < 0:
+                    break
+                pos = end + 2
+            elif token == "'''":
+                end = content.find("'''", pos)
+                if end < 0:
+                    break
+                pos = end + 3
+            elif token == '"' or token == "'":
+                state = string_tokens
+            else:
+                state = _heredoc_pattern(match.group(1))
+        else:
+            match = state.search(content, pos)
+            if not match:
+                break
+            token = match.group()
+            pos = match.end()
+
+            if token in _INTERPOLATION_OPENERS:
+                stack.append(state)
+                state = None
+            elif token[0] == '\\' or token == '$${' or token == '%%{':
+                continue
+            else:
+                # Closing quote, heredoc marker or unterminated string
+                state = None
+
+    return pairs
+
+
+def iter_blocks(content, header, dialect='hcl', pairs=None):
+    """
+    Yield (match, body_start, body_end) for each header that opens a block
+    The header pattern must end with the opening '{'; headers inside comments
+    or strings are skipped because their brace is not structural
+    """
+    if pairs is None:
+        pairs = brace_pairs(content, dialect)
+
+    for match in header.finditer(content):
+        body_end = pairs.get(match.end() - 1)
+        if body_end is not None:
+            yield match, match.end(), body_end
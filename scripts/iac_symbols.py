@@ -0,0 +1,276 @@
+"""
+Module-scoped symbol table for Terraform tag expressions
+Collects every locals entry and variable default across a module directory
+once, then resolves tag expressions (local.*, var.*, merge() and literal
+maps) lazily, memoizing each expression so resources sharing
+local.common_tags cost one evaluation per module. A BoundSymbolTable reuses
+a module's table with the variables one module call sets
+"""
+
+import re
+import hashlib
+import functools
+from pathlib import Path
+
+from iac_index import parse_file
+from iac_hcl import parse_body, decode_value, _expression_end, _split_items
+
+
+REFERENCE = re.compile(r'(local|var)\.([A-Za-z_][\w-]*)\Z')
+# local.name, local.map.key or var.name inside a string interpolation
+STRING_REFERENCE = re.compile(r'(local|var)\.([A-Za-z_][\w-]*)(?:\.([A-Za-z_][\w-]*))?\Z')
+INTERPOLATION = re.compile(r'\$\{([^{}]*)\}')
+MERGE_CALL = re.compile(r'merge\s*\(')
+TAGS_ATTRIBUTE = re.compile(r'^[ \t]*tags[ \t]*=(?!=)', re.MULTILINE)
+
+_tables = {}
+_fingerprints = {}
+
+
+class TagMap:
+    """
+    What is known about a tag map expression
+    known maps tag names to values (None when the value is computed);
+    certain holds the tags whose value nothing later can override; open means
+    other tags may be present, e.g. from a caller-supplied var.tags
+    """
+
+    __slots__ = ('known', 'certain', 'open')
+
+    def __init__(self, known=None, certain=frozenset(), open=False):
+        self.known = known or {}
+        self.certain = certain
+        self.open = open
+
+
+UNKNOWN = TagMap(open=True)
+
+
+def _literal_map(values):
+    known = {}
+    certain = set()
+    for key, value in values.items():
+        if isinstance(value, str) and '${' not in value:
+            known[key] = value
+            certain.add(key)
+        else:
+            known[key] = None
+    return TagMap(known, frozenset(certain))
+
+
+def _merge(maps):
+    """merge(): later maps win, so an open map makes earlier values uncertain"""
+    known = {}
+    certain = set()
+    is_open = False
+    for tag_map in maps:
+        if tag_map.open:
+            certain = set()
+            is_open = True
+        known.update(tag_map.known)
+        certain = (certain - set(tag_map.known)) | set(tag_map.certain)
+    return TagMap(known, frozenset(certain), is_open)
+
+
+class SymbolTable:
+    """locals and variable defaults of one module directory"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.locals = {}
+        self.variables = {}
+        self._resolved = {}
+        self._resolving = set()
+
+        for tf_file in sorted(directory.glob('*.tf')):
+            parsed = parse_file(tf_file, whole=True)
+            for start, end in parsed.locals:
+                for name, values in parse_body(parsed.content, start, end).items():
+                    self.locals[name] = values[0] if values else None
+            for name, (body_start, body_end) in parsed.variables.items():
+                default = parse_body(parsed.content, body_start, body_end).get('default')
+                self.variables[name] = default[0] if default else None
+
+    def resolve(self, value):
+        """Resolve a decoded tags value (map, or '${expression}') to a TagMap"""
+        if isinstance(value, dict):
+            return _literal_map(value)
+        if not isinstance(value, str) or not (value.startswith('${') and value.endswith('}')):
+            return UNKNOWN
+        return self.resolve_expression(value[2:-1].strip())
+
+    def resolve_expression(self, expression):
+        """Resolve a tags expression, memoized per module"""
+        tag_map = self._resolved.get(expression)
+        if tag_map is not None:
+            return tag_map
+        if expression in self._resolving:
+            return UNKNOWN  # Reference cycle
+
+        self._resolving.add(expression)
+        try:
+            tag_map = self._evaluate(expression)
+        finally:
+            self._resolving.discard(expression)
+        self._resolved[expression] = tag_map
+        return tag_map
+
+    def _evaluate(self, expression):
+        reference = REFERENCE.match(expression)
+        if reference:
+            kind, name = reference.groups()
+            if kind == 'local':
+                return self.resolve(self.locals.get(name)) if name in self.locals else UNKNOWN
+            return self._variable(name)
+
+        merge = MERGE_CALL.match(expression)
+        if merge and expression.endswith(')'):
+            arguments = _split_items(expression, merge.end(), len(expression) - 1)
+            return _merge([self.resolve(decode_value(expression[start:end])) for start, end in arguments])
+
+        if expression.startswith('{'):
+            return self.resolve(decode_value(expression))
+        return UNKNOWN
+
+    def _variable(self, name):
+        # Callers and tfvars can replace a variable's default entirely
+        default = self.variables.get(name)
+        if isinstance(default, dict):
+            return TagMap(_literal_map(default).known, open=True)
+        return UNKNOWN
+
+    def resolve_string(self, value):
+        """
+        Resolve a decoded string value (literal or template) to its text
+        Returns None when any interpolation depends on something unknown
+        """
+        if not isinstance(value, str):
+            return None
+        if '${' not in value:
+            return value
+        if value in self._resolving:
+            return None  # Reference cycle
+
+        self._resolving.add(value)
+        try:
+            parts = []
+            position = 0
+            for match in INTERPOLATION.finditer(value):
+                resolved = self._string_reference(match.group(1).strip())
+                if resolved is None:
+                    return None
+                parts.append(value[position:match.start()])
+                parts.append(resolved)
+                position = match.end()
+            parts.append(value[position:])
+        finally:
+            self._resolving.discard(value)
+        text = ''.join(parts)
+        return None if '${' in text else text
+
+    def _string_reference(self, expression):
+        reference = STRING_REFERENCE.match(expression)
+        if not reference:
+            return None
+        kind, name, key = reference.groups()
+        if kind == 'local':
+            value = self.locals.get(name)
+        else:
+            value = self._variable_value(name)
+        if key is not None:
+            value = value.get(key) if isinstance(value, dict) else None
+        return self.resolve_string(value)
+
+    def _variable_value(self, name):
+        # A module's own defaults are not final: callers and tfvars override them
+        return None
+
+
+class BoundSymbolTable(SymbolTable):
+    """
+    A module's symbol table as seen by one module call
+    Locals and defaults are shared with the module's table; variables the call
+    sets resolve in the caller's table, and the rest take their default
+    """
+
+    def __init__(self, module, caller, inputs):
+        self.directory = module.directory
+        self.locals = module.locals
+        self.variables = module.variables
+        self._resolved = {}
+        self._resolving = set()
+        self.caller = caller
+        self.inputs = inputs
+
+    def _variable(self, name):
+        if name in self.inputs:
+            return self.caller.resolve(self.inputs[name])
+        if name in self.variables:
+            return self.resolve(self.variables[name])
+        return UNKNOWN
+
+    def _variable_value(self, name):
+        if name in self.inputs:
+            value = self.inputs[name]
+            return self.caller.resolve_string(value) if isinstance(value, str) else value
+        return self.variables.get(name)
+
+
+@functools.lru_cache(maxsize=None)
+def _attribute_pattern(name):
+    return re.compile(rf'^[ \t]*{re.escape(name)}[ \t]*=(?!=)', re.MULTILINE)
+
+
+def attribute_value(parsed, resource, name):
+    """
+    Return the decoded value of a top-level attribute of a Terraform resource, or None
+    Only the attribute is decoded, not the whole body, so this stays cheap on
+    resources with large nested blocks or heredocs
+    """
+    pattern = TAGS_ATTRIBUTE if name == 'tags' else _attribute_pattern(name)
+    match = pattern.search(parsed.content, resource.body_start, resource.body_end)
+    if not match:
+        return None
+    value_end = _expression_end(parsed.content, match.end(), resource.body_end)
+    return decode_value(parsed.content[match.end():value_end])
+
+
+def tags_value(parsed, resource):
+    """Return the decoded tags attribute of a Terraform resource, or None"""
+    return attribute_value(parsed, resource, 'tags')
+
+
+def symbol_table(file_path):
+    """Return the symbol table of the module containing file_path, built once per run"""
+    return module_symbols(Path(file_path).resolve().parent)
+
+
+def module_symbols(directory):
+    """Return the symbol table of a module directory, built once per run"""
+    table = _tables.get(directory)
+    if table is None:
+        table = _tables[directory] = SymbolTable(directory)
+    return table
+
+
+def invalidate(directory):
+    """Forget the symbol table and fingerprint of a module directory"""
+    directory = Path(directory).resolve()
+    _tables.pop(directory, None)
+    _fingerprints.pop(directory, None)
+
+
+def module_fingerprint(file_path):
+    """Hash of every .tf file in the module, for cache keys of module-aware findings"""
+    return directory_fingerprint(Path(file_path).resolve().parent)
+
+
+def directory_fingerprint(directory):
+    """Hash of every .tf file in a module directory"""
+    fingerprint = _fingerprints.get(directory)
+    if fingerprint is None:
+        digest = hashlib.sha256()
+        for tf_file in sorted(directory.glob('*.tf')):
+            digest.update(tf_file.name.encode() + b'\0' + tf_file.read_bytes())
+        fingerprint = _fingerprints[directory] = digest.hexdigest()
+    return fingerprint
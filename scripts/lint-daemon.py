@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Lint daemon for the BidOne IaC validators
+Keeps the naming, tag and custom-check validators warm behind a Unix socket;
+check-naming.py, validate-tags.py and run-custom-checks.py use it when it is
+running and validate in-process otherwise
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+from iac_runner import load_validator
+from iac_discovery import DEFAULT_ROOTS
+from iac_daemon import default_socket_path, serve, stop_daemon
+
+
+# (validator script, the function of other files its cache keys cover, if any)
+VALIDATORS = [
+    ('check-naming', 'naming_dependencies'),
+    ('validate-tags', 'tag_dependencies'),
+    ('run-custom-checks', None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the IaC validators from a warm, persistent process')
+    parser.add_argument('roots', nargs='*', default=DEFAULT_ROOTS,
+                        help='Directories to index and watch (default: %(default)s)')
+    parser.add_argument('--socket', type=Path, default=default_socket_path(),
+                        help='Unix socket to listen on (default: %(default)s)')
+    parser.add_argument('--stop', action='store_true', help='Stop the daemon listening on --socket')
+    args = parser.parse_args()
+
+    if args.stop:
+        if stop_daemon(args.socket):
+            print(f"Stopped lint daemon on {args.socket}")
+            sys.exit(0)
+        print(f"No lint daemon listening on {args.socket}")
+        sys.exit(1)
+
+    checks = {}
+    for name, dependencies in VALIDATORS:
+        module = load_validator(name)
+        checks[name] = (module.check_file, module.RULESET_VERSION,
+                        getattr(module, dependencies) if dependencies else None)
+
+    try:
+        serve(checks, args.socket, args.roots)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
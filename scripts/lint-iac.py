@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Combined naming and tag validation for BidOne project
+Runs the check-naming.py and validate-tags.py rules over one stream of files
+in a single process, so each file is read and parsed once for both and a
+repository-wide run (e.g. git ls-files -z | lint-iac.py -0 --files-from -)
+starts one interpreter instead of one per validator and argv chunk
+"""
+
+import argparse
+import itertools
+
+from iac_runner import add_jobs_argument, load_validator, run_in_order
+from iac_cache import add_cache_arguments
+from iac_findings import add_format_argument
+from iac_baseline import add_baseline_arguments
+from iac_discovery import add_discovery_arguments
+from iac_environments import add_environment_arguments
+from iac_daemon import add_daemon_argument, run_via_daemon
+from iac_gitdiff import add_since_argument
+from iac_index import ReleasingCheck
+from iac_report import Report, select_files
+
+
+# (validator script, what it checks, its clean-file label, its summary label)
+VALIDATORS = [
+    ('check-naming', 'naming conventions', 'naming', 'naming convention'),
+    ('validate-tags', 'tags', 'tag', 'tag validation'),
+]
+
+
+class CombinedCheck:
+    """Run several per-file checks on each file in one call; picklable when they are"""
+
+    def __init__(self, checks):
+        self.checks = checks
+
+    def __call__(self, file_path):
+        return [check(file_path) for check in self.checks]
+
+
+def run_via_daemons(validators, files):
+    """
+    Yield (file_path, [issues per validator]) from a running lint daemon, or
+    return None, leaving files unconsumed, unless it answers for every validator
+    """
+    copies = itertools.tee(files, len(validators))
+    streams = []
+    for (name, *_), module, copy in zip(VALIDATORS, validators, copies):
+        results = run_via_daemon(name, module.RULESET_VERSION, copy, module.check_file)
+        if results is None:
+            for stream in streams:
+                stream.close()
+            return None
+        streams.append(results)
+    return ((answers[0][0], [issues for _, issues in answers]) for answers in zip(*streams))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate resource naming conventions and tags in one pass')
+    parser.add_argument('files', nargs='*',
+                        help='Files to validate (.tf, .bicep, or `terraform show -json` plan .json)')
+    add_jobs_argument(parser)
+    add_cache_arguments(parser)
+    add_since_argument(parser)
+    add_discovery_arguments(parser)
+    add_daemon_argument(parser)
+    add_format_argument(parser)
+    add_baseline_arguments(parser)
+    add_environment_arguments(parser)
+    args = parser.parse_args()
+
+    validators = [load_validator(name) for name, *_ in VALIDATORS]
+    rules = {}
+    for module in validators:
+        rules.update(module.RULES)
+    report = Report(args, 'lint-iac', rules, [(subject, label, summary) for _, subject, label, summary in VALIDATORS])
+
+    files_to_check, changes = select_files(parser, args)
+    checks = [module.build_check(args, changes) for module in validators]
+
+    results = None
+    if not (args.no_daemon or args.since or args.environments):
+        # A running lint daemon answers from its warm index
+        results = run_via_daemons(validators, files_to_check)
+    if results is None:
+        results = run_in_order(ReleasingCheck(CombinedCheck(checks)), files_to_check, args.jobs)
+
+    for file_path, answers in results:
+        for index, issues in enumerate(answers):
+            report.add(file_path, issues, index)
+
+    report.finish(checks, [
+        "\nRun check-naming.py or validate-tags.py alone for their guidelines",
+    ], "✓ All naming conventions and tag validations passed!")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Fast runner for the BidOne custom Checkov checks
+Evaluates the checks in .checkov/custom-checks/BidOneCustomChecks.py against
+our own parsed resources, without importing checkov; the full checkov scan
+still runs in CI
+"""
+
+from pathlib import Path
+import argparse
+
+from iac_runner import add_jobs_argument
+from iac_index import parse_file
+from iac_hcl import parse_body
+from iac_cache import add_cache_arguments, ruleset_version
+from iac_findings import finding_at, add_format_argument
+from iac_baseline import add_baseline_arguments
+from iac_discovery import add_discovery_arguments
+from iac_daemon import add_daemon_argument
+from iac_gitdiff import add_since_argument
+from iac_custom_checks import CUSTOM_CHECKS_FILE, CheckResult, load_custom_checks
+from iac_rules import RULES_FILE
+from iac_report import Report, run_checks, select_files, wrap_check
+
+
+CHECKS_BY_TYPE = load_custom_checks()
+
+# Rule ids reported in structured output: the custom checks' own ids
+RULES = {check.id: check.name for checks in CHECKS_BY_TYPE.values() for check in checks}
+
+RULESET_VERSION = ruleset_version(
+    __file__, CUSTOM_CHECKS_FILE, RULES_FILE,
+    Path(__file__).with_name('iac_rules.py'), Path(__file__).with_name('iac_hcl.py'),
+)
+
+
+def validate_custom_checks(file_path):
+    """Run the custom checks against every supported Terraform resource"""
+    issues = []
+    parsed = parse_file(file_path)
+
+    for resource in parsed.resources:
+        checks = CHECKS_BY_TYPE.get(resource.type)
+        if not checks:
+            continue
+
+        conf = parse_body(parsed.content, resource.body_start, resource.body_end)
+        for check in checks:
+            try:
+                result = check.scan_resource_conf(conf)
+            except Exception:
+                # Checkov reports a check that cannot evaluate a conf as unknown, not failed
+                continue
+            if result == CheckResult.FAILED:
+                issues.append(finding_at(parsed, resource.start, check.id,
+                                         "Resource '{}.{}' fails {}: {}", resource.type, resource.name, check.id, check.name))
+
+    return issues
+
+
+def check_file(file_path):
+    """Return the custom check issues for one file, or None if the file type is not validated"""
+    if file_path.suffix == '.tf':
+        return validate_custom_checks(file_path)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run BidOne custom Checkov checks without Checkov')
+    parser.add_argument('files', nargs='*', help='Files to validate')
+    add_jobs_argument(parser)
+    add_cache_arguments(parser)
+    add_since_argument(parser)
+    add_discovery_arguments(parser)
+    add_daemon_argument(parser)
+    add_format_argument(parser)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    report = Report(args, 'run-custom-checks', RULES, [('custom policies', 'custom policy', 'custom policy')])
+
+    files_to_check, changes = select_files(parser, args, suffixes=('.tf',))
+    check = wrap_check(check_file, 'run-custom-checks', RULESET_VERSION, args, changes)
+    results = run_checks('run-custom-checks', RULESET_VERSION, check, check_file, files_to_check, args,
+                         daemon=not args.since)
+    report.consume(results, check)
+
+    report.finish([check], [
+        "\nCustom policies are defined in .checkov/custom-checks/BidOneCustomChecks.py",
+        "- The full Checkov scan (checkov --config-file .checkov.yml) runs in CI",
+    ], "✓ All custom policy checks passed!")
+
+
+if __name__ == '__main__':
+    main()
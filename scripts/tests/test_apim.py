@@ -0,0 +1,217 @@
+"""
+Streaming APIM policy reader, scope model and validate-apim-policies.py runs
+"""
+
+import io
+import os
+import sys
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from iac_apim import PolicyReader, effective_sections, policy_scope, summarize_policy  # noqa: E402
+
+EXPRESSIONS = '''<policies>
+    <inbound>
+        <!-- @( in a comment is not an expression -->
+        <set-variable name="id" value="@(context.Request.Headers.GetValueOrDefault("X-Id", "<none>"))" />
+        <set-body><![CDATA[@{ not an expression }]]></set-body>
+        <choose>
+            <when condition="@{ var a = new [] { 1, 2 }; return a.Length > 1 && "a\\"b)" != "}"; }">
+                <rate-limit-by-key calls="10" renewal-period="60" counter-key="@(context.Subscription.Id)" />
+            </when>
+        </choose>
+    </inbound>
+    <backend>
+        <forward-request timeout="30" />
+    </backend>
+</policies>
+'''
+
+GLOBAL_POLICY = '''<policies>
+    <inbound>
+        <rate-limit-by-key calls="100" renewal-period="60" counter-key="@(context.Subscription.Id)" />
+    </inbound>
+    <backend>
+        <forward-request timeout="20" />
+    </backend>
+</policies>
+'''
+
+API_POLICY = '''<policies>
+    <inbound>
+        <base />
+        <cache-lookup vary-by-developer="false" vary-by-developer-groups="false" />
+    </inbound>
+    <backend>
+        <forward-request />
+    </backend>
+</policies>
+'''
+
+OPERATION_POLICY = '''<policies>
+    <inbound>
+        <base />
+    </inbound>
+    <backend>
+        <forward-request timeout="120" />
+    </backend>
+</policies>
+'''
+
+APIM_BICEP = '''resource ordersApi 'Microsoft.ApiManagement/service/apis@2023-05-01-preview' = {
+  parent: apim
+  name: 'orders'
+}
+
+resource ordersApiPolicy 'Microsoft.ApiManagement/service/apis/policies@2023-05-01-preview' = {
+  parent: ordersApi
+  name: 'policy'
+  properties: {
+    value: loadTextContent('policies/orders-policy.xml')
+  }
+}
+
+resource submitOrder 'Microsoft.ApiManagement/service/apis/operations@2023-05-01-preview' = {
+  parent: ordersApi
+  name: 'submit-order'
+}
+
+resource submitOrderPolicy 'Microsoft.ApiManagement/service/apis/operations/policies@2023-05-01-preview' = {
+  parent: submitOrder
+  name: 'policy'
+  properties: {
+    value: loadTextContent('policies/submit-policy.xml')
+  }
+}
+'''
+
+
+def run_script(directory, name, *args):
+    env = dict(os.environ, XDG_CACHE_HOME=str(directory / '.cache'), XDG_RUNTIME_DIR=str(directory / '.run'))
+    return subprocess.run([sys.executable, str(SCRIPTS_DIR / name), '--no-cache', *args],
+                          cwd=directory, env=env, capture_output=True, text=True)
+
+
+def translate(text, chunk_size):
+    reader = PolicyReader(io.StringIO(text))
+    reader.CHUNK_SIZE = chunk_size
+    return ''.join(iter(reader.read, ''))
+
+
+class PolicyReaderTest(unittest.TestCase):
+
+    def test_expressions_are_escaped(self):
+        translated = translate(EXPRESSIONS, PolicyReader.CHUNK_SIZE)
+
+        self.assertIn('GetValueOrDefault(&quot;X-Id&quot;, &quot;&lt;none&gt;&quot;))"', translated)
+        self.assertIn('a.Length &gt; 1 &amp;&amp; &quot;a\\&quot;b)&quot; != &quot;}&quot;; }"', translated)
+        # Comments and CDATA are passed through untouched
+        self.assertIn('<!-- @( in a comment is not an expression -->', translated)
+        self.assertIn('<![CDATA[@{ not an expression }]]>', translated)
+
+    def test_chunk_boundaries_do_not_change_the_output(self):
+        whole = translate(EXPRESSIONS, PolicyReader.CHUNK_SIZE)
+        for chunk_size in (1, 2, 3, 7, 9, 64):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(translate(EXPRESSIONS, chunk_size), whole)
+
+
+class PolicyModelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scratch = tempfile.TemporaryDirectory()
+        self.directory = Path(self.scratch.name).resolve()
+        self.policies = self.directory / 'policies'
+        self.policies.mkdir()
+        (self.directory / 'apim.bicep').write_text(APIM_BICEP)
+        (self.policies / 'global-policy.xml').write_text(GLOBAL_POLICY)
+        (self.policies / 'orders-policy.xml').write_text(API_POLICY)
+        (self.policies / 'submit-policy.xml').write_text(OPERATION_POLICY)
+
+    def tearDown(self):
+        self.scratch.cleanup()
+
+    def write(self, name, content):
+        path = self.policies / name
+        path.write_text(content)
+        return path
+
+    def test_summary_of_sections(self):
+        summary = summarize_policy(self.write('expressions.xml', EXPRESSIONS))
+
+        self.assertIsNone(summary.error)
+        self.assertEqual(summary.sections['inbound'].elements,
+                         {'set-variable', 'set-body', 'choose', 'when', 'rate-limit-by-key'})
+        self.assertFalse(summary.sections['inbound'].base)
+        self.assertEqual(summary.sections['backend'].timeouts, ['30'])
+
+    def test_documents_that_are_not_policies(self):
+        self.assertIsNone(summarize_policy(self.write('other.xml', '<configuration><inbound /></configuration>')))
+
+        broken = summarize_policy(self.write('broken.xml', '<policies>\n  <inbound>\n</policies>\n'))
+        self.assertIsNotNone(broken.error)
+        self.assertEqual(broken.error.position[0], 3)
+
+    def test_scopes_come_from_bicep(self):
+        api = policy_scope(self.policies / 'orders-policy.xml')
+        operation = policy_scope(self.policies / 'submit-policy.xml')
+
+        self.assertEqual((api.kind, api.name, api.address), ('api', 'orders', 'apim.bicep:ordersApiPolicy'))
+        self.assertEqual((operation.kind, operation.name, operation.api), ('operation', 'submit-order', 'orders'))
+        self.assertEqual(policy_scope(self.policies / 'global-policy.xml').kind, 'service')
+        self.assertEqual(policy_scope(self.write('unlinked.xml', API_POLICY)).label, "API 'unlinked'")
+
+    def test_base_pulls_in_the_enclosing_scopes(self):
+        sections = effective_sections([summarize_policy(self.policies / name) for name in
+                                       ('global-policy.xml', 'orders-policy.xml', 'submit-policy.xml')])
+
+        self.assertEqual(sections['inbound'].elements, {'rate-limit-by-key', 'cache-lookup'})
+        # The operation's backend has no <base />, so only its own forward-request applies
+        self.assertEqual(sections['backend'].timeouts, ['120'])
+
+
+class ValidateRunTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scratch = tempfile.TemporaryDirectory()
+        self.directory = Path(self.scratch.name)
+        self.policies = self.directory / 'infra' / 'bicep' / 'policies'
+        self.policies.mkdir(parents=True)
+        (self.policies.parent / 'apim.bicep').write_text(APIM_BICEP)
+        (self.policies / 'global-policy.xml').write_text(GLOBAL_POLICY)
+        (self.policies / 'orders-policy.xml').write_text(API_POLICY)
+        (self.policies / 'submit-policy.xml').write_text(OPERATION_POLICY)
+        (self.policies / 'broken-policy.xml').write_text('<policies>\n  <inbound>\n    <base>\n</policies>\n')
+
+    def tearDown(self):
+        self.scratch.cleanup()
+
+    def test_findings(self):
+        result = run_script(self.directory, 'validate-apim-policies.py')
+        output = result.stdout
+
+        self.assertEqual(result.returncode, 1, result.stdout + result.stderr)
+        self.assertIn("API 'orders' applies cache-lookup in inbound without cache-store in outbound", output)
+        self.assertIn("API 'orders' forwards requests without a timeout (gateway default 300s)", output)
+        self.assertIn("Operation 'submit-order' forward-request timeout 120s exceeds 60s", output)
+        # Inherited from the API's inbound through <base />
+        self.assertIn("Operation 'submit-order' applies cache-lookup in inbound without cache-store", output)
+        self.assertIn("Policy is not well-formed XML: mismatched tag: line 4", output)
+        self.assertNotIn("applies no rate-limit-by-key", output)
+
+    def test_streaming_matches_parallel_runs(self):
+        serial = run_script(self.directory, 'validate-apim-policies.py', '--format', 'jsonl')
+        parallel = run_script(self.directory, 'validate-apim-policies.py', '--format', 'jsonl', '-j', '4')
+
+        self.assertEqual(serial.returncode, 1, serial.stdout + serial.stderr)
+        self.assertEqual(len(serial.stdout.splitlines()), 5)
+        self.assertEqual(serial.stdout, parallel.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+Baseline fingerprints and --update-baseline / --baseline round trips
+"""
+
+import os
+import sys
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from iac_baseline import fingerprints  # noqa: E402
+from iac_findings import Finding  # noqa: E402
+
+MAIN_TF = '''resource "azurerm_storage_account" "Orders" {
+  location = "eastus"
+}
+
+resource "azurerm_key_vault" "main" {
+  location = "eastus"
+}
+'''
+
+
+def run_script(directory, name, *args):
+    env = dict(os.environ, XDG_CACHE_HOME=str(directory / '.cache'), XDG_RUNTIME_DIR=str(directory / '.run'))
+    return subprocess.run([sys.executable, str(SCRIPTS_DIR / name), '--no-cache', '--no-daemon', *args],
+                          cwd=directory, env=env, capture_output=True, text=True)
+
+
+def snake_case(name, line, address=None):
+    return Finding('terraform-snake-case', "Resource '{}' should use snake_case naming", line=line,
+                   address=address or f"azurerm_storage_account.{name}", args=[name])
+
+
+class FingerprintTest(unittest.TestCase):
+
+    def test_lines_and_formatting_do_not_count(self):
+        first, = fingerprints('main.tf', [snake_case('Orders', 1)])
+        moved, = fingerprints('main.tf', [snake_case('Orders', 40)])
+        self.assertEqual(first, moved)
+
+        other, = fingerprints('main.tf', [snake_case('Payments', 1)])
+        self.assertNotEqual(first, other)
+        elsewhere, = fingerprints('other.tf', [snake_case('Orders', 1)])
+        self.assertNotEqual(first, elsewhere)
+
+    def test_round_trip_keeps_the_fingerprint(self):
+        finding = snake_case('Orders', 1)
+        restored = Finding.from_dict(finding.to_dict())
+
+        self.assertEqual(list(fingerprints('main.tf', [finding])), list(fingerprints('main.tf', [restored])))
+
+    def test_repeats_are_numbered_per_finding(self):
+        single = list(fingerprints('main.tf', [snake_case('Orders', 1)]))
+        repeated = list(fingerprints('main.tf', [snake_case('Orders', 1), snake_case('Orders', 9)]))
+
+        self.assertEqual(repeated[0], single[0])
+        self.assertNotEqual(repeated[0], repeated[1])
+
+        # Other findings before it (e.g. ones --since leaves out) do not shift the numbering
+        interleaved = list(fingerprints('main.tf', [snake_case('Payments', 1), snake_case('Orders', 5)]))
+        self.assertEqual(interleaved[1], single[0])
+
+
+class BaselineRunTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scratch = tempfile.TemporaryDirectory()
+        self.directory = Path(self.scratch.name)
+        self.main_tf = self.directory / 'main.tf'
+        self.main_tf.write_text(MAIN_TF)
+        self.baseline = self.directory / '.iac-baseline'
+
+    def tearDown(self):
+        self.scratch.cleanup()
+
+    def check(self):
+        return run_script(self.directory, 'check-naming.py', '--baseline', str(self.baseline), 'main.tf')
+
+    def test_recorded_findings_are_suppressed(self):
+        result = run_script(self.directory, 'check-naming.py', '--baseline', str(self.baseline),
+                            '--update-baseline', 'main.tf')
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertEqual(len(self.baseline.read_text().splitlines()), 4)
+
+        result = self.check()
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn("2 findings accepted in", result.stdout)
+
+        # Moving the resources does not change what was accepted
+        self.main_tf.write_text('\n\n# Storage\n' + MAIN_TF)
+        result = self.check()
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+
+    def test_only_new_findings_are_reported(self):
+        run_script(self.directory, 'check-naming.py', '--baseline', str(self.baseline), '--update-baseline', 'main.tf')
+        self.main_tf.write_text(MAIN_TF + '\nresource "azurerm_redis_cache" "Sessions" {\n  location = "eastus"\n}\n')
+
+        result = self.check()
+
+        self.assertEqual(result.returncode, 1, result.stdout + result.stderr)
+        self.assertIn("Resource 'Sessions' should use snake_case naming", result.stdout)
+        self.assertNotIn("Resource 'Orders'", result.stdout)
+        self.assertIn("2 findings accepted in", result.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+"""
+Result cache hits and invalidation when a module's or its callers' files change
+"""
+
+import os
+import sys
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import iac_index  # noqa: E402
+import iac_modules  # noqa: E402
+import iac_symbols  # noqa: E402
+from iac_cache import CachedCheck  # noqa: E402
+from iac_findings import Finding  # noqa: E402
+from iac_modules import instance_fingerprint  # noqa: E402
+
+ROOT_TF = '''module "orders" {
+  source = "./modules/orders"
+  tags = {
+    Environment = "dev"
+  }
+}
+'''
+
+MODULE_TF = '''resource "azurerm_storage_account" "orders" {
+  tags = merge(local.tags, var.tags)
+}
+'''
+
+LOCALS_TF = '''locals {
+  tags = {
+    Project = "BidOne-Integration-Demo"
+  }
+}
+
+variable "tags" {
+  type = map(string)
+}
+'''
+
+
+def run_script(directory, name, *args):
+    env = dict(os.environ, XDG_CACHE_HOME=str(directory / '.cache'), XDG_RUNTIME_DIR=str(directory / '.run'))
+    return subprocess.run([sys.executable, str(SCRIPTS_DIR / name), '--no-daemon', *args],
+                          cwd=directory, env=env, capture_output=True, text=True)
+
+
+class CountingCheck:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, file_path):
+        self.calls += 1
+        return [Finding('test-rule', "Checked {}", args=[file_path.name])]
+
+
+class CachedCheckTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scratch = tempfile.TemporaryDirectory()
+        self.directory = Path(self.scratch.name).resolve()
+        self.root = self.directory / 'infra' / 'terraform'
+        self.module = self.root / 'modules' / 'orders'
+        self.module.mkdir(parents=True)
+        (self.root / 'main.tf').write_text(ROOT_TF)
+        (self.module / 'main.tf').write_text(MODULE_TF)
+        (self.module / 'locals.tf').write_text(LOCALS_TF)
+        self.other = self.root / 'modules' / 'other'
+        self.other.mkdir()
+        (self.other / 'main.tf').write_text('locals {}\n')
+
+        self.check = CountingCheck()
+        self.cached = CachedCheck(self.check, 'test', 'v1', self.directory / 'cache', instance_fingerprint)
+
+    def tearDown(self):
+        self.cached.cache.close()
+        self.scratch.cleanup()
+
+    def run_check(self):
+        """Check the module's main.tf as a new run would, without this process's memos"""
+        iac_modules.invalidate()
+        for directory in (self.root, self.module):
+            iac_symbols.invalidate(directory)
+            for tf_file in directory.glob('*.tf'):
+                iac_index.forget(tf_file)
+        return self.cached(self.module / 'main.tf')
+
+    def edit(self, path, old, new):
+        path.write_text(path.read_text().replace(old, new))
+
+    def test_unchanged_files_are_served_from_the_cache(self):
+        first = self.run_check()
+        second = self.run_check()
+
+        self.assertEqual(self.check.calls, 1)
+        self.assertEqual([finding.key for finding in first], [finding.key for finding in second])
+
+    def test_modules_off_the_call_path_keep_the_entry(self):
+        self.run_check()
+        (self.other / 'main.tf').write_text('locals {\n  other = 1\n}\n')
+        self.run_check()
+
+        self.assertEqual(self.check.calls, 1)
+
+    def test_locals_change_invalidates(self):
+        self.run_check()
+        self.edit(self.module / 'locals.tf', 'BidOne-Integration-Demo', 'Other')
+        self.run_check()
+
+        self.assertEqual(self.check.calls, 2)
+
+    def test_caller_change_invalidates(self):
+        self.run_check()
+        self.edit(self.root / 'main.tf', '"dev"', '"prod"')
+        self.run_check()
+
+        self.assertEqual(self.check.calls, 2)
+
+    def test_ruleset_version_change_invalidates(self):
+        self.run_check()
+        self.cached = CachedCheck(self.check, 'test', 'v2', self.directory / 'cache', instance_fingerprint)
+        self.run_check()
+
+        self.assertEqual(self.check.calls, 2)
+
+
+class CachedRunTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scratch = tempfile.TemporaryDirectory()
+        self.directory = Path(self.scratch.name)
+        self.root = self.directory / 'infra' / 'terraform'
+        self.module = self.root / 'modules' / 'orders'
+        self.module.mkdir(parents=True)
+        (self.root / 'main.tf').write_text(ROOT_TF)
+        (self.module / 'main.tf').write_text(MODULE_TF)
+        (self.module / 'locals.tf').write_text(LOCALS_TF)
+
+    def tearDown(self):
+        self.scratch.cleanup()
+
+    def test_findings_follow_caller_inputs_across_cached_runs(self):
+        module_tf = str(self.module / 'main.tf')
+        result = run_script(self.directory, 'validate-tags.py', module_tf)
+        self.assertIn("module.orders.azurerm_storage_account.orders' is missing required tag: ManagedBy",
+                      result.stdout)
+        self.assertNotIn("missing required tag: Environment", result.stdout)
+
+        # Only the caller changes; the module's own files are what the cache saw before
+        root_tf = self.root / 'main.tf'
+        root_tf.write_text(ROOT_TF.replace('Environment = "dev"', 'ManagedBy = "Terraform"'))
+        result = run_script(self.directory, 'validate-tags.py', module_tf)
+
+        self.assertIn("missing required tag: Environment", result.stdout)
+        self.assertNotIn("missing required tag: ManagedBy", result.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
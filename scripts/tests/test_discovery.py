@@ -0,0 +1,116 @@
+"""
+File discovery: .gitignore negation and anchoring in the scandir walker
+"""
+
+import os
+import sys
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from iac_discovery import iter_files  # noqa: E402
+
+TREE = [
+    'main.tf',
+    'generated.tf',
+    'keep.tf',
+    'skip.tf',
+    'docs/gen.tf',
+    'docs/readme.tf',
+    'nested/generated.tf',
+    'nested/docs/gen.tf',
+    'nested/build/out.tf',
+    'nested/cache/deep/state.tf',
+    'nested/local/override.tf',
+    'nested/local/shared.tf',
+    'vendor/module.tf',
+    'vendor/patched.tf',
+    '.terraform/modules/cached.tf',
+    'app.bicep',
+    'app.test.bicep',
+]
+
+ROOT_GITIGNORE = '''*.tf
+!main.tf
+!keep.tf
+!docs/*.tf
+!nested/**/*.tf
+# Anchored by a slash: only this directory's generated.tf and docs/gen.tf
+/generated.tf
+docs/gen.tf
+# Unanchored: at any depth
+build/
+**/cache
+*.test.bicep
+# A file cannot be re-included below an excluded directory
+vendor/
+!vendor/patched.tf
+'''
+
+NESTED_GITIGNORE = '''local/*
+!local/shared.tf
+'''
+
+
+class DiscoveryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scratch = tempfile.TemporaryDirectory()
+        self.directory = Path(self.scratch.name).resolve()
+        self.root = self.directory / 'infra'
+        for name in TREE:
+            path = self.root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text('')
+        (self.root / '.gitignore').write_text(ROOT_GITIGNORE)
+        (self.root / 'nested' / '.gitignore').write_text(NESTED_GITIGNORE)
+        subprocess.run(['git', 'init', '-q'], cwd=self.directory, check=True)
+        self.cwd = os.getcwd()
+        os.chdir(self.directory)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.scratch.cleanup()
+
+    def discovered(self, root='infra', excludes=()):
+        return sorted(path.relative_to(root).as_posix() for path in iter_files([root], excludes=excludes))
+
+    def test_negation_and_anchoring(self):
+        self.assertEqual(self.discovered(), [
+            'app.bicep',
+            'docs/readme.tf',
+            'keep.tf',
+            'main.tf',
+            'nested/docs/gen.tf',
+            'nested/generated.tf',
+            'nested/local/shared.tf',
+        ])
+
+    def test_matches_git(self):
+        listed = subprocess.run(['git', 'ls-files', '--others', '--exclude-standard', '--', 'infra'],
+                                capture_output=True, text=True, check=True).stdout.split()
+        # git knows nothing of the validators' own excludes (.terraform/)
+        expected = sorted(Path(name).relative_to('infra').as_posix() for name in listed
+                          if name.endswith(('.tf', '.bicep')) and '/.terraform/' not in name)
+
+        self.assertEqual(self.discovered(), expected)
+
+    def test_gitignore_above_the_root_applies(self):
+        (self.directory / '.gitignore').write_text('infra/nested/docs/\n')
+
+        self.assertEqual(self.discovered('infra/nested'), ['generated.tf', 'local/shared.tf'])
+
+    def test_excludes_are_relative_to_the_current_directory(self):
+        discovered = self.discovered(excludes=['/infra/docs/', '*.bicep'])
+
+        self.assertNotIn('docs/readme.tf', discovered)
+        self.assertNotIn('app.bicep', discovered)
+        self.assertIn('nested/docs/gen.tf', discovered)
+
+
+if __name__ == '__main__':
+    unittest.main()
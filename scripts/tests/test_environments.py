@@ -0,0 +1,124 @@
+"""
+tfvars environments: template rendering and --environments runs
+"""
+
+import os
+import sys
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from iac_environments import UNKNOWN_SEGMENT, compile_template, load_environments  # noqa: E402
+
+MAIN_TF = '''variable "environment" {
+  type    = string
+  default = "dev"
+}
+
+variable "tool" {
+  type    = string
+  default = "Terraform"
+}
+
+resource "azurerm_mssql_server" "orders" {
+  server_name = "bidone-sql-${var.environment}-01"
+  tags = {
+    Environment = var.environment
+    Project     = "BidOne-Integration-Demo"
+    ManagedBy   = "${var.tool}"
+  }
+}
+'''
+
+
+def run_script(directory, name, *args):
+    env = dict(os.environ, XDG_CACHE_HOME=str(directory / '.cache'), XDG_RUNTIME_DIR=str(directory / '.run'))
+    return subprocess.run([sys.executable, str(SCRIPTS_DIR / name), '--no-cache', '--no-daemon', *args],
+                          cwd=directory, env=env, capture_output=True, text=True)
+
+
+class TemplateTest(unittest.TestCase):
+
+    def test_references_are_substituted(self):
+        template = compile_template('bidone-${var.service}-${ var.environment }-01')
+
+        self.assertEqual(template.render({'var.service': 'sql', 'var.environment': 'prod'}),
+                         ('bidone-sql-prod-01', 'bidone-sql-prod-01'))
+
+    def test_unresolved_references_stay_visible(self):
+        template = compile_template('bidone-sql-${var.environment}-${local.suffix}')
+
+        value, display = template.render({'var.environment': 'prod'})
+
+        self.assertEqual(value, f'bidone-sql-prod-{UNKNOWN_SEGMENT}')
+        self.assertEqual(display, 'bidone-sql-prod-${local.suffix}')
+
+    def test_nothing_known_renders_none(self):
+        self.assertIsNone(compile_template('${var.name}').render({}))
+        self.assertEqual(compile_template('${var.enabled}').render({'var.enabled': True}), ('true', 'true'))
+
+    def test_templates_are_compiled_once(self):
+        self.assertIs(compile_template('${var.a}-x'), compile_template('${var.a}-x'))
+
+
+class EnvironmentsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scratch = tempfile.TemporaryDirectory()
+        self.directory = Path(self.scratch.name)
+        self.root = self.directory / 'terraform'
+        self.environments = self.root / 'environments'
+        self.environments.mkdir(parents=True)
+        (self.root / 'main.tf').write_text(MAIN_TF)
+        (self.environments / 'prod.tfvars').write_text('environment = "prod"\n')
+        (self.environments / 'staging.tfvars').write_text('environment = "Staging_1"\ntool = "Pulumi"\n')
+
+    def tearDown(self):
+        self.scratch.cleanup()
+
+    def test_tfvars_are_merged_over_defaults(self):
+        environments = load_environments(self.environments)
+
+        self.assertEqual([environment.name for environment in environments.environments], ['prod', 'staging'])
+        prod, staging = environments.environments
+        self.assertEqual(prod.values, {'var.environment': 'prod', 'var.tool': 'Terraform'})
+        self.assertEqual(staging.values, {'var.environment': 'Staging_1', 'var.tool': 'Pulumi'})
+
+    def test_only_root_module_files_take_tfvars(self):
+        environments = load_environments(self.environments)
+        module = self.root / 'modules' / 'sql' / 'main.tf'
+
+        self.assertEqual(len(environments.for_file(self.root / 'main.tf')), 2)
+        self.assertEqual(environments.for_file(module), [])
+
+    def test_findings_name_the_environment(self):
+        for name in ('check-naming.py', 'validate-tags.py', 'lint-iac.py'):
+            with self.subTest(name=name):
+                result = run_script(self.directory, name, '--environments', 'terraform/environments',
+                                    'terraform/main.tf')
+
+                self.assertEqual(result.returncode, 1, result.stdout + result.stderr)
+                self.assertNotIn("[prod]", result.stdout)
+                if name != 'validate-tags.py':
+                    self.assertIn("[staging] Resource name 'bidone-sql-Staging_1-01' (server_name)", result.stdout)
+                if name != 'check-naming.py':
+                    self.assertIn("[staging] Resource 'azurerm_mssql_server.orders' has incorrect ManagedBy "
+                                  "tag value 'Pulumi'", result.stdout)
+
+    def test_directory_without_tfvars_is_an_error(self):
+        (self.directory / 'empty').mkdir()
+        for directory, message in (('empty', 'no *.tfvars files in empty'), ('missing', 'no such directory: missing')):
+            for name in ('check-naming.py', 'validate-tags.py', 'lint-iac.py'):
+                with self.subTest(name=name, directory=directory):
+                    result = run_script(self.directory, name, '--environments', directory, 'terraform/main.tf')
+
+                    self.assertEqual(result.returncode, 2, result.stdout + result.stderr)
+                    self.assertIn(f"argument --environments: {message}", result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+"""
+History audit: git log --raw and git cat-file --batch parsing, and finding spans
+"""
+
+import os
+import sys
+import json
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from iac_history import BlobReader, HistoryAudit, HistoryError, iter_commits, tree_blobs  # noqa: E402
+from iac_runner import load_validator  # noqa: E402
+
+GOOD_TF = 'resource "azurerm_storage_account" "orders" {\n  location = "eastus"\n}\n'
+BAD_TF = GOOD_TF + '\nresource "azurerm_key_vault" "BadName" {\n  location = "eastus"\n}\n'
+ODD_NAME = 'infra/terraform/odd nameé.tf'
+
+
+def git(repository, *args):
+    return subprocess.run(['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args],
+                          cwd=repository, check=True, capture_output=True, text=True).stdout
+
+
+def run_script(repository, name, *args):
+    env = dict(os.environ, XDG_CACHE_HOME=str(repository / '.cache'), XDG_RUNTIME_DIR=str(repository / '.run'))
+    return subprocess.run([sys.executable, str(SCRIPTS_DIR / name), *args],
+                          cwd=repository, env=env, capture_output=True, text=True)
+
+
+class HistoryTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.scratch = tempfile.TemporaryDirectory()
+        cls.repository = repository = Path(cls.scratch.name)
+        main_tf = repository / 'infra' / 'terraform' / 'main.tf'
+        main_tf.parent.mkdir(parents=True)
+        git(repository, 'init', '-q', '-b', 'main')
+
+        main_tf.write_text(GOOD_TF)
+        (repository / 'README.md').write_text('outside the audited roots\n')
+        git(repository, 'add', '.')
+        git(repository, 'commit', '-q', '-m', 'initial')
+
+        main_tf.write_text(BAD_TF)
+        git(repository, 'commit', '-q', '-am', 'introduce')
+
+        (repository / ODD_NAME).write_text(GOOD_TF)
+        git(repository, 'add', '.')
+        git(repository, 'commit', '-q', '-m', 'odd name')
+
+        git(repository, 'checkout', '-q', '-b', 'side')
+        (repository / 'infra' / 'terraform' / 'side.tf').write_text(GOOD_TF)
+        git(repository, 'add', '.')
+        git(repository, 'commit', '-q', '-m', 'side')
+        git(repository, 'checkout', '-q', 'main')
+        main_tf.write_text(GOOD_TF)
+        git(repository, 'commit', '-q', '-am', 'fix')
+        git(repository, 'merge', '-q', '--no-ff', '-m', 'merge side', 'side')
+
+        git(repository, 'rm', '-q', ODD_NAME)
+        git(repository, 'commit', '-q', '-m', 'delete')
+
+        cls.shas = git(repository, 'log', '--first-parent', '--reverse', '--format=%H').split()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.scratch.cleanup()
+
+    def test_commits_and_their_changes(self):
+        commits = list(iter_commits(['HEAD'], ['infra/terraform'], cwd=self.repository))
+
+        self.assertEqual([commit.sha for commit in commits], self.shas)
+        self.assertEqual([commit.index for commit in commits], list(range(6)))
+        self.assertEqual([sorted(commit.changes) for commit in commits], [
+            ['infra/terraform/main.tf'],
+            ['infra/terraform/main.tf'],
+            [ODD_NAME],
+            ['infra/terraform/main.tf'],
+            # The merge, against its first parent
+            ['infra/terraform/side.tf'],
+            [ODD_NAME],
+        ])
+        self.assertIsNone(commits[5].changes[ODD_NAME])
+        self.assertEqual(commits[1].changes['infra/terraform/main.tf'],
+                         git(self.repository, 'rev-parse', f'{self.shas[1]}:infra/terraform/main.tf').strip())
+
+    def test_ranges_and_roots(self):
+        commits = list(iter_commits([f'{self.shas[1]}..HEAD'], ['infra/terraform'], cwd=self.repository))
+        self.assertEqual([commit.sha for commit in commits], self.shas[2:])
+
+        commits = list(iter_commits(['HEAD'], ['infra/bicep'], cwd=self.repository))
+        self.assertTrue(all(not commit.changes for commit in commits))
+
+        with self.assertRaises(HistoryError):
+            list(iter_commits(['no-such-ref'], ['infra'], cwd=self.repository))
+
+    def test_tree_blobs(self):
+        blobs = tree_blobs(self.shas[2], ['infra/terraform'], cwd=self.repository)
+
+        self.assertEqual(sorted(blobs), ['infra/terraform/main.tf', ODD_NAME])
+
+    def test_blob_reader(self):
+        content = b'line\n\0binary\r\n' * 100
+        blob = subprocess.run(['git', 'hash-object', '-w', '--stdin'], cwd=self.repository, input=content,
+                              capture_output=True, check=True).stdout.decode().strip()
+        empty = subprocess.run(['git', 'hash-object', '-w', '--stdin'], cwd=self.repository, input=b'',
+                               capture_output=True, check=True).stdout.decode().strip()
+
+        with BlobReader(self.repository) as blobs:
+            self.assertEqual(blobs.read(blob), content)
+            self.assertEqual(blobs.read(empty), b'')
+            # Reads after one another stay in step with the stream
+            self.assertEqual(blobs.read(blob), content)
+            self.assertEqual(blobs.reads, 3)
+            with self.assertRaises(HistoryError):
+                blobs.read('0' * 40)
+
+    def test_finding_spans(self):
+        checks = {'check-naming': load_validator('check-naming').check_file}
+        audit = HistoryAudit(checks, ['infra/terraform'], toplevel=self.repository)
+
+        spans = audit.run(['HEAD'])
+
+        self.assertEqual(len(spans), 1)
+        span, = spans
+        self.assertEqual(span.path, 'infra/terraform/main.tf')
+        self.assertEqual(str(span.finding), "Resource 'BadName' should use snake_case naming")
+        self.assertEqual((span.introduced.sha, span.last.sha, span.fixed.sha), tuple(self.shas[1:4]))
+        self.assertEqual(span.commits, 2)
+        self.assertEqual(audit.commit_count, 6)
+
+        # Each file version, in its module's context, is validated once
+        validated = len(audit.results)
+        self.assertEqual([str(span.finding) for span in audit.run(['HEAD'])], [str(span.finding)])
+        self.assertEqual(len(audit.results), validated)
+        self.assertEqual(audit.blob_reads, 0)
+
+    def test_audit_history_jsonl(self):
+        result = run_script(self.repository, 'audit-history.py', '--format', 'jsonl',
+                            '--root', 'infra/terraform', '--validator', 'check-naming')
+
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        record, = [json.loads(line) for line in result.stdout.splitlines()]
+        self.assertEqual(record['rule'], 'terraform-snake-case')
+        self.assertEqual(record['introduced'], self.shas[1])
+        self.assertEqual(record['fixed'], self.shas[3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+Validator runs against `terraform show -json` plan files
+"""
+
+import os
+import sys
+import json
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+
+PLAN = {
+    'format_version': '1.2',
+    'resource_changes': [{
+        'address': 'azurerm_storage_account.orders',
+        'mode': 'managed',
+        'type': 'azurerm_storage_account',
+        'change': {'after': {'name': 'Orders-Storage', 'tags': {'Project': 'BidOne-Integration-Demo'}}},
+    }],
+}
+
+
+def run_script(directory, name, *args):
+    env = dict(os.environ, XDG_CACHE_HOME=str(directory / '.cache'), XDG_RUNTIME_DIR=str(directory / '.run'))
+    return subprocess.run([sys.executable, str(SCRIPTS_DIR / name), '--no-cache', '--no-daemon', *args],
+                          cwd=directory, env=env, capture_output=True, text=True)
+
+
+class PlanTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scratch = tempfile.TemporaryDirectory()
+        self.directory = Path(self.scratch.name)
+        self.plan = self.directory / 'plan.json'
+        self.plan.write_text(json.dumps(PLAN))
+
+    def tearDown(self):
+        self.scratch.cleanup()
+
+    def test_files_that_are_not_plans_are_reported_and_skipped(self):
+        (self.directory / 'array.json').write_text('[1, 2]')
+        (self.directory / 'truncated.json').write_text(json.dumps(PLAN)[:-20])
+
+        for name in ('validate-tags.py', 'check-naming.py'):
+            result = run_script(self.directory, name, 'array.json', 'truncated.json', 'plan.json')
+
+            self.assertEqual(result.returncode, 1, result.stdout + result.stderr)
+            self.assertEqual(result.stdout.count("Plan is not `terraform show -json` output"), 2)
+            self.assertIn("Resource 'azurerm_storage_account.orders'", result.stdout)
+
+    def test_byte_order_mark_is_accepted(self):
+        self.plan.write_text(json.dumps(PLAN), encoding='utf-8-sig')
+
+        result = run_script(self.directory, 'validate-tags.py', 'plan.json')
+
+        self.assertEqual(result.returncode, 1, result.stdout + result.stderr)
+        self.assertIn("is missing required tag: Environment", result.stdout)
+        self.assertNotIn("Plan is not", result.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
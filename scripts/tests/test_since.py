@@ -0,0 +1,110 @@
+"""
+--since runs of the validators against a scratch git repository
+"""
+
+import os
+import sys
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+
+MAIN_TF = '''locals {
+  common_tags = {
+    Project = "BidOne-Integration-Demo"
+  }
+}
+
+resource "azurerm_storage_account" "orders" {
+  location = "eastus"
+  tags     = local.common_tags
+}
+'''
+
+
+def git(repository, *args):
+    subprocess.run(['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args],
+                   cwd=repository, check=True, capture_output=True)
+
+
+def run_script(repository, name, *args):
+    env = dict(os.environ, XDG_CACHE_HOME=str(repository / '.cache'), XDG_RUNTIME_DIR=str(repository / '.run'))
+    return subprocess.run([sys.executable, str(SCRIPTS_DIR / name), '--no-cache', '--no-daemon', *args],
+                          cwd=repository, env=env, capture_output=True, text=True)
+
+
+class SinceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scratch = tempfile.TemporaryDirectory()
+        self.repository = Path(self.scratch.name)
+        self.main_tf = self.repository / 'infra' / 'terraform' / 'main.tf'
+        self.main_tf.parent.mkdir(parents=True)
+        self.main_tf.write_text(MAIN_TF)
+        git(self.repository, 'init', '-q')
+        git(self.repository, 'add', '.')
+        git(self.repository, 'commit', '-q', '-m', 'initial')
+
+    def tearDown(self):
+        self.scratch.cleanup()
+
+    def test_locals_outside_the_diff_still_resolve(self):
+        # Only the resource changes; the local its tags come from does not
+        self.main_tf.write_text(MAIN_TF.replace('"eastus"', '"westeurope"'))
+
+        result = run_script(self.repository, 'validate-tags.py', '--since', 'HEAD')
+
+        self.assertEqual(result.returncode, 1, result.stdout + result.stderr)
+        self.assertIn("is missing required tag: Environment", result.stdout)
+        self.assertIn("is missing required tag: ManagedBy", result.stdout)
+
+    def test_unchanged_resources_are_not_reported(self):
+        self.main_tf.write_text(MAIN_TF + '\n# comment\n')
+
+        result = run_script(self.repository, 'validate-tags.py', '--since', 'HEAD')
+
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+
+    def test_untracked_files_are_checked(self):
+        new_tf = self.main_tf.with_name('storage.tf')
+        new_tf.write_text('resource "azurerm_storage_account" "BadName" {\n  location = "eastus"\n}\n')
+
+        result = run_script(self.repository, 'check-naming.py', '--since', 'HEAD')
+
+        self.assertEqual(result.returncode, 1, result.stdout + result.stderr)
+        self.assertIn("Resource 'BadName' should use snake_case naming", result.stdout)
+
+    def test_paths_are_read_whatever_the_diff_config(self):
+        git(self.repository, 'config', 'diff.mnemonicPrefix', 'true')
+        git(self.repository, 'config', 'core.quotePath', 'true')
+        for name in ('storage accounts é.tf', 'quoted "name".tf'):
+            with self.subTest(name=name):
+                tf = self.main_tf.with_name(name)
+                tf.write_text('resource "azurerm_storage_account" "orders" {\n  location = "eastus"\n}\n')
+                git(self.repository, 'add', '.')
+                git(self.repository, 'commit', '-q', '-m', name)
+                tf.write_text(tf.read_text().replace('"orders"', '"BadName"'))
+
+                result = run_script(self.repository, 'check-naming.py', '--since', 'HEAD')
+
+                self.assertEqual(result.returncode, 1, result.stdout + result.stderr)
+                self.assertIn(f"Issues found in infra/terraform/{name}", result.stdout)
+                tf.unlink()
+
+    def test_added_lines_that_look_like_file_headers(self):
+        self.main_tf.write_text(MAIN_TF + 'resource "azurerm_storage_account" "audit" {\n  location = "eastus"\n}\n')
+        git(self.repository, 'commit', '-q', '-am', 'audit')
+        # With --unified=0 the added "++ notes" line reads "+++ notes" in the diff
+        changed = MAIN_TF.replace('  location = "eastus"\n', '  location = "eastus"\n  description = <<EOT\n++ notes\nEOT\n')
+        self.main_tf.write_text(changed + 'resource "azurerm_storage_account" "Audit" {\n  location = "eastus"\n}\n')
+
+        result = run_script(self.repository, 'check-naming.py', '--since', 'HEAD')
+
+        self.assertEqual(result.returncode, 1, result.stdout + result.stderr)
+        self.assertIn("Resource 'Audit' should use snake_case naming", result.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+"""
+Module symbol tables: locals, variable defaults, merge() and module call inputs
+"""
+
+import os
+import sys
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from iac_symbols import BoundSymbolTable, SymbolTable  # noqa: E402
+
+LOCALS_TF = '''locals {
+  project = "BidOne-Integration-Demo"
+  common_tags = {
+    Project   = local.project
+    ManagedBy = "Terraform"
+  }
+  service_tags = merge(local.common_tags, {
+    Environment = var.environment
+    Service     = "orders"
+  })
+  open_tags = merge(var.tags, local.common_tags)
+  overridden_tags = merge(local.common_tags, var.tags)
+  loop        = local.loop
+  storage     = "${local.project}-${var.environment}-st"
+}
+'''
+
+VARIABLES_TF = '''variable "environment" {
+  type = string
+}
+
+variable "tags" {
+  type = map(string)
+  default = {
+    Owner = "platform"
+  }
+}
+'''
+
+
+def run_script(directory, name, *args):
+    env = dict(os.environ, XDG_CACHE_HOME=str(directory / '.cache'), XDG_RUNTIME_DIR=str(directory / '.run'))
+    return subprocess.run([sys.executable, str(SCRIPTS_DIR / name), '--no-cache', '--no-daemon', *args],
+                          cwd=directory, env=env, capture_output=True, text=True)
+
+
+class SymbolTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scratch = tempfile.TemporaryDirectory()
+        self.directory = Path(self.scratch.name).resolve()
+        (self.directory / 'locals.tf').write_text(LOCALS_TF)
+        (self.directory / 'variables.tf').write_text(VARIABLES_TF)
+        self.table = SymbolTable(self.directory)
+
+    def tearDown(self):
+        self.scratch.cleanup()
+
+    def test_locals_and_defaults_are_collected_across_files(self):
+        self.assertEqual(self.table.locals['project'], 'BidOne-Integration-Demo')
+        self.assertEqual(self.table.variables, {'environment': None, 'tags': {'Owner': 'platform'}})
+
+    def test_merge_keeps_literal_values_certain(self):
+        tags = self.table.resolve_expression('local.service_tags')
+
+        self.assertEqual(tags.known, {'Project': None, 'ManagedBy': 'Terraform', 'Environment': None,
+                                      'Service': 'orders'})
+        self.assertEqual(tags.certain, {'ManagedBy', 'Service'})
+        self.assertFalse(tags.open)
+
+    def test_open_map_in_merge_makes_earlier_values_uncertain(self):
+        # A caller or tfvars can replace var.tags, so only what follows it is certain
+        later = self.table.resolve_expression('local.open_tags')
+        self.assertTrue(later.open)
+        self.assertEqual(later.certain, {'ManagedBy'})
+        self.assertEqual(later.known['Owner'], 'platform')
+
+        earlier = self.table.resolve_expression('local.overridden_tags')
+        self.assertTrue(earlier.open)
+        self.assertEqual(earlier.certain, set())
+
+    def test_unknown_and_cyclic_references_are_open(self):
+        self.assertTrue(self.table.resolve_expression('local.loop').open)
+        self.assertTrue(self.table.resolve_expression('local.missing').open)
+        self.assertTrue(self.table.resolve_expression('lookup(var.tags, "x")').open)
+
+    def test_strings_resolve_only_when_every_reference_does(self):
+        self.assertIsNone(self.table.resolve_string(self.table.locals['storage']))
+        self.assertEqual(self.table.resolve_string('${local.project}-orders'), 'BidOne-Integration-Demo-orders')
+
+    def test_module_call_inputs_resolve_in_the_caller(self):
+        caller_directory = self.directory / 'root'
+        caller_directory.mkdir()
+        (caller_directory / 'main.tf').write_text(
+            'locals {\n  environment = "dev"\n  tags = {\n    Environment = "dev"\n  }\n}\n')
+        caller = SymbolTable(caller_directory)
+        bound = BoundSymbolTable(self.table, caller, {'environment': '${local.environment}',
+                                                      'tags': '${local.tags}'})
+
+        self.assertEqual(bound.resolve_string(self.table.locals['storage']), 'BidOne-Integration-Demo-dev-st')
+        tags = bound.resolve_expression('local.overridden_tags')
+        self.assertFalse(tags.open)
+        self.assertEqual(tags.known['Environment'], 'dev')
+        self.assertNotIn('Owner', tags.known)
+        # The module's own table is unchanged
+        self.assertIsNone(self.table.resolve_string(self.table.locals['storage']))
+
+
+class SymbolTableRunTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scratch = tempfile.TemporaryDirectory()
+        self.directory = Path(self.scratch.name)
+        (self.directory / 'locals.tf').write_text(LOCALS_TF)
+        (self.directory / 'variables.tf').write_text(VARIABLES_TF)
+
+    def tearDown(self):
+        self.scratch.cleanup()
+
+    def test_tags_from_merged_locals(self):
+        (self.directory / 'main.tf').write_text(
+            'resource "azurerm_storage_account" "orders" {\n  tags = local.service_tags\n}\n\n'
+            'resource "azurerm_key_vault" "secrets" {\n'
+            '  tags = merge(local.common_tags, {\n    Project = "Other"\n  })\n}\n')
+
+        result = run_script(self.directory, 'validate-tags.py', 'main.tf')
+
+        self.assertEqual(result.returncode, 1, result.stdout + result.stderr)
+        self.assertNotIn("azurerm_storage_account.orders", result.stdout)
+        self.assertIn("Resource 'azurerm_key_vault.secrets' is missing required tag: Environment", result.stdout)
+        self.assertIn("Resource 'azurerm_key_vault.secrets' has incorrect Project tag value 'Other'", result.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+API Management policy validation script for BidOne project
+Validates that every API scope rate limits its callers, pairs response
+caching and bounds backend latency with explicit forward-request timeouts
+"""
+
+from pathlib import Path
+import argparse
+
+from iac_runner import add_jobs_argument, run_in_order
+from iac_cache import add_cache_arguments, ruleset_version
+from iac_findings import Finding, add_format_argument
+from iac_baseline import add_baseline_arguments
+from iac_discovery import add_discovery_arguments
+from iac_profile import add_profile_arguments, profiled
+from iac_index import ReleasingCheck
+from iac_apim import effective_sections, enclosing_policies, policy_fingerprint, policy_scope, summarize_policy
+from iac_rules import RULES_FILE, load_rules
+from iac_report import Report, select_files, wrap_check
+
+
+# Policy requirements from the shared rules file (.iac-rules.json)
+RULE_PACK = load_rules()
+REQUIRED_POLICIES = RULE_PACK.apim_required
+PAIRED_POLICIES = RULE_PACK.apim_pairs
+MAX_BACKEND_TIMEOUT = RULE_PACK.apim_max_timeout
+
+# The gateway's forward-request timeout when none is set
+DEFAULT_BACKEND_TIMEOUT = 300
+
+POLICY_ROOTS = ['infra/bicep']
+
+# Rule ids reported in structured output
+RULES = {
+    'policy-xml': 'Policy documents are well-formed XML',
+    'required-policy': 'Every API scope applies the required policies (rate-limit-by-key, forward-request)',
+    'cache-pairing': 'cache-lookup and cache-store are applied together',
+    'backend-timeout': 'forward-request sets an explicit timeout within the backend latency budget',
+}
+
+RULESET_VERSION = ruleset_version(
+    __file__, RULES_FILE, Path(__file__).with_name('iac_rules.py'),
+    Path(__file__).with_name('iac_apim.py'),
+)
+
+
+@profiled
+def validate_required_policies(scope, sections):
+    """Validate that the effective policy applies each required element"""
+    issues = []
+    for section, names in REQUIRED_POLICIES.items():
+        applied = sections[section].elements if section in sections else ()
+        for name in names:
+            if name not in applied:
+                issues.append(Finding('required-policy', f"{scope.label} applies no {name} in {section}",
+                                      address=scope.address))
+    return issues
+
+
+@profiled
+def validate_cache_pairs(scope, sections):
+    """Validate that paired caching policies are applied together"""
+    issues = []
+    for pair in PAIRED_POLICIES:
+        applied = [(section, name) for section, name in pair
+                   if section in sections and name in sections[section].elements]
+        if not applied or len(applied) == len(pair):
+            continue
+        section, name = applied[0]
+        for other_section, other_name in pair:
+            if (other_section, other_name) not in applied:
+                issues.append(Finding('cache-pairing',
+                                      f"{scope.label} applies {name} in {section} "
+                                      f"without {other_name} in {other_section}",
+                                      address=scope.address))
+    return issues
+
+
+@profiled
+def validate_backend_timeouts(scope, sections):
+    """Validate that each forward-request bounds how long the backend may take"""
+    issues = []
+    backend = sections.get('backend')
+    for timeout in backend.timeouts if backend is not None else ():
+        if timeout is None:
+            issues.append(Finding('backend-timeout',
+                                  f"{scope.label} forwards requests without a timeout "
+                                  f"(gateway default {DEFAULT_BACKEND_TIMEOUT}s)",
+                                  address=scope.address))
+        elif timeout.isdigit() and MAX_BACKEND_TIMEOUT is not None and int(timeout) > MAX_BACKEND_TIMEOUT:
+            issues.append(Finding('backend-timeout',
+                                  f"{scope.label} forward-request timeout {timeout}s exceeds "
+                                  f"{MAX_BACKEND_TIMEOUT}s",
+                                  address=scope.address))
+    return issues
+
+
+def check_file(file_path):
+    """Return the policy issues for one file, or None if it is not an APIM policy document"""
+    if file_path.suffix != '.xml':
+        return None
+    summary = summarize_policy(file_path)
+    if summary is None:
+        return None
+
+    scope = policy_scope(file_path)
+    if summary.error is not None:
+        line, _ = summary.error.position
+        return [Finding('policy-xml', f"Policy is not well-formed XML: {summary.error}", line,
+                        address=scope.address)]
+
+    # The gateway runs this scope's policy inside those of the scopes enclosing it
+    summaries = [summarize_policy(outer) for outer in enclosing_policies(file_path)]
+    sections = effective_sections([*summaries, summary])
+
+    issues = validate_required_policies(scope, sections)
+    issues.extend(validate_cache_pairs(scope, sections))
+    issues.extend(validate_backend_timeouts(scope, sections))
+    return issues
+
+
+def describe_scope(file_path):
+    """One line naming the scope a policy file applies to and how it was linked"""
+    scope = policy_scope(file_path)
+    if scope.resources:
+        return f"{scope.label}, loaded by {', '.join(scope.resources)}"
+    return f"{scope.label}, inferred from the file name (no Bicep resource loads it)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate API Management policies')
+    parser.add_argument('files', nargs='*', help='Policy XML files to validate')
+    add_jobs_argument(parser)
+    add_cache_arguments(parser)
+    add_discovery_arguments(parser)
+    add_format_argument(parser)
+    add_baseline_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    profile = args.profile or args.profile_textfile
+
+    report = Report(args, 'validate-apim-policies', RULES, [('APIM policies', 'policy', 'APIM policy')],
+                    details=lambda file_path: f"Scope: {describe_scope(file_path)}")
+
+    files_to_check, _ = select_files(parser, args, roots=POLICY_ROOTS, suffixes=('.xml',))
+    # Profiles should measure the rules themselves
+    check = wrap_check(check_file, 'validate-apim-policies', RULESET_VERSION, args,
+                       dependencies=policy_fingerprint, uncached=profile, profile=profile)
+    report.consume(run_in_order(ReleasingCheck(check), files_to_check, args.jobs), check)
+
+    report.finish([check], [
+        "\nAPIM Policy Guidelines:",
+        "- Rate limit every API with rate-limit-by-key in inbound, directly or through <base />",
+        "- Pair cache-lookup in inbound with cache-store in outbound",
+        f"- Give every forward-request an explicit timeout of at most {MAX_BACKEND_TIMEOUT}s",
+        "- Load policy files with loadTextContent() in apim-config.bicep so their scope is explicit",
+    ], "✓ All APIM policies are valid!")
+
+
+if __name__ == '__main__':
+    main()
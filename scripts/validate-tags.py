@@ -5,202 +5,346 @@ Ensures all resources have required tags defined
 """
 
 import re
-import sys
 import json
+import functools
 from pathlib import Path
 import argparse
 
+from iac_runner import add_jobs_argument
+from iac_index import parse_file, body_contains
+from iac_cache import add_cache_arguments, ruleset_version
+from iac_findings import Finding, finding_at, add_format_argument
+from iac_baseline import add_baseline_arguments
+from iac_discovery import add_discovery_arguments
+from iac_plan import PlanFormatError, planned_resources
+from iac_hcl import decode_value
+from iac_symbols import symbol_table, tags_value
+from iac_modules import instance_fingerprint, module_instances
+from iac_profile import add_profile_arguments, profiled
+from iac_environments import add_environment_arguments, compile_template, load_environments
+from iac_daemon import add_daemon_argument
+from iac_gitdiff import add_since_argument
+from iac_rules import RULES_FILE, load_rules
+from iac_report import Report, run_checks, select_files, wrap_check
 
-# Required tags for BidOne project
-REQUIRED_TAGS = [
-    'Environment',
-    'Project', 
-    'ManagedBy'
-]
 
-# Project-specific tag values
-EXPECTED_TAG_VALUES = {
-    'Project': 'BidOne-Integration-Demo',
-    'ManagedBy': ['Terraform', 'Bicep', 'ARM']
+# Tag policy from the shared rules file (.iac-rules.json)
+RULE_PACK = load_rules()
+REQUIRED_TAGS = list(RULE_PACK.required_tags)
+EXPECTED_TAG_VALUES = RULE_PACK.tag_values
+
+# Rule ids reported in structured output
+RULES = {
+    'tags-present': 'Taggable resources declare tags',
+    'required-tags': f"Resources carry the required tags ({', '.join(REQUIRED_TAGS)})",
+    'tag-values': f"{' and '.join(EXPECTED_TAG_VALUES)} tags have the expected values",
+    'plan-json': 'Plan files are `terraform show -json` output',
 }
 
+RULESET_VERSION = ruleset_version(
+    __file__, RULES_FILE, Path(__file__).with_name('iac_rules.py'),
+    Path(__file__).with_name('iac_symbols.py'), Path(__file__).with_name('iac_modules.py'),
+    Path(__file__).with_name('iac_hcl.py'),
+)
+
 
+@profiled
 def validate_terraform_tags(file_path):
     """Validate Terraform resource tags"""
     issues = []
+    parsed = parse_file(file_path)
+    symbols = instances = None
     
-    with open(file_path, 'r') as f:
-        content = f.read()
-    
-    # Find resource definitions
-    resource_pattern = r'resource\s+"([^"]+)"\s+"([^"]+)"\s*\{([^}]*(?:\{[^}]*\}[^}]*)*)\}'
-    resources = re.findall(resource_pattern, content, re.DOTALL)
-    
-    for resource_type, resource_name, resource_body in resources:
-        # Skip resources that typically don't need tags
-        skip_resources = [
-            'azurerm_resource_group',  # Often tagged differently
-            'random_',  # Random resources don't need tags
-            'data.',    # Data sources don't have tags
-        ]
+    for resource in parsed.resources:
+        resource_type, resource_name = resource.type, resource.name
         
-        if any(skip in resource_type for skip in skip_resources):
+        # Skip resources that typically don't need tags
+        if RULE_PACK.skips_tags(resource_type):
             continue
         
         # Check if tags block exists
-        if 'tags' not in resource_body and '${' not in resource_body:
-            issues.append(f"Resource '{resource_type}.{resource_name}' is missing tags block")
+        if not (body_contains(parsed, resource, 'tags') or body_contains(parsed, resource, '${')):
+            issues.append(finding_at(parsed, resource.start, 'tags-present',
+                                     "Resource '{}.{}' is missing tags block", resource_type, resource_name))
             continue
         
-        # Extract tags block
-        tags_pattern = r'tags\s*=\s*(\{[^}]*\}|\$\{[^}]*\})'
-        tags_match = re.search(tags_pattern, resource_body)
+        # Literal tags block from the index
+        tags_block = resource.tags
         
-        if not tags_match:
+        if tags_block is None:
             # Check if tags are set via variable reference
-            if '${' in resource_body or 'var.' in resource_body or 'local.' in resource_body:
-                continue  # Tags might be set via variables
-            issues.append(f"Resource '{resource_type}.{resource_name}' is missing tags definition")
+            if any(body_contains(parsed, resource, text) for text in ('${', 'var.', 'local.')):
+                tags = tags_value(parsed, resource)
+                if tags is None:
+                    continue
+                if symbols is None:
+                    symbols = symbol_table(file_path)
+                    instances = module_instances(file_path)
+                if not instances:
+                    issues.extend(validate_resolved_tags(symbols.resolve(tags), parsed, resource,
+                                                         f"{resource_type}.{resource_name}"))
+                # Module resources: once per module call, with the tags that call passes
+                for instance in instances:
+                    issues.extend(validate_resolved_tags(instance.symbols.resolve(tags), parsed, resource,
+                                                         f"{instance.address}.{resource_type}.{resource_name}"))
+                continue
+            issues.append(finding_at(parsed, resource.start, 'tags-present',
+                                     "Resource '{}.{}' is missing tags definition", resource_type, resource_name))
             continue
         
-        tags_block = tags_match.group(1)
-        
-        # Check for required tags (basic check - doesn't handle complex interpolations)
-        if not tags_block.startswith('${'):  # Only check literal tag blocks
-            for required_tag in REQUIRED_TAGS:
-                if f'"{required_tag}"' not in tags_block and f'{required_tag}' not in tags_block:
-                    issues.append(f"Resource '{resource_type}.{resource_name}' is missing required tag: {required_tag}")
-        
-        # Validate specific tag values
-        if 'Project' in tags_block:
-            if 'BidOne-Integration-Demo' not in tags_block:
-                issues.append(f"Resource '{resource_type}.{resource_name}' has incorrect Project tag value")
+        # Check for required tags and values (basic check - doesn't handle complex interpolations)
+        missing, incorrect = RULE_PACK.check_literal_tags(tags_block)
+        for required_tag in missing:
+            issues.append(finding_at(parsed, resource.start, 'required-tags',
+                                     "Resource '{}.{}' is missing required tag: {}",
+                                     resource_type, resource_name, required_tag))
+        for tag in incorrect:
+            issues.append(finding_at(parsed, resource.start, 'tag-values',
+                                     "Resource '{}.{}' has incorrect {} tag value", resource_type, resource_name, tag))
     
     return issues
 
 
-def validate_bicep_tags(file_path):
-    """Validate Bicep resource tags"""
+@profiled
+def validate_resolved_tags(tag_map, parsed, resource, address):
+    """Validate tags resolved from local.*, var.* or merge() by a symbol table"""
     issues = []
     
-    with open(file_path, 'r') as f:
-        content = f.read()
+    # Tags a caller may still supply cannot be reported missing
+    if not tag_map.open:
+        for required_tag in REQUIRED_TAGS:
+            if required_tag not in tag_map.known:
+                issues.append(finding_at(parsed, resource.start, 'required-tags',
+                                         "Resource '{}' is missing required tag: {}", address, required_tag,
+                                         address=address))
     
-    # Find resource definitions in Bicep
-    # This is a simplified pattern - Bicep syntax can be more complex
-    resource_pattern = r'resource\s+(\w+)\s+\'([^\']+)\'\s*=\s*\{([^}]*(?:\{[^}]*\}[^}]*)*)\}'
-    resources = re.findall(resource_pattern, content, re.DOTALL)
+    for tag, expected in EXPECTED_TAG_VALUES.items():
+        if tag not in tag_map.certain:
+            continue
+        value = tag_map.known[tag]
+        if value not in expected:
+            issues.append(finding_at(parsed, resource.start, 'tag-values',
+                                     "Resource '{}' has incorrect {} tag value '{}'", address, tag, value,
+                                     address=address))
     
-    for resource_name, resource_type, resource_body in resources:
+    return issues
+
+
+@profiled
+def validate_bicep_tags(file_path):
+    """Validate Bicep resource tags"""
+    issues = []
+    parsed = parse_file(file_path)
+    
+    for resource in parsed.resources:
+        # Only object-valued resources carry a tags property
+        if resource.body_start is None:
+            continue
+        resource_name, resource_type = resource.name, resource.type
+        
         # Skip resources that typically don't need tags
-        if 'Microsoft.Resources/resourceGroups' in resource_type:
+        if RULE_PACK.skips_tags(resource_type, 'bicep'):
             continue
         
         # Check if tags property exists
-        if 'tags:' not in resource_body and 'tags =' not in resource_body:
-            issues.append(f"Bicep resource '{resource_name}' ({resource_type}) is missing tags property")
+        if not (body_contains(parsed, resource, 'tags:') or body_contains(parsed, resource, 'tags =')):
+            issues.append(finding_at(parsed, resource.start, 'tags-present',
+                                     "Bicep resource '{}' ({}) is missing tags property", resource_name, resource_type))
             continue
         
-        # Extract tags section (simplified)
-        tags_pattern = r'tags:\s*\{([^}]*)\}'
-        tags_match = re.search(tags_pattern, resource_body)
+        tags_content = resource.tags
         
-        if not tags_match:
+        if tags_content is None:
             # Check if tags are set via parameter or variable
-            if 'param' in resource_body or 'var(' in resource_body:
+            if body_contains(parsed, resource, 'param') or body_contains(parsed, resource, 'var('):
                 continue  # Tags might be set via parameters
             continue
         
-        tags_content = tags_match.group(1)
-        
         # Check for required tags
-        for required_tag in REQUIRED_TAGS:
-            if required_tag not in tags_content:
-                issues.append(f"Bicep resource '{resource_name}' is missing required tag: {required_tag}")
+        for required_tag in RULE_PACK.missing_tags(tags_content):
+            issues.append(finding_at(parsed, resource.start, 'required-tags',
+                                     "Bicep resource '{}' is missing required tag: {}", resource_name, required_tag))
     
     return issues
 
 
+@profiled
 def validate_tag_variables(file_path):
     """Validate that tag variables have required tags defined"""
     issues = []
     
-    with open(file_path, 'r') as f:
-        content = f.read()
-    
     # Check for tag variable definitions
     if file_path.name == 'variables.tf':
         # Look for tags variable definition
-        tags_var_pattern = r'variable\s+"tags"\s*\{([^}]*)\}'
-        tags_var_match = re.search(tags_var_pattern, content, re.DOTALL)
-        
-        if tags_var_match:
-            tags_var_content = tags_var_match.group(1)
+        parsed = parse_file(file_path)
+        if 'tags' in parsed.variables:
+            body_start, body_end = parsed.variables['tags']
+            tags_var_content = parsed.content[body_start:body_end]
             
             # Check if default includes required tags
             default_pattern = r'default\s*=\s*\{([^}]*)\}'
             default_match = re.search(default_pattern, tags_var_content)
             
-            if default_match:
-                default_content = default_match.group(1)
-                for required_tag in REQUIRED_TAGS:
-                    if required_tag not in default_content:
-                        issues.append(f"Variable 'tags' default is missing required tag: {required_tag}")
+            # An empty default means the caller supplies the tags
+            if default_match and default_match.group(1).strip():
+                for required_tag in RULE_PACK.missing_tags(default_match.group(1)):
+                    issues.append(finding_at(parsed, body_start, 'required-tags',
+                                             "Variable 'tags' default is missing required tag: {}", required_tag,
+                                             address='var.tags'))
     
     return issues
 
 
-def main():
-    parser = argparse.ArgumentParser(description='Validate resource tags')
-    parser.add_argument('files', nargs='*', help='Files to validate')
-    args = parser.parse_args()
+@profiled
+def validate_plan_tags(file_path):
+    """Validate resolved tags in a `terraform show -json` plan"""
+    issues = []
     
-    all_issues = []
+    try:
+        for change, after, after_unknown in planned_resources(file_path):
+            address = change.get('address', '')
+            resource_type = change.get('type', '')
+            
+            # Only resource types with a tags attribute can be tagged
+            if 'tags' not in after or RULE_PACK.skips_tags(resource_type):
+                continue
+            
+            # Tags only known after apply cannot be checked yet
+            if after_unknown.get('tags') is True:
+                continue
+            
+            tags = after.get('tags') or {}
+            if not isinstance(tags, dict):
+                issues.append(Finding('plan-json', "Resource '{}' has tags that are not a map in the plan",
+                                      address=address, args=(address,)))
+                continue
+            for required_tag in REQUIRED_TAGS:
+                if required_tag not in tags:
+                    issues.append(Finding('required-tags', "Resource '{}' is missing required tag: {}",
+                                          address=address, args=(address, required_tag)))
+            
+            # Validate specific tag values
+            for tag, expected in EXPECTED_TAG_VALUES.items():
+                value = tags.get(tag)
+                if value is None or (isinstance(after_unknown.get('tags'), dict) and after_unknown['tags'].get(tag)):
+                    continue
+                if value not in expected:
+                    issues.append(Finding('tag-values', "Resource '{}' has incorrect {} tag value '{}'",
+                                          address=address, args=(address, tag, value)))
+    except PlanFormatError as e:
+        # Report the file and go on to the next one
+        issues.append(Finding('plan-json', f"Plan is not `terraform show -json` output: {e}"))
     
-    # If no files specified, find all relevant files
-    if not args.files:
-        tf_files = list(Path('infra/terraform').rglob('*.tf'))
-        bicep_files = list(Path('infra/bicep').rglob('*.bicep'))
-        files_to_check = tf_files + bicep_files
-    else:
-        files_to_check = [Path(f) for f in args.files]
+    return issues
+
+
+@profiled
+def validate_environment_tags(file_path, environments):
+    """Evaluate interpolated tag values with each environment's tfvars"""
+    issues = []
+    file_environments = environments.for_file(file_path)
+    if not file_environments:
+        return issues
     
-    for file_path in files_to_check:
-        if not file_path.exists():
+    parsed = parse_file(file_path)
+    templates = []
+    for resource in parsed.resources:
+        if resource.tags is None or RULE_PACK.skips_tags(resource.type):
             continue
-            
-        print(f"Checking tags in: {file_path}")
-        
-        issues = []
-        
-        if file_path.suffix == '.tf':
-            issues.extend(validate_terraform_tags(file_path))
-            issues.extend(validate_tag_variables(file_path))
-        elif file_path.suffix == '.bicep':
-            issues.extend(validate_bicep_tags(file_path))
-        else:
-            continue
-        
-        if issues:
-            print(f"  Issues found in {file_path}:")
-            for issue in issues:
-                print(f"    - {issue}")
-            all_issues.extend(issues)
-        else:
-            print(f"  ✓ No tag issues found")
-    
-    if all_issues:
-        print(f"\nTotal tag validation issues: {len(all_issues)}")
-        print(f"\nRequired tags for BidOne project: {', '.join(REQUIRED_TAGS)}")
-        print("\nTag Guidelines:")
-        print("- All Azure resources must have the required tags")
-        print("- Project tag must be 'BidOne-Integration-Demo'")
-        print("- ManagedBy tag should indicate the IaC tool used")
-        print("- Environment tag should be 'dev', 'staging', or 'prod'")
-        sys.exit(1)
+        tags = decode_value('{' + resource.tags + '}')
+        for tag in EXPECTED_TAG_VALUES:
+            value = tags.get(tag)
+            if isinstance(value, str) and '${' in value:
+                templates.append((resource, tag, compile_template(value)))
+    
+    for environment in file_environments:
+        for resource, tag, template in templates:
+            rendered = template.render(environment.values)
+            if rendered is None:
+                continue
+            value, display = rendered
+            expected = EXPECTED_TAG_VALUES[tag]
+            if value not in expected:
+                issues.append(finding_at(parsed, resource.start, 'tag-values',
+                                         "[{}] Resource '{}.{}' has incorrect {} tag value '{}'",
+                                         environment.name, resource.type, resource.name, tag, display))
+    
+    return issues
+
+
+def tag_dependencies(file_path):
+    """
+    Tag findings for .tf files also depend on the module's locals and
+    variables, and on the tags each caller of the module passes
+    """
+    return instance_fingerprint(file_path) if file_path.suffix == '.tf' else ''
+
+
+def check_file(file_path, environments=None):
+    """Return the tag issues for one file, or None if the file type is not validated"""
+    issues = []
+    
+    if file_path.suffix == '.tf':
+        issues.extend(validate_terraform_tags(file_path))
+        issues.extend(validate_tag_variables(file_path))
+        if environments is not None:
+            issues.extend(validate_environment_tags(file_path, environments))
+    elif file_path.suffix == '.bicep':
+        issues.extend(validate_bicep_tags(file_path))
+    elif file_path.suffix == '.json':
+        issues.extend(validate_plan_tags(file_path))
     else:
-        print("\n✓ All tag validations passed!")
-        sys.exit(0)
+        return None
+    
+    return issues
+
+
+def build_check(args, changes=None, profile=False):
+    """
+    Return the per-file check for the parsed options, scoped to changes
+    under --since; lint-iac.py builds the same check to run in its pipeline
+    """
+    check = check_file
+    if args.environments:
+        check = functools.partial(check_file, environments=load_environments(args.environments))
+    
+    # Findings depend on tfvars and sibling variables.tf, and profiles
+    # should measure the rules themselves, so both bypass the cache
+    return wrap_check(check, 'validate-tags', RULESET_VERSION, args, changes, tag_dependencies,
+                      uncached=args.environments or profile, profile=profile)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate resource tags')
+    parser.add_argument('files', nargs='*',
+                        help='Files to validate (.tf, .bicep, or `terraform show -json` plan .json)')
+    add_jobs_argument(parser)
+    add_cache_arguments(parser)
+    add_since_argument(parser)
+    add_discovery_arguments(parser)
+    add_daemon_argument(parser)
+    add_format_argument(parser)
+    add_baseline_arguments(parser)
+    add_environment_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    profile = args.profile or args.profile_textfile
+    report = Report(args, 'validate-tags', RULES, [('tags', 'tag', 'tag validation')])
+    
+    files_to_check, changes = select_files(parser, args)
+    check = build_check(args, changes, profile)
+    results = run_checks('validate-tags', RULESET_VERSION, check, check_file, files_to_check, args,
+                         daemon=not (args.since or args.environments or profile))
+    report.consume(results, check)
+    
+    report.finish([check], [
+        f"\nRequired tags for BidOne project: {', '.join(REQUIRED_TAGS)}",
+        "\nTag Guidelines:",
+        "- All Azure resources must have the required tags",
+        "- Project tag must be 'BidOne-Integration-Demo'",
+        "- ManagedBy tag should indicate the IaC tool used",
+        "- Environment tag should be 'dev', 'staging', or 'prod'",
+    ], "✓ All tag validations passed!")
 
 
 if __name__ == '__main__':